@@ -0,0 +1,232 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from .reasoners.owl import OWLOntology, OWLReasoner
+
+
+class ResultCache:
+    """Persistent, content-addressed cache of reasoner results.
+
+    Entries are keyed by the reasoner name, the hash of its executable, its VM options,
+    the hash of the ontology, the reasoning task, the test mode and the iteration index,
+    so that they are invalidated as soon as any of them changes.
+    """
+
+    def __init__(self, cache_dir: str):
+        """:param cache_dir : Directory where cache entries are stored."""
+        self.cache_dir = cache_dir
+
+    def key(self,
+            reasoner: OWLReasoner,
+            ontology: OWLOntology,
+            task: str,
+            mode: str,
+            iteration: int,
+            **extra) -> str:
+        """Returns the cache key for a reasoner run.
+
+        :param extra : Additional values the results depend on.
+        """
+        components = {
+            'reasoner': reasoner.name,
+            'executable': file_hash(reasoner.path),
+            'vm_opts': reasoner.vm_opts if reasoner.vm_opts else [],
+            'ontology': file_hash(ontology.path),
+            'task': task,
+            'mode': mode,
+            'iteration': iteration
+        }
+        components.update(extra)
+        return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the entry for the specified key, or None if there is no such entry."""
+        try:
+            with open(self._entry_path(key)) as in_file:
+                return json.load(in_file)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, status: str, values: List, **info) -> None:
+        """Stores the results of a reasoner run.
+
+        :param status : Status of the run.
+        :param values : Values of the CSV result fields.
+        :param info : Additional information to store alongside the results.
+        """
+        entry = {'status': status, 'values': values, 'date': time.strftime('%Y-%m-%d %H:%M:%S')}
+        entry.update(info)
+        write_atomic(self._entry_path(key), json.dumps(entry))
+
+    # Private
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+
+class ReferenceStore:
+    """Persistent store of the normalized classification output of the reference reasoner.
+
+    Outputs are gzip-compressed, and keyed by the hash of the ontology, of the reasoner executable
+    and of the owltool jar used to normalize them.
+    """
+
+    def __init__(self, store_dir: str):
+        """:param store_dir : Directory where outputs are stored."""
+        self.store_dir = store_dir
+
+    def key(self, reasoner: OWLReasoner, ontology: OWLOntology) -> str:
+        """Returns the store key for the output of the specified reasoner on the specified ontology."""
+        components = {
+            'reasoner': reasoner.name,
+            'executable': file_hash(reasoner.path),
+            'owl_tool': file_hash(reasoner.owl_tool_path) if reasoner.owl_tool_path else None,
+            'ontology': file_hash(ontology.path)
+        }
+        return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+    def retrieve(self, key: str, output_file: str) -> bool:
+        """Decompresses the stored output to the specified file.
+
+        :return : True if the output was found, False otherwise.
+        """
+        try:
+            in_file = gzip.open(self._entry_path(key), 'rb')
+        except OSError:
+            return False
+
+        try:
+            with in_file, open(output_file, 'wb') as out_file:
+                shutil.copyfileobj(in_file, out_file, _CHUNK_SIZE)
+        except (OSError, EOFError, zlib.error):
+            # Truncated or corrupt entries are misses, and are overwritten when the output is stored again.
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            return False
+
+        return True
+
+    def store(self, key: str, output_file: str) -> None:
+        """Compresses and stores the specified output file."""
+        entry_path = self._entry_path(key)
+        dir_path = os.path.dirname(entry_path)
+        os.makedirs(dir_path, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+
+        try:
+            with open(output_file, 'rb') as in_file, os.fdopen(fd, 'wb') as raw_file:
+                with gzip.GzipFile(fileobj=raw_file, mode='wb') as out_file:
+                    shutil.copyfileobj(in_file, out_file, _CHUNK_SIZE)
+            os.replace(temp_path, entry_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    # Private
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.store_dir, key[:2], key + '.txt.gz')
+
+
+class ConversionStore(ReferenceStore):
+    """Persistent store of ontologies converted to another syntax.
+
+    Conversions are gzip-compressed, and keyed by the hash of the source ontology,
+    of the owltool jar used to convert it and by the target syntax.
+    """
+
+    def key(self, owl_tool_path: str, ontology: OWLOntology, syntax: str) -> str:
+        """Returns the store key for the conversion of the specified ontology to the specified syntax."""
+        components = {
+            'owl_tool': file_hash(owl_tool_path),
+            'ontology': file_hash(ontology.path),
+            'syntax': syntax
+        }
+        return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+
+
+class MetricsCache:
+    """Persistent cache of ontology metrics, keyed by the hash and syntax of the ontology."""
+
+    def __init__(self, cache_dir: str):
+        """:param cache_dir : Directory where metrics are stored."""
+        self.cache_dir = cache_dir
+
+    def get(self, ontology: OWLOntology, version: int) -> Optional[Dict]:
+        """Returns the metrics of the specified ontology, or None if they are not cached.
+
+        :param version : Version of the metrics, which must match that of the cached ones.
+        """
+        try:
+            with open(self._entry_path(ontology)) as in_file:
+                entry = json.load(in_file)
+        except (OSError, ValueError):
+            return None
+
+        return entry['metrics'] if entry.get('version') == version else None
+
+    def set(self, ontology: OWLOntology, version: int, metrics: Dict) -> None:
+        """Stores the metrics of the specified ontology."""
+        write_atomic(self._entry_path(ontology), json.dumps({'version': version, 'metrics': metrics}))
+
+    # Private
+
+    def _entry_path(self, ontology: OWLOntology) -> str:
+        digest = file_hash(ontology.path)
+        return os.path.join(self.cache_dir, digest[:2], '{}_{}.json'.format(digest, ontology.syntax))
+
+
+def file_hash(file_path: str) -> str:
+    """Returns the SHA-256 hash of the contents of a file.
+
+    Hashes are memoized as long as the size and modification time of the file do not change.
+    """
+    stat = os.stat(file_path)
+    memo_key = (file_path, stat.st_size, stat.st_mtime_ns)
+    digest = _HASHES.get(memo_key)
+
+    if not digest:
+        sha = hashlib.sha256()
+
+        with open(file_path, 'rb') as in_file:
+            for chunk in iter(lambda: in_file.read(_CHUNK_SIZE), b''):
+                sha.update(chunk)
+
+        digest = sha.hexdigest()
+        _HASHES[memo_key] = digest
+
+    return digest
+
+
+def remember_hash(file_path: str, size: int, mtime_ns: int, digest: str) -> None:
+    """Memoizes the known hash of a file, as long as its size and modification time do not change."""
+    _HASHES[(file_path, size, mtime_ns)] = digest
+
+
+def write_atomic(file_path: str, contents: str) -> None:
+    """Writes a file atomically, so that concurrent readers never see partial contents."""
+    dir_path = os.path.dirname(file_path)
+    os.makedirs(dir_path, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w') as out_file:
+            out_file.write(contents)
+        os.replace(temp_path, file_path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+# Private
+
+
+_CHUNK_SIZE = 1024 * 1024
+_HASHES = {}
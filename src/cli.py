@@ -1,31 +1,14 @@
 import argparse
+import csv
+import os
+from typing import List, Optional, Tuple
 
 from . import config
 from .config import Reasoners
+from .manifest import OntologyFilter
+from .reasoners.cgroup import CGroupBackend
 from .reasoners.owl import TestMode
-
-from .tests.test import NotImplementedTest
-from .tests.info import InfoTest
-
-from .tests.abduction_contraction import (
-    AbductionContractionTimeTest,
-    AbductionContractionMemoryTest,
-    AbductionContractionMobileTest
-)
-
-from .tests.classification import (
-    ClassificationCorrectnessTest,
-    ClassificationTimeTest,
-    ClassificationMemoryTest,
-    ClassificationMobileTest
-)
-
-from .tests.consistency import (
-    ConsistencyCorrectnessTest,
-    ConsistencyTimeTest,
-    ConsistencyMemoryTest,
-    ConsistencyMobileTest
-)
+from .pyutils import echo
 
 
 # CLI parser
@@ -46,6 +29,8 @@ def process_args() -> int:
 
 def build_parser() -> argparse.ArgumentParser:
     """Build and return the CLI parser."""
+    from .tests.ordering import Order
+
     # Help parser
     help_parser = argparse.ArgumentParser(add_help=False)
 
@@ -66,8 +51,22 @@ def build_parser() -> argparse.ArgumentParser:
                        default=TestMode.ALL[0],
                        help='Test mode.')
 
+    # Resource control parser
+    cgroup_parser = argparse.ArgumentParser(add_help=False)
+
+    group = cgroup_parser.add_argument_group('Resource control')
+    group.add_argument('--cgroup',
+                       help='If set, run each reasoner in a transient cgroup v2 group below this delegated group, '
+                            'which must not contain processes. Linux only.')
+    group.add_argument('--memory-limit',
+                       type=byte_size,
+                       help='Hard memory limit for each reasoner run, e.g. 8G. Requires --cgroup.')
+    group.add_argument('--cpu-limit',
+                       type=positive_float,
+                       help='CPU bandwidth limit for each reasoner run, in CPUs. Requires --cgroup.')
+
     # Configuration parser
-    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser = argparse.ArgumentParser(add_help=False, parents=[cgroup_parser])
 
     group = config_parser.add_argument_group('Configuration')
     group.add_argument('-d', '--datasets',
@@ -80,11 +79,72 @@ def build_parser() -> argparse.ArgumentParser:
                        type=positive_int,
                        default=Reasoners.DEFAULT_ITERATIONS,
                        help='Number of iterations for each test.')
+    group.add_argument('--warmup',
+                       type=non_negative_int,
+                       default=0,
+                       help='Number of discarded warm-up runs for each reasoner and ontology.')
+    group.add_argument('--target-ci',
+                       type=fraction,
+                       help='If set, iterations continue until the relative confidence interval of the median '
+                            'total time (peak memory in memory tests) is below this value, overriding -n.')
+    group.add_argument('--max-iterations',
+                       type=positive_int,
+                       default=Reasoners.MAX_ITERATIONS,
+                       help='Maximum number of iterations if --target-ci is set.')
+    group.add_argument('-t', '--timeouts',
+                       nargs='+',
+                       type=positive_float,
+                       help='Timeouts of successive passes, in seconds. The first pass runs with the first timeout, '
+                            'later passes re-run the jobs which timed out with the next one.')
+    group.add_argument('--relative-timeout',
+                       type=positive_float,
+                       help='If set, cap the timeouts of later passes to this multiple of the time '
+                            'taken by the fastest reasoner on each ontology.')
+    group.add_argument('--min-size',
+                       type=byte_size,
+                       help='If set, skip ontologies smaller than this size (in functional syntax), e.g. 100K.')
+    group.add_argument('--max-size',
+                       type=byte_size,
+                       help='If set, skip ontologies larger than this size (in functional syntax), e.g. 10M.')
+    group.add_argument('--only',
+                       nargs='+',
+                       help='If set, only test ontologies whose file name matches one of these glob patterns.')
     group.add_argument('-f', '--resume-after',
                        help='Resume the test after the specified ontology.')
     group.add_argument('-a', '--all-syntaxes',
                        action='store_true',
                        help='If set, the test is run on all supported syntaxes.')
+    group.add_argument('--vm-profiles',
+                       nargs='+',
+                       type=vm_profile,
+                       help='If set, Java reasoners are run with each of these VM option profiles, '
+                            'each with its own result columns. Profiles are either configured names ({}) '
+                            'or NAME=OPTIONS, with space-separated OPTIONS.'.format(', '.join(Reasoners.VM_PROFILES)))
+    group.add_argument('--order',
+                       choices=Order.ALL,
+                       default=Order.NAME,
+                       help='Order of the ontologies of each dataset. Except for \'{}\', ontologies are ordered '
+                            'by their cost, estimated from stored results or from their size. '
+                            '\'{}\' packs reasoner runs over the --jobs workers by submitting the costliest first, '
+                            'and requires more than one job.'.format(Order.NAME, Order.LPT))
+    group.add_argument('-j', '--jobs',
+                       type=positive_int,
+                       default=1,
+                       help='Number of reasoner runs to execute in parallel, each pinned to its own CPU cores.')
+    group.add_argument('--warm-jvm',
+                       action='store_true',
+                       help='If set, Java reasoners run in long-lived JVM daemons, '
+                            'reporting both cold and steady-state results. Time mode only, and requires '
+                            'jars implementing the daemon protocol.')
+    group.add_argument('--cache',
+                       action='store_true',
+                       help='If set, reuse cached results of unchanged reasoner/ontology combinations.')
+    group.add_argument('--store',
+                       action='store_true',
+                       help='If set, also store results in the SQLite results store.')
+    group.add_argument('--sample-rate',
+                       type=positive_float,
+                       help='If set, sample memory and I/O usage of each reasoner run at this rate (in Hz).')
 
     # Main parser
     main_parser = argparse.ArgumentParser(prog='test',
@@ -134,6 +194,149 @@ def build_parser() -> argparse.ArgumentParser:
 
     parser_info.set_defaults(func=info_sub)
 
+    # Matrix subcommand
+    desc = 'Run the tests of a benchmark matrix file.'
+    parser_matrix = subparsers.add_parser('matrix',
+                                          description=desc,
+                                          help=desc,
+                                          parents=[help_parser, cgroup_parser],
+                                          add_help=False)
+
+    parser_matrix.add_argument('file',
+                               help='Matrix file, either TOML (.toml) or JSON.')
+    parser_matrix.add_argument('--dry-run',
+                               action='store_true',
+                               help='Only print the run plan.')
+
+    parser_matrix.set_defaults(func=matrix_sub)
+
+    # Index subcommand
+    desc = 'Refresh the manifests of the datasets, which index their ontology files.'
+    parser_index = subparsers.add_parser('index',
+                                         description=desc,
+                                         help=desc,
+                                         parents=[help_parser],
+                                         add_help=False)
+
+    parser_index.add_argument('-d', '--datasets',
+                              nargs='+',
+                              help='Desired datasets.')
+    parser_index.add_argument('--rescan',
+                              action='store_true',
+                              help='Check every file, rather than only those in directories modified '
+                                   'since the last refresh. Needed to detect files rewritten in place.')
+
+    parser_index.set_defaults(func=index_sub)
+
+    # Prepare subcommand
+    desc = 'Convert the ontologies of the datasets to the syntaxes they are missing in.'
+    parser_prepare = subparsers.add_parser('prepare',
+                                           description=desc,
+                                           help=desc,
+                                           parents=[help_parser],
+                                           add_help=False)
+
+    parser_prepare.add_argument('-d', '--datasets',
+                                nargs='+',
+                                help='Desired datasets.')
+    parser_prepare.add_argument('-j', '--jobs',
+                                type=positive_int,
+                                default=os.cpu_count() or 1,
+                                help='Number of conversions to run in parallel.')
+    parser_prepare.add_argument('--dry-run',
+                                action='store_true',
+                                help='Only print the conversions which would be run.')
+
+    parser_prepare.set_defaults(func=prepare_sub)
+
+    # Import subcommand
+    desc = 'Import performance test results directories into the results store.'
+    parser_import = subparsers.add_parser('import',
+                                          description=desc,
+                                          help=desc,
+                                          parents=[help_parser],
+                                          add_help=False)
+
+    parser_import.add_argument('dirs',
+                               nargs='+',
+                               help='Results directories.')
+    parser_import.add_argument('--db',
+                               default=config.Paths.RESULTS_DB,
+                               help='Path of the results store.')
+    parser_import.add_argument('--dataset',
+                               default='',
+                               help='Dataset of the imported results, which results directories do not record.')
+
+    parser_import.set_defaults(func=import_sub)
+
+    # Report subcommand
+    desc = 'Aggregate performance test results directories.'
+    parser_report = subparsers.add_parser('report',
+                                          description=desc,
+                                          help=desc,
+                                          parents=[help_parser],
+                                          add_help=False)
+
+    parser_report.add_argument('dirs',
+                               nargs='+',
+                               help='Results directories.')
+    parser_report.add_argument('-o', '--output',
+                               help='If set, export per-ontology statistics to this CSV file.')
+    parser_report.add_argument('-p', '--per-ontology',
+                               action='store_true',
+                               help='Print per-ontology statistics instead of the summary.')
+    parser_report.add_argument('--per-axiom',
+                               nargs='+',
+                               metavar='DATASET',
+                               help='If set, divide time fields by the number of logical axioms of each ontology, '
+                                    'as found in these datasets.')
+
+    parser_report.set_defaults(func=report_sub)
+
+    # Compare subcommand
+    desc = 'Compare performance test results against a baseline.'
+    parser_compare = subparsers.add_parser('compare',
+                                           description=desc,
+                                           help=desc,
+                                           parents=[help_parser],
+                                           add_help=False)
+
+    group = parser_compare.add_argument_group('Result sets')
+    group.add_argument('-b', '--baseline',
+                       nargs='+',
+                       required=True,
+                       help='Baseline results directories.')
+    group.add_argument('-c', '--candidate',
+                       nargs='+',
+                       required=True,
+                       help='Candidate results directories.')
+    group.add_argument('-f', '--fields',
+                       nargs='+',
+                       help='If set, only compare these result fields.')
+
+    group = parser_compare.add_argument_group('Thresholds')
+    group.add_argument('--alpha',
+                       type=fraction,
+                       default=0.05,
+                       help='Significance level of the Mann-Whitney U test.')
+    group.add_argument('--min-change',
+                       type=fraction,
+                       default=0.05,
+                       help='Minimum relative change of the medians for a difference to be reported.')
+    group.add_argument('--max-slowdown',
+                       type=positive_float,
+                       default=0.1,
+                       help='Exit with an error if a time field significantly grows more than this (relative).')
+    group.add_argument('--max-memory-growth',
+                       type=positive_float,
+                       default=0.1,
+                       help='Exit with an error if a memory field significantly grows more than this (relative).')
+
+    parser_compare.add_argument('-o', '--output',
+                                help='If set, export the comparison of all paired cells to this CSV file.')
+
+    parser_compare.set_defaults(func=compare_sub)
+
     return main_parser
 
 
@@ -141,80 +344,456 @@ def build_parser() -> argparse.ArgumentParser:
 
 
 def abduction_contraction_sub(args) -> int:
+    from .tests import abduction_contraction as tests
+    from .tests.test import NotImplementedTest
+    check_options(args, [] if args.mode in [TestMode.CORRECTNESS, TestMode.COMBINED] else _ITERATION_OPTIONS)
+    ontologies = ontology_filter(args)
     datasets = args.datasets if args.datasets else ['sisinflab']
+
+    # Only the selected test is built, and with it its reasoners.
     {
-        TestMode.CORRECTNESS: NotImplementedTest(),
+        TestMode.CORRECTNESS: NotImplementedTest,
+
+        TestMode.TIME: lambda: tests.AbductionContractionTimeTest(datasets=datasets,
+                                                                  reasoners=args.reasoners,
+                                                                  ontology_filter=ontologies,
+                                                                  **iteration_args(args)),
 
-        TestMode.TIME: AbductionContractionTimeTest(datasets=datasets,
-                                                    reasoners=args.reasoners,
-                                                    iterations=args.num_iterations),
+        TestMode.MEMORY: lambda: tests.AbductionContractionMemoryTest(datasets=datasets,
+                                                                      reasoners=args.reasoners,
+                                                                      ontology_filter=ontologies,
+                                                                      **iteration_args(args)),
 
-        TestMode.MEMORY: AbductionContractionMemoryTest(datasets=datasets,
-                                                        reasoners=args.reasoners,
-                                                        iterations=args.num_iterations),
+        TestMode.COMBINED: NotImplementedTest,
 
-        TestMode.MOBILE: AbductionContractionMobileTest(datasets=datasets,
-                                                        reasoners=args.reasoners,
-                                                        iterations=args.num_iterations)
-    }[args.mode].start(args.resume_after)
+        TestMode.MOBILE: lambda: tests.AbductionContractionMobileTest(datasets=datasets,
+                                                                      reasoners=args.reasoners,
+                                                                      ontology_filter=ontologies,
+                                                                      **iteration_args(args))
+    }[args.mode]().start(args.resume_after)
     return 0
 
 
 def classification_sub(args) -> int:
+    from .tests import classification as tests
+    check_options(args, standard_options(args.mode))
+    ontologies = ontology_filter(args)
+    cgroups = cgroup_backend(args)
     {
-        TestMode.CORRECTNESS: ClassificationCorrectnessTest(datasets=args.datasets,
-                                                            reasoners=args.reasoners),
-
-        TestMode.TIME: ClassificationTimeTest(datasets=args.datasets,
-                                              reasoners=args.reasoners,
-                                              all_syntaxes=args.all_syntaxes,
-                                              iterations=args.num_iterations),
-
-        TestMode.MEMORY: ClassificationMemoryTest(datasets=args.datasets,
-                                                  reasoners=args.reasoners,
-                                                  all_syntaxes=args.all_syntaxes,
-                                                  iterations=args.num_iterations),
-
-        TestMode.MOBILE: ClassificationMobileTest(datasets=args.datasets,
-                                                  reasoners=args.reasoners,
-                                                  iterations=args.num_iterations)
-    }[args.mode].start(args.resume_after)
+        TestMode.CORRECTNESS: lambda: tests.ClassificationCorrectnessTest(datasets=args.datasets,
+                                                                          reasoners=args.reasoners,
+                                                                          ontology_filter=ontologies),
+
+        TestMode.TIME: lambda: tests.ClassificationTimeTest(datasets=args.datasets,
+                                                            reasoners=args.reasoners,
+                                                            ontology_filter=ontologies,
+                                                            order=args.order,
+                                                            all_syntaxes=args.all_syntaxes,
+                                                            **iteration_args(args),
+                                                            **timeout_args(args),
+                                                            jobs=args.jobs,
+                                                            warm_jvm=args.warm_jvm,
+                                                            cache=args.cache,
+                                                            sample_rate=args.sample_rate,
+                                                            cgroups=cgroups,
+                                                            store=args.store,
+                                                            vm_profiles=args.vm_profiles),
+
+        TestMode.MEMORY: lambda: tests.ClassificationMemoryTest(datasets=args.datasets,
+                                                                reasoners=args.reasoners,
+                                                                ontology_filter=ontologies,
+                                                                order=args.order,
+                                                                all_syntaxes=args.all_syntaxes,
+                                                                **iteration_args(args),
+                                                                **timeout_args(args),
+                                                                jobs=args.jobs,
+                                                                cache=args.cache,
+                                                                sample_rate=args.sample_rate,
+                                                                cgroups=cgroups,
+                                                                store=args.store,
+                                                                vm_profiles=args.vm_profiles),
+
+        TestMode.COMBINED: lambda: tests.ClassificationCombinedTest(datasets=args.datasets,
+                                                                    reasoners=args.reasoners,
+                                                                    ontology_filter=ontologies,
+                                                                    order=args.order,
+                                                                    all_syntaxes=args.all_syntaxes,
+                                                                    **iteration_args(args),
+                                                                    **timeout_args(args),
+                                                                    jobs=args.jobs,
+                                                                    cache=args.cache,
+                                                                    sample_rate=args.sample_rate,
+                                                                    cgroups=cgroups,
+                                                                    store=args.store,
+                                                                    vm_profiles=args.vm_profiles),
+
+        TestMode.MOBILE: lambda: tests.ClassificationMobileTest(datasets=args.datasets,
+                                                                reasoners=args.reasoners,
+                                                                ontology_filter=ontologies,
+                                                                order=args.order,
+                                                                **iteration_args(args),
+                                                                **timeout_args(args),
+                                                                store=args.store)
+    }[args.mode]().start(args.resume_after)
     return 0
 
 
 def consistency_sub(args) -> int:
+    from .tests import consistency as tests
+    check_options(args, standard_options(args.mode))
+    ontologies = ontology_filter(args)
+    cgroups = cgroup_backend(args)
     {
-        TestMode.CORRECTNESS: ConsistencyCorrectnessTest(datasets=args.datasets,
-                                                         reasoners=args.reasoners),
-
-        TestMode.TIME: ConsistencyTimeTest(datasets=args.datasets,
-                                           reasoners=args.reasoners,
-                                           all_syntaxes=args.all_syntaxes,
-                                           iterations=args.num_iterations),
-
-        TestMode.MEMORY: ConsistencyMemoryTest(datasets=args.datasets,
-                                               reasoners=args.reasoners,
-                                               all_syntaxes=args.all_syntaxes,
-                                               iterations=args.num_iterations),
-
-        TestMode.MOBILE: ConsistencyMobileTest(datasets=args.datasets,
-                                               reasoners=args.reasoners,
-                                               iterations=args.num_iterations)
-    }[args.mode].start(args.resume_after)
+        TestMode.CORRECTNESS: lambda: tests.ConsistencyCorrectnessTest(datasets=args.datasets,
+                                                                       reasoners=args.reasoners,
+                                                                       ontology_filter=ontologies),
+
+        TestMode.TIME: lambda: tests.ConsistencyTimeTest(datasets=args.datasets,
+                                                         reasoners=args.reasoners,
+                                                         ontology_filter=ontologies,
+                                                         order=args.order,
+                                                         all_syntaxes=args.all_syntaxes,
+                                                         **iteration_args(args),
+                                                         **timeout_args(args),
+                                                         jobs=args.jobs,
+                                                         warm_jvm=args.warm_jvm,
+                                                         cache=args.cache,
+                                                         sample_rate=args.sample_rate,
+                                                         cgroups=cgroups,
+                                                         store=args.store,
+                                                         vm_profiles=args.vm_profiles),
+
+        TestMode.MEMORY: lambda: tests.ConsistencyMemoryTest(datasets=args.datasets,
+                                                             reasoners=args.reasoners,
+                                                             ontology_filter=ontologies,
+                                                             order=args.order,
+                                                             all_syntaxes=args.all_syntaxes,
+                                                             **iteration_args(args),
+                                                             **timeout_args(args),
+                                                             jobs=args.jobs,
+                                                             cache=args.cache,
+                                                             sample_rate=args.sample_rate,
+                                                             cgroups=cgroups,
+                                                             store=args.store,
+                                                             vm_profiles=args.vm_profiles),
+
+        TestMode.COMBINED: lambda: tests.ConsistencyCombinedTest(datasets=args.datasets,
+                                                                 reasoners=args.reasoners,
+                                                                 ontology_filter=ontologies,
+                                                                 order=args.order,
+                                                                 all_syntaxes=args.all_syntaxes,
+                                                                 **iteration_args(args),
+                                                                 **timeout_args(args),
+                                                                 jobs=args.jobs,
+                                                                 cache=args.cache,
+                                                                 sample_rate=args.sample_rate,
+                                                                 cgroups=cgroups,
+                                                                 store=args.store,
+                                                                 vm_profiles=args.vm_profiles),
+
+        TestMode.MOBILE: lambda: tests.ConsistencyMobileTest(datasets=args.datasets,
+                                                             reasoners=args.reasoners,
+                                                             ontology_filter=ontologies,
+                                                             order=args.order,
+                                                             **iteration_args(args),
+                                                             **timeout_args(args),
+                                                             store=args.store)
+    }[args.mode]().start(args.resume_after)
     return 0
 
 
 def info_sub(args) -> int:
+    from .tests.info import InfoTest
+    check_options(args, ['all_syntaxes', 'jobs'])
     InfoTest(datasets=args.datasets,
-             reasoners=args.reasoners).start(args.resume_after)
+             reasoners=args.reasoners,
+             all_syntaxes=args.all_syntaxes,
+             ontology_filter=ontology_filter(args),
+             jobs=args.jobs).start(args.resume_after)
+    return 0
+
+
+def matrix_sub(args) -> int:
+    from . import matrix
+    run_plan = matrix.plan(matrix.load(args.file))
+
+    if args.dry_run:
+        run_plan.print()
+    else:
+        run_plan.run(cgroup_backend(args))
+
+    return 0
+
+
+def index_sub(args) -> int:
+    from .manifest import DatasetManifest
+    from .tests.test import dataset_dirs
+
+    for dataset in dataset_dirs(args.datasets):
+        manifest = DatasetManifest(dataset)
+        changed = manifest.refresh(rescan=args.rescan)
+        unpaired = manifest.unpaired
+
+        echo.pretty('{}: {} ontologies{}'.format(os.path.basename(dataset), len(manifest.onto_names),
+                                                 ' (updated)' if changed else ''))
+
+        for onto_name, syntaxes in unpaired.items():
+            echo.pretty('    {}: no {} file'.format(onto_name, ', '.join(syntaxes)), color=echo.Color.YELLOW)
+
+    return 0
+
+
+def prepare_sub(args) -> int:
+    from .prepare import DatasetPreparer
+    from .tests.test import dataset_dirs
+    failed = 0
+
+    for dataset in dataset_dirs(args.datasets):
+        preparer = DatasetPreparer(dataset, jobs=args.jobs)
+        conversions = preparer.plan()
+
+        echo.pretty('{}: {} conversions'.format(os.path.basename(dataset), len(conversions)), color=echo.Color.GREEN)
+
+        if args.dry_run:
+            for conversion in conversions:
+                echo.pretty('    {}: {} -> {}'.format(conversion.onto_name, conversion.source.syntax,
+                                                      conversion.syntax))
+        elif conversions:
+            failed += preparer.run(conversions)
+
+    return 1 if failed else 0
+
+
+def import_sub(args) -> int:
+    from .store import ResultStore
+    ret_val = 0
+
+    with ResultStore(args.db) as store:
+        for results_dir in args.dirs:
+            try:
+                count = store.import_dir(results_dir, args.dataset)
+                echo.pretty('{}: {} measurements'.format(results_dir, count))
+            except (OSError, ValueError) as e:
+                echo.error('{}: {}'.format(results_dir, e))
+                ret_val = 1
+
+    return ret_val
+
+
+def report_sub(args) -> int:
+    # NumPy is only required by this subcommand.
+    from . import report
+
+    results = report.load_results(args.dirs)
+
+    if args.per_axiom:
+        from .cache import MetricsCache
+        from .metrics import logical_axiom_counts
+        from .tests.test import dataset_dirs, dataset_entries
+
+        entries = [e for dataset in dataset_dirs(args.per_axiom) for e in dataset_entries(dataset)]
+        results = report.per_axiom(results, logical_axiom_counts(entries, MetricsCache(config.Paths.METRICS_DIR)))
+
+    cells = report.cell_table(results) if args.per_ontology or args.output else None
+    print(report.format_table(*(cells if args.per_ontology else report.summary_table(results))))
+
+    if args.output:
+        with open(args.output, 'w') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(cells[0])
+            writer.writerows(cells[1])
+
+    return 0
+
+
+def compare_sub(args) -> int:
+    # NumPy is only required by this subcommand.
+    from . import compare, report
+
+    baseline = report.load_results(args.baseline)
+    candidate = report.load_results(args.candidate)
+
+    if args.fields:
+        baseline = baseline.select_fields(args.fields)
+        candidate = candidate.select_fields(args.fields)
+
+    comparison = compare.Comparison(baseline, candidate, alpha=args.alpha, min_change=args.min_change)
+    summary = comparison.summary()
+
+    if not summary:
+        raise ValueError('No cells in common between the baseline and candidate results.')
+
+    changes = [compare.Change.SLOWER, compare.Change.FASTER, compare.Change.MORE_MEMORY,
+               compare.Change.LESS_MEMORY, compare.Change.LOST, compare.Change.GAINED]
+    print(report.format_table(['Test', 'Reasoner', 'Syntax', 'Field', 'Paired'] +
+                              [c.capitalize() for c in changes] + ['Change (%)'],
+                              [list(column) + [stats['paired']] + [stats[c] for c in changes] + [stats['change']]
+                               for column, stats in summary]))
+
+    changed = comparison.changed()
+
+    if len(changed):
+        echo.pretty('\nSignificant changes:')
+        print(report.format_table(*comparison.rows(changed)))
+
+    if args.output:
+        header, rows = comparison.rows()
+
+        with open(args.output, 'w') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    regressions = comparison.regressions(args.max_slowdown, args.max_memory_growth)
+
+    if len(regressions):
+        echo.error('{} regressions beyond thresholds.'.format(len(regressions)))
+        return 1
+
     return 0
 
 
 # Utils
 
 
+def iteration_args(args) -> dict:
+    """Iteration-related arguments for performance tests."""
+    return {
+        'iterations': args.num_iterations,
+        'warmup': args.warmup,
+        'target_ci': args.target_ci,
+        'max_iterations': args.max_iterations
+    }
+
+
+def timeout_args(args) -> dict:
+    """Timeout-related arguments for standard performance tests."""
+    return {
+        'timeouts': args.timeouts,
+        'relative_timeout': args.relative_timeout
+    }
+
+
+def standard_options(mode: str) -> List[str]:
+    """Test options honored by standard reasoning tests in the specified mode."""
+    if mode == TestMode.CORRECTNESS:
+        return []
+
+    if mode == TestMode.MOBILE:
+        return _ITERATION_OPTIONS + _TIMEOUT_OPTIONS + ['order', 'store']
+
+    options = _ITERATION_OPTIONS + _TIMEOUT_OPTIONS + ['all_syntaxes', 'vm_profiles', 'order', 'jobs', 'cache',
+                                                     'store', 'sample_rate', 'cgroup']
+
+    # JVM daemons are only used to measure time.
+    return options + ['warm_jvm'] if mode == TestMode.TIME else options
+
+
+def check_options(args, supported: List[str]) -> None:
+    """Raises a ValueError if test options which are not supported by the selected test are set.
+
+    :param supported : Names of the supported test options.
+    """
+    unsupported = [flag for name, flag, default in _test_options()
+                   if name not in supported and getattr(args, name) != default]
+
+    if unsupported:
+        raise ValueError('Not supported by this test: {}'.format(', '.join(unsupported)))
+
+
+def ontology_filter(args) -> Optional[OntologyFilter]:
+    """Ontology filter for tests."""
+    if args.min_size is None and args.max_size is None and not args.only:
+        return None
+
+    return OntologyFilter(min_size=args.min_size, max_size=args.max_size, patterns=args.only)
+
+
+def cgroup_backend(args) -> Optional[CGroupBackend]:
+    """cgroup backend for standard performance tests."""
+    if not args.cgroup:
+        if args.memory_limit or args.cpu_limit:
+            raise ValueError('Resource limits require --cgroup.')
+        return None
+
+    return CGroupBackend(args.cgroup, memory_max=args.memory_limit, cpu_max=args.cpu_limit)
+
+
+def vm_profile(value: str) -> Tuple[str, List[str]]:
+    try:
+        return Reasoners.vm_profile(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def fraction(value: str) -> float:
+    fvalue = float(value)
+    if not 0.0 < fvalue < 1.0:
+        raise argparse.ArgumentTypeError('{} is not in the (0, 1) range.'.format(value))
+    return fvalue
+
+
+def non_negative_int(value: str) -> int:
+    ivalue = int(value)
+    if ivalue < 0:
+        raise argparse.ArgumentTypeError('{} is not a non-negative int.'.format(value))
+    return ivalue
+
+
 def positive_int(value: str) -> int:
     ivalue = int(value)
     if ivalue <= 0:
         raise argparse.ArgumentTypeError('{} is not a positive int.'.format(value))
     return ivalue
+
+
+def positive_float(value: str) -> float:
+    fvalue = float(value)
+    if fvalue <= 0.0:
+        raise argparse.ArgumentTypeError('{} is not a positive number.'.format(value))
+    return fvalue
+
+
+def byte_size(value: str) -> int:
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    unit = value[-1:].upper()
+
+    try:
+        size = int(float(value[:-1]) * units[unit]) if unit in units else int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('{} is not a valid size.'.format(value))
+
+    if size <= 0:
+        raise argparse.ArgumentTypeError('{} is not a positive size.'.format(value))
+
+    return size
+
+
+# Private
+
+
+_ITERATION_OPTIONS = ['num_iterations', 'warmup', 'target_ci', 'max_iterations']
+_TIMEOUT_OPTIONS = ['timeouts', 'relative_timeout']
+
+
+def _test_options() -> List[Tuple[str, str, object]]:
+    """Test options of the configuration parser which only some tests support, with their flags and defaults."""
+    from .tests.ordering import Order
+
+    return [
+        ('num_iterations', '--num-iterations', Reasoners.DEFAULT_ITERATIONS),
+        ('warmup', '--warmup', 0),
+        ('target_ci', '--target-ci', None),
+        ('max_iterations', '--max-iterations', Reasoners.MAX_ITERATIONS),
+        ('timeouts', '--timeouts', None),
+        ('relative_timeout', '--relative-timeout', None),
+        ('all_syntaxes', '--all-syntaxes', False),
+        ('vm_profiles', '--vm-profiles', None),
+        ('order', '--order', Order.NAME),
+        ('jobs', '--jobs', 1),
+        ('warm_jvm', '--warm-jvm', False),
+        ('cache', '--cache', False),
+        ('store', '--store', False),
+        ('sample_rate', '--sample-rate', None),
+        ('cgroup', '--cgroup', None)
+    ]
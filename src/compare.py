@@ -0,0 +1,251 @@
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .report import ResultSet, is_memory_field
+
+
+class Change:
+    """Namespace for the verdicts of a comparison."""
+    SLOWER = 'slower'
+    FASTER = 'faster'
+    MORE_MEMORY = 'more memory'
+    LESS_MEMORY = 'less memory'
+    LOST = 'lost'
+    GAINED = 'gained'
+
+    REGRESSIONS = [SLOWER, MORE_MEMORY, LOST]
+
+
+class Comparison:
+    """Cell by cell comparison of a candidate result set against a baseline.
+
+    Cells are paired by test, reasoner, syntax, field and ontology. Each pair of cells is compared
+    through a two-sided Mann-Whitney U test over the successful iterations, and the effect size
+    is reported both as the ratio of the medians and as the rank-biserial correlation,
+    which is positive if candidate values tend to be greater than baseline values.
+    """
+
+    def __init__(self,
+                 baseline: ResultSet,
+                 candidate: ResultSet,
+                 alpha: float = 0.05,
+                 min_change: float = 0.05):
+        """
+        :param baseline : Baseline results.
+        :param candidate : Candidate results.
+        :param alpha : Significance level.
+        :param min_change : Minimum relative change of the medians for a difference to be reported.
+        """
+        self.alpha = alpha
+        self.min_change = min_change
+
+        base_idx, cand_idx = _pair_cells(baseline, candidate)
+        self.columns = baseline.columns
+        self.ontologies = baseline.ontologies
+        self.cell_columns = baseline.cell_columns[base_idx]
+        self.cell_ontologies = baseline.cell_ontologies[base_idx]
+
+        x, y = baseline.values[base_idx], candidate.values[cand_idx]
+        self.baseline_runs = baseline.status_counts[base_idx].sum(axis=1)
+        self.candidate_runs = candidate.status_counts[cand_idx].sum(axis=1)
+        self.baseline_solved = x.count(axis=1)
+        self.candidate_solved = y.count(axis=1)
+        self.baseline_median = np.ma.median(x, axis=1).filled(np.nan)
+        self.candidate_median = np.ma.median(y, axis=1).filled(np.nan)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.ratio = self.candidate_median / self.baseline_median
+
+        self.u, self.p_value = mann_whitney_u(x, y)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.effect = 2.0 * self.u / (self.baseline_solved * self.candidate_solved) - 1.0
+
+        self.changes = self._changes()
+
+    def changed(self) -> np.ndarray:
+        """Indexes of the changed cells, sorted by decreasing ratio of the medians."""
+        idx = np.nonzero(self.changes != '')[0]
+        return idx[np.argsort(-np.nan_to_num(self.ratio[idx], nan=0.0, posinf=np.inf), kind='stable')]
+
+    def regressions(self, max_slowdown: float, max_memory_growth: float) -> np.ndarray:
+        """Indexes of the regressed cells whose change exceeds the specified thresholds.
+
+        :param max_slowdown : Maximum tolerated relative increase of time fields.
+        :param max_memory_growth : Maximum tolerated relative increase of memory fields.
+        """
+        limits = np.where(self._memory_fields(), max_memory_growth, max_slowdown)
+        exceeded = (self.changes == Change.LOST) | (np.isin(self.changes, Change.REGRESSIONS) &
+                                                     (self.ratio - 1.0 > limits))
+        return np.nonzero(exceeded)[0]
+
+    def summary(self) -> List[Tuple[Tuple[str, str, str, str], Dict]]:
+        """Summary of the comparison for each column.
+
+        :return : Column, and number of paired cells, number of cells for each change, and relative change
+                  (in percent) of the geometric mean of the ratios of the medians of the cells solved in both sets.
+        """
+        col_idx = self.cell_columns
+        n_columns = len(self.columns)
+
+        both = (self.baseline_solved > 0) & (self.candidate_solved > 0) & (self.ratio > 0)
+        log_ratio = np.where(both, np.log(np.where(both, self.ratio, 1.0)), 0.0)
+        paired = np.bincount(col_idx, minlength=n_columns)
+        solved = np.bincount(col_idx, weights=both, minlength=n_columns)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            geo_mean = np.exp(np.bincount(col_idx, weights=log_ratio, minlength=n_columns) / solved)
+
+        counts = {c: np.bincount(col_idx[self.changes == c], minlength=n_columns)
+                  for c in (Change.SLOWER, Change.FASTER, Change.MORE_MEMORY, Change.LESS_MEMORY,
+                            Change.LOST, Change.GAINED)}
+        change = _to_list((geo_mean - 1.0) * 100.0)
+        summary = []
+
+        for idx in np.nonzero(paired)[0].tolist():
+            stats = {'paired': int(paired[idx]), 'change': change[idx]}
+            stats.update((c, int(count[idx])) for c, count in counts.items())
+            summary.append((self.columns[idx], stats))
+
+        return summary
+
+    def rows(self, indexes: Optional[np.ndarray] = None) -> Tuple[List[str], List[List]]:
+        """Returns the header and rows of a table with the comparison of the specified cells."""
+        if indexes is None:
+            indexes = np.arange(len(self.cell_columns))
+
+        header = ['Test', 'Reasoner', 'Syntax', 'Field', 'Ontology', 'Baseline', 'Candidate', 'Change (%)',
+                  'Effect', 'p', 'Verdict']
+        columns = [_to_list(values[indexes]) for values in (self.baseline_median, self.candidate_median,
+                                                            (self.ratio - 1.0) * 100.0, self.effect, self.p_value)]
+        columns.append(self.changes[indexes].tolist())
+        rows = [list(self.columns[col]) + [self.ontologies[onto]] + [c[i] for c in columns]
+                for i, (col, onto) in enumerate(zip(self.cell_columns[indexes].tolist(),
+                                                    self.cell_ontologies[indexes].tolist()))]
+
+        return header, rows
+
+    # Private
+
+    def _memory_fields(self) -> np.ndarray:
+        return np.array([is_memory_field(c[3]) for c in self.columns], dtype=bool)[self.cell_columns]
+
+    def _changes(self) -> np.ndarray:
+        changes = np.full(len(self.cell_columns), '', dtype=object)
+        memory = self._memory_fields()
+
+        significant = (self.p_value < self.alpha) & (np.abs(self.ratio - 1.0) >= self.min_change)
+        increased = significant & (self.ratio > 1.0)
+        decreased = significant & (self.ratio < 1.0)
+
+        changes[increased & ~memory] = Change.SLOWER
+        changes[increased & memory] = Change.MORE_MEMORY
+        changes[decreased & ~memory] = Change.FASTER
+        changes[decreased & memory] = Change.LESS_MEMORY
+
+        # Cells that were only solved in one of the sets.
+        lost = (self.baseline_solved > 0) & (self.candidate_solved == 0) & (self.candidate_runs > 0)
+        gained = (self.baseline_solved == 0) & (self.candidate_solved > 0) & (self.baseline_runs > 0)
+        changes[lost] = Change.LOST
+        changes[gained] = Change.GAINED
+
+        return changes
+
+
+def mann_whitney_u(x: np.ma.MaskedArray, y: np.ma.MaskedArray) -> Tuple[np.ndarray, np.ndarray]:
+    """Two-sided Mann-Whitney U test between the rows of two masked arrays.
+
+    The exact distribution of U is used for small samples without ties,
+    otherwise the normal approximation with tie and continuity corrections.
+
+    :return : U statistic of y and p-value of each row. The p-value is NaN if a sample
+              has less than two values.
+    """
+    xv, yv = x.filled(np.nan), y.filled(np.nan)
+    n1, n2 = x.count(axis=1), y.count(axis=1)
+
+    # Comparisons involving masked values (NaN) are always false.
+    u = ((yv[:, None, :] > xv[:, :, None]).sum(axis=(1, 2)) +
+         0.5 * (yv[:, None, :] == xv[:, :, None]).sum(axis=(1, 2)))
+
+    # Each group of t tied values contributes t^3 - t to the tie correction.
+    values = np.concatenate((xv, yv), axis=1)
+    tie_counts = (values[:, :, None] == values[:, None, :]).sum(axis=2)
+    ties = np.where(np.isnan(values), 0, tie_counts ** 2 - 1).sum(axis=1)
+
+    n = n1 + n2
+    mean = n1 * n2 / 2.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = n1 * n2 / 12.0 * ((n + 1) - ties / (n * (n - 1)))
+        z = np.maximum(np.abs(u - mean) - 0.5, 0.0) / np.sqrt(var)
+
+    exact = (ties == 0) & (n1 <= _EXACT_MAX_SIZE) & (n2 <= _EXACT_MAX_SIZE)
+    p_value = np.full(len(u), np.nan)
+    approx = np.nonzero(~exact & np.isfinite(z))[0]
+    p_value[approx] = [math.erfc(v / math.sqrt(2.0)) for v in z[approx].tolist()]
+
+    for s1, s2 in set(zip(n1[exact].tolist(), n2[exact].tolist())):
+        idx = np.nonzero(exact & (n1 == s1) & (n2 == s2))[0]
+        p_value[idx] = _exact_p_values(s1, s2, u[idx].astype(np.int64))
+
+    p_value[(n1 < 2) | (n2 < 2)] = np.nan
+    return u, p_value
+
+
+# Private
+
+
+_EXACT_MAX_SIZE = 20
+
+
+def _pair_cells(baseline: ResultSet, candidate: ResultSet) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the indexes of the paired cells of the baseline and candidate sets."""
+    col_ids = {c: i for i, c in enumerate(baseline.columns)}
+    onto_ids = {o: i for i, o in enumerate(baseline.ontologies)}
+
+    cand_cols = np.array([col_ids.get(c, -1) for c in candidate.columns], dtype=np.int64)
+    cand_ontos = np.array([onto_ids.get(o, -1) for o in candidate.ontologies], dtype=np.int64)
+
+    n_ontologies = len(baseline.ontologies)
+    base_keys = baseline.cell_columns.astype(np.int64) * n_ontologies + baseline.cell_ontologies
+    cand_cols, cand_ontos = cand_cols[candidate.cell_columns], cand_ontos[candidate.cell_ontologies]
+    cand_keys = np.where((cand_cols >= 0) & (cand_ontos >= 0), cand_cols * n_ontologies + cand_ontos, -1)
+
+    _, base_idx, cand_idx = np.intersect1d(base_keys, cand_keys, assume_unique=True, return_indices=True)
+    return base_idx, cand_idx
+
+
+@lru_cache(maxsize=None)
+def _u_distribution(n1: int, n2: int) -> Tuple[int, ...]:
+    """Number of rankings of two samples of the specified sizes for each value of U."""
+    if n1 == 0 or n2 == 0:
+        return (1,)
+
+    # A ranking either ends with an element of the first sample, which exceeds n2 elements, or not.
+    first, second = _u_distribution(n1 - 1, n2), _u_distribution(n1, n2 - 1)
+    counts = [0] * (n1 * n2 + 1)
+
+    for u, count in enumerate(first):
+        counts[u + n2] += count
+
+    for u, count in enumerate(second):
+        counts[u] += count
+
+    return tuple(counts)
+
+
+def _exact_p_values(n1: int, n2: int, u: np.ndarray) -> np.ndarray:
+    cdf = np.cumsum(_u_distribution(n1, n2), dtype=float)
+    cdf /= cdf[-1]
+    lower = cdf[u]
+    upper = 1.0 - np.where(u > 0, cdf[np.maximum(u - 1, 0)], 0.0)
+    return np.minimum(1.0, 2.0 * np.minimum(lower, upper))
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Converts an array to a list, replacing NaNs and infinities with None."""
+    return np.where(np.isfinite(values), values, None).tolist()
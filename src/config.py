@@ -1,12 +1,10 @@
 import sys
 from os import path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from .reasoners.owl import OWLReasoner
-from .reasoners.java import JavaReasoner
-from .reasoners.konclude import Konclude
-from .reasoners.minime import MiniMEJava2, MiniMESwift, MiniMESwiftMobile
-from .reasoners.minime3 import MiniMEJava3, MiniMEObjC3
+from .reasoners.owl import OWLReasoner, ReasoningTask
+from .reasoners.registry import ReasonerSpec
+from .pyutils import echo
 
 
 DEBUG = False
@@ -19,6 +17,11 @@ class Paths:
     DATA_DIR = path.join(DIR, 'data')
     MOBILE_DIR = path.join(DIR, 'mobile')
     RESULTS_DIR = path.join(DIR, 'results')
+    CACHE_DIR = path.join(RESULTS_DIR, 'cache')
+    REFERENCE_DIR = path.join(CACHE_DIR, 'reference')
+    METRICS_DIR = path.join(CACHE_DIR, 'metrics')
+    CONVERSIONS_DIR = path.join(CACHE_DIR, 'conversions')
+    RESULTS_DB = path.join(RESULTS_DIR, 'results.db')
 
     FACT_DIR = path.join(BIN_DIR, 'Fact++')
     FACT = path.join(FACT_DIR, 'factcli.jar')
@@ -50,70 +53,147 @@ class Reasoners:
     ABDUCTION_CONTRACTION_TIMEOUT = 1200.0
 
     DEFAULT_ITERATIONS = 5
+    MIN_ITERATIONS = 3
+    MAX_ITERATIONS = 20
+    JVM_WARMUP_JOBS = 2
+    JVM_DAEMON_CHECK_TIMEOUT = 60.0
     COMMON_VM_OPTS = ['-Xmx16g', '-DentityExpansionLimit=1000000000']
 
-    FACT = JavaReasoner(name='Fact++',
-                        path=Paths.FACT,
-                        owl_tool_path=Paths.OWLTOOL,
-                        vm_opts=COMMON_VM_OPTS + ['-Djava.library.path={}'.format(Paths.FACT_DIR)])
+    # Named sets of VM options for Java reasoners, which follow and override COMMON_VM_OPTS.
+    VM_PROFILES = {
+        'default': [],
+        'g1': ['-XX:+UseG1GC'],
+        'parallel': ['-XX:+UseParallelGC'],
+        'zgc': ['-XX:+UseZGC'],
+        'c1': ['-XX:TieredStopAtLevel=1'],
+        'heap4g': ['-Xmx4g'],
+        'heap8g': ['-Xmx8g']
+    }
+
+    # Reasoners are described by specs, and only built when selected for a test.
+    FACT = ReasonerSpec(name='Fact++',
+                        cls='java.JavaReasoner',
+                        args={'name': 'Fact++',
+                              'path': Paths.FACT,
+                              'owl_tool_path': Paths.OWLTOOL,
+                              'vm_opts': COMMON_VM_OPTS + ['-Djava.library.path={}'.format(Paths.FACT_DIR)]})
+
+    HERMIT = ReasonerSpec(name='HermiT',
+                          cls='java.JavaReasoner',
+                          args={'name': 'HermiT',
+                                'path': Paths.HERMIT,
+                                'owl_tool_path': Paths.OWLTOOL,
+                                'vm_opts': COMMON_VM_OPTS})
+
+    KONCLUDE = ReasonerSpec(name='Konclude',
+                            cls='konclude.Konclude',
+                            args={'path': Paths.KONCLUDE,
+                                  'owl_tool_path': Paths.OWLTOOL,
+                                  'vm_opts': COMMON_VM_OPTS})
+
+    MINIME_OBJC_3 = ReasonerSpec(name='Mini-ME ObjC 3.0',
+                                 cls='minime3.MiniMEObjC3',
+                                 args={'path': Paths.MINIME_OBJC_3})
+
+    MINIME_SWIFT = ReasonerSpec(name='Mini-ME Swift',
+                                cls='minime.MiniMESwift',
+                                args={'path': Paths.MINIME_SWIFT})
+
+    MINIME_SWIFT_MOBILE = ReasonerSpec(name='Mini-ME Swift mobile',
+                                       cls='minime.MiniMESwiftMobile',
+                                       args={'project': Paths.XCODE_PROJECT,
+                                             'scheme': Mobile.SCHEME,
+                                             'classification_test': Mobile.CLASSIFICATION_TEST,
+                                             'consistency_test': Mobile.CONSISTENCY_TEST,
+                                             'abduction_contraction_test': Mobile.ABDUCTION_CONTRACTION_TEST})
+
+    MINIME_JAVA_2 = ReasonerSpec(name='Mini-ME Java 2.0',
+                                 cls='minime.MiniMEJava2',
+                                 args={'path': Paths.MINIME_JAVA_2,
+                                       'owl_tool_path': Paths.OWLTOOL,
+                                       'vm_opts': COMMON_VM_OPTS})
+
+    MINIME_JAVA_3 = ReasonerSpec(name='Mini-ME Java 3.0',
+                                 cls='minime3.MiniMEJava3',
+                                 args={'path': Paths.MINIME_JAVA_3, 'vm_opts': COMMON_VM_OPTS})
+
+    TROWL = ReasonerSpec(name='TrOWL',
+                         cls='java.JavaReasoner',
+                         args={'name': 'TrOWL',
+                               'path': Paths.TROWL,
+                               'owl_tool_path': Paths.OWLTOOL,
+                               'vm_opts': COMMON_VM_OPTS})
 
-    HERMIT = JavaReasoner(name='HermiT',
-                          path=Paths.HERMIT,
-                          owl_tool_path=Paths.OWLTOOL,
-                          vm_opts=COMMON_VM_OPTS)
+    REFERENCE = KONCLUDE
 
-    KONCLUDE = Konclude(path=Paths.KONCLUDE,
-                        owl_tool_path=Paths.OWLTOOL,
-                        vm_opts=COMMON_VM_OPTS)
+    ALL = [FACT, HERMIT, KONCLUDE, MINIME_JAVA_2, MINIME_JAVA_3,
+           MINIME_OBJC_3, MINIME_SWIFT, MINIME_SWIFT_MOBILE, TROWL]
 
-    MINIME_OBJC_3 = MiniMEObjC3(path=Paths.MINIME_OBJC_3)
+    # Public methods
 
-    MINIME_SWIFT = MiniMESwift(path=Paths.MINIME_SWIFT)
+    @classmethod
+    def timeout(cls, task: str) -> float:
+        """Returns the timeout for the specified reasoning task."""
+        return {
+            ReasoningTask.CLASSIFICATION: cls.CLASSIFICATION_TIMEOUT,
+            ReasoningTask.CONSISTENCY: cls.CONSISTENCY_TIMEOUT,
+            ReasoningTask.NON_STANDARD: cls.ABDUCTION_CONTRACTION_TIMEOUT
+        }[task]
 
-    MINIME_SWIFT_MOBILE = MiniMESwiftMobile(project=Paths.XCODE_PROJECT,
-                                            scheme=Mobile.SCHEME,
-                                            classification_test=Mobile.CLASSIFICATION_TEST,
-                                            consistency_test=Mobile.CONSISTENCY_TEST,
-                                            abduction_contraction_test=Mobile.ABDUCTION_CONTRACTION_TEST)
+    @classmethod
+    def vm_profile(cls, value: str) -> Tuple[str, List[str]]:
+        """Parses a VM profile, either a configured name or NAME=OPTIONS, with space-separated OPTIONS."""
+        name, sep, options = value.partition('=')
 
-    MINIME_JAVA_2 = MiniMEJava2(path=Paths.MINIME_JAVA_2,
-                                owl_tool_path=Paths.OWLTOOL,
-                                vm_opts=COMMON_VM_OPTS)
+        if sep:
+            if not name or not options.split():
+                raise ValueError('{} is not a valid VM profile.'.format(value))
+            return name, options.split()
 
-    MINIME_JAVA_3 = MiniMEJava3(path=Paths.MINIME_JAVA_3, vm_opts=COMMON_VM_OPTS)
+        try:
+            return name, cls.VM_PROFILES[name]
+        except KeyError:
+            raise ValueError('No such VM profile: {}'.format(name))
 
-    TROWL = JavaReasoner(name='TrOWL',
-                         path=Paths.TROWL,
-                         owl_tool_path=Paths.OWLTOOL,
-                         vm_opts=COMMON_VM_OPTS)
+    @classmethod
+    def build(cls, specs: List[ReasonerSpec], skip_unavailable: bool = False) -> List[OWLReasoner]:
+        """Builds the reasoners described by the specified specs.
 
-    REFERENCE = KONCLUDE
+        :param skip_unavailable : If true, reasoners which cannot be built, e.g. because
+                                  their files are missing, are skipped with a warning.
+        """
+        reasoners = []
 
-    ALL = [FACT, HERMIT, KONCLUDE, MINIME_JAVA_2, MINIME_JAVA_3,
-           MINIME_OBJC_3, MINIME_SWIFT, MINIME_SWIFT_MOBILE, TROWL]
+        for spec in specs:
+            try:
+                reasoners.append(spec.build())
+            except Exception as e:
+                if not skip_unavailable or DEBUG:
+                    raise
+                echo.pretty('Skipping {}: {}'.format(spec.name, e), color=echo.Color.YELLOW)
 
-    # Public methods
+        return reasoners
 
     @classmethod
-    def by_name(cls, reasoners: Optional[List[OWLReasoner]] = None) -> Dict[str, OWLReasoner]:
-        if not reasoners:
-            reasoners = cls.ALL
-        return dict(zip([r.name for r in reasoners], reasoners))
+    def by_name(cls, specs: Optional[List[ReasonerSpec]] = None) -> Dict[str, ReasonerSpec]:
+        if not specs:
+            specs = cls.ALL
+        return dict(zip([s.name for s in specs], specs))
 
     @classmethod
-    def desktop(cls, reasoners: Optional[List[OWLReasoner]] = None) -> List[OWLReasoner]:
-        if not reasoners:
-            reasoners = cls.ALL
-        return [r for r in reasoners if not r.is_mobile]
+    def desktop(cls, specs: Optional[List[ReasonerSpec]] = None) -> List[ReasonerSpec]:
+        if not specs:
+            specs = cls.ALL
+        return [s for s in specs if not s.is_mobile]
 
     @classmethod
-    def mobile(cls, reasoners: Optional[List[OWLReasoner]] = None) -> List[OWLReasoner]:
-        if not reasoners:
-            reasoners = cls.ALL
-        return [r for r in reasoners if r.is_mobile]
+    def mobile(cls, specs: Optional[List[ReasonerSpec]] = None) -> List[ReasonerSpec]:
+        if not specs:
+            specs = cls.ALL
+        return [s for s in specs if s.is_mobile]
 
     @classmethod
-    def supporting_task(cls, task: str, reasoners: Optional[List[OWLReasoner]] = None) -> List[OWLReasoner]:
-        if not reasoners:
-            reasoners = cls.ALL
-        return [r for r in reasoners if task in r.supported_tasks]
+    def supporting_task(cls, task: str, specs: Optional[List[ReasonerSpec]] = None) -> List[ReasonerSpec]:
+        if not specs:
+            specs = cls.ALL
+        return [s for s in specs if task in s.supported_tasks]
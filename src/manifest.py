@@ -0,0 +1,205 @@
+import fnmatch
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .cache import file_hash, remember_hash, write_atomic
+from .config import Paths
+from .reasoners.owl import OWLOntology, OWLSyntax
+from .pyutils import echo, exc
+
+
+class OntologyFilter:
+    """Selects ontologies by size and name.
+
+    The size of an ontology is the size of its file in functional syntax.
+    """
+
+    def __init__(self,
+                 min_size: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 patterns: Optional[List[str]] = None):
+        """
+        :param min_size : If specified, smaller ontologies are left out.
+        :param max_size : If specified, larger ontologies are left out.
+        :param patterns : If specified, only ontologies whose file name matches one of these globs are selected.
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.patterns = patterns
+
+    def matches(self, onto_name: str, ontologies: Dict[str, OWLOntology]) -> bool:
+        """True if the specified ontology is selected, False otherwise."""
+        size = ontologies[OWLSyntax.FUNCTIONAL].size
+
+        if self.min_size is not None and size < self.min_size:
+            return False
+
+        if self.max_size is not None and size > self.max_size:
+            return False
+
+        return not self.patterns or any(fnmatch.fnmatch(onto_name, p) for p in self.patterns)
+
+
+class DatasetManifest:
+    """Persistent index of the ontology files of a dataset, by syntax.
+
+    For each file, the manifest stores its size, modification time and content hash.
+    Refreshes only list the syntax directories modified since the last one,
+    and only hash new or modified files, so that unchanged datasets load without touching their files.
+    Known hashes are shared with the results cache. The manifest also records which files
+    were converted from another syntax, and the hash of the file they were converted from.
+    """
+
+    VERSION = 1
+
+    @property
+    def onto_names(self) -> List[str]:
+        """Names of the ontologies which have a file in each syntax, sorted."""
+        names = set(self._files.get(OWLSyntax.ALL[0], {}))
+
+        for syntax in OWLSyntax.ALL[1:]:
+            names &= set(self._files.get(syntax, {}))
+
+        return sorted(names)
+
+    @property
+    def unpaired(self) -> Dict[str, List[str]]:
+        """Syntaxes missing for each ontology which does not have a file in each syntax."""
+        names = set(n for files in self._files.values() for n in files)
+        missing = {}
+
+        for name in sorted(names):
+            syntaxes = [s for s in OWLSyntax.ALL if name not in self._files.get(s, {})]
+
+            if syntaxes:
+                missing[name] = syntaxes
+
+        return missing
+
+    def __init__(self, dataset_dir: str, manifest_path: Optional[str] = None):
+        """
+        :param dataset_dir : Dataset directory.
+        :param manifest_path : Path of the manifest file. Defaults to one in the cache directory,
+                               so that datasets can be on read-only storage.
+        """
+        dataset_dir = os.path.abspath(dataset_dir)
+
+        if not manifest_path:
+            digest = hashlib.sha1(dataset_dir.encode()).hexdigest()[:8]
+            file_name = '{}_{}.json'.format(os.path.basename(dataset_dir), digest)
+            manifest_path = os.path.join(Paths.CACHE_DIR, 'manifests', file_name)
+
+        self.dataset_dir = dataset_dir
+        self.manifest_path = manifest_path
+        self._dirs = {}  # type: Dict[str, int]
+        self._files = {}  # type: Dict[str, Dict[str, List]]
+        self._sources = {}  # type: Dict[str, Dict[str, List[str]]]
+        self._sources_changed = False
+        self._load()
+
+    def refresh(self, rescan: bool = False) -> bool:
+        """Updates the manifest with the current contents of the dataset, and saves it if needed.
+
+        :param rescan : If true, every file is checked, rather than only those in modified directories.
+                        Needed to detect files which were rewritten in place.
+        :return : True if the manifest changed, False otherwise.
+        """
+        changed = False
+
+        for syntax in OWLSyntax.ALL:
+            syntax_dir = os.path.join(self.dataset_dir, syntax)
+            exc.raise_if_not_found(syntax_dir, file_type=exc.FileType.DIR)
+            mtime = os.stat(syntax_dir).st_mtime_ns
+
+            if not rescan and self._dirs.get(syntax) == mtime:
+                continue
+
+            old_files = self._files.get(syntax, {})
+            files = {}
+
+            for entry in os.scandir(syntax_dir):
+                if not entry.name.endswith('.owl') or not entry.is_file():
+                    continue
+
+                stat = entry.stat()
+                info = old_files.get(entry.name)
+
+                if not info or info[0] != stat.st_size or info[1] != stat.st_mtime_ns:
+                    info = [stat.st_size, stat.st_mtime_ns, file_hash(entry.path)]
+
+                files[entry.name] = info
+
+            changed = changed or files != old_files or self._dirs.get(syntax) != mtime
+            self._files[syntax] = files
+            self._dirs[syntax] = mtime
+
+            # Files which no longer exist are no longer converted ones.
+            sources = self._sources.get(syntax, {})
+
+            for onto_name in [n for n in sources if n not in files]:
+                del sources[onto_name]
+                changed = True
+
+        changed = changed or self._sources_changed
+
+        if changed:
+            self._save()
+            self._sources_changed = False
+
+        return changed
+
+    def digest(self, onto_name: str, syntax: str) -> str:
+        """Returns the content hash of an ontology file of the dataset."""
+        return self._files[syntax][onto_name][2]
+
+    def source(self, onto_name: str, syntax: str) -> Optional[Tuple[str, str]]:
+        """Returns the syntax and hash of the file an ontology file was converted from,
+        or None if it was not converted."""
+        source = self._sources.get(syntax, {}).get(onto_name)
+        return (source[0], source[1]) if source else None
+
+    def set_source(self, onto_name: str, syntax: str, source_syntax: str, source_digest: str) -> None:
+        """Records that an ontology file was converted from another one. Saved by the next refresh.
+
+        :param source_syntax : Syntax of the file the ontology was converted from.
+        :param source_digest : Content hash of the file the ontology was converted from.
+        """
+        self._sources.setdefault(syntax, {})[onto_name] = [source_syntax, source_digest]
+        self._sources_changed = True
+
+    def ontology(self, onto_name: str, syntax: str) -> OWLOntology:
+        """Returns an ontology of the dataset, whose size and hash are known from the manifest."""
+        size, mtime, digest = self._files[syntax][onto_name]
+        file_path = os.path.join(self.dataset_dir, syntax, onto_name)
+        remember_hash(file_path, size, mtime, digest)
+        return OWLOntology(file_path, syntax, size=size)
+
+    def entries(self) -> List[Tuple[str, Dict[str, OWLOntology]]]:
+        """Returns the paired ontologies of the dataset by name, each with its files by syntax."""
+        return [(onto_name, dict((s, self.ontology(onto_name, s)) for s in OWLSyntax.ALL))
+                for onto_name in self.onto_names]
+
+    # Private
+
+    def _load(self) -> None:
+        try:
+            with open(self.manifest_path) as in_file:
+                manifest = json.load(in_file)
+        except (OSError, ValueError):
+            return
+
+        if manifest.get('version') == self.VERSION and manifest.get('dataset') == self.dataset_dir:
+            self._dirs = manifest['dirs']
+            self._files = manifest['files']
+            self._sources = manifest.get('sources', {})
+
+    def _save(self) -> None:
+        manifest = {'version': self.VERSION, 'dataset': self.dataset_dir, 'dirs': self._dirs, 'files': self._files,
+                    'sources': self._sources}
+
+        try:
+            write_atomic(self.manifest_path, json.dumps(manifest))
+        except OSError as e:
+            echo.error('Could not save the manifest of "{}": {}'.format(self.dataset_dir, e))
@@ -0,0 +1,457 @@
+import inspect
+import json
+from contextlib import ExitStack
+from os import path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import Reasoners
+from .manifest import OntologyFilter
+from .reasoners.cgroup import CGroupBackend
+from .reasoners.owl import ReasoningTask, TestMode
+from .reasoners.registry import ReasonerSpec
+from .pyutils import echo
+
+from .tests.ordering import Order
+from .tests.test import Test, dataset_dirs, dataset_entries
+from .tests.abduction_contraction import (
+    AbductionContractionTimeTest,
+    AbductionContractionMemoryTest,
+    AbductionContractionMobileTest
+)
+from .tests.classification import (
+    ClassificationCorrectnessTest,
+    ClassificationTimeTest,
+    ClassificationMemoryTest,
+    ClassificationCombinedTest,
+    ClassificationMobileTest
+)
+from .tests.consistency import (
+    ConsistencyCorrectnessTest,
+    ConsistencyTimeTest,
+    ConsistencyMemoryTest,
+    ConsistencyCombinedTest,
+    ConsistencyMobileTest
+)
+
+
+# Constraints
+
+
+def supports_task(reasoner: ReasonerSpec, task: str, mode: str) -> Optional[str]:
+    """Reasoners can only be tested on the tasks they support."""
+    del mode  # Unused
+    return None if task in reasoner.supported_tasks else 'does not support the {} task'.format(task)
+
+
+def runs_on_platform(reasoner: ReasonerSpec, task: str, mode: str) -> Optional[str]:
+    """Mobile reasoners can only be tested in mobile mode, and desktop reasoners in the other modes."""
+    del task  # Unused
+
+    if reasoner.is_mobile and mode != TestMode.MOBILE:
+        return 'only runs in {} mode'.format(TestMode.MOBILE)
+
+    if not reasoner.is_mobile and mode == TestMode.MOBILE:
+        return 'does not run in {} mode'.format(TestMode.MOBILE)
+
+    return None
+
+
+CONSTRAINTS = [supports_task, runs_on_platform]  # type: List[Callable[[ReasonerSpec, str, str], Optional[str]]]
+
+
+def supported_options(task: str, mode: str) -> List[str]:
+    """Returns the matrix options honored by the test of a reasoning task in a test mode.
+
+    As for the test subcommands, JVM daemons are only used in time mode, and mobile tests
+    do not support the options which only apply to desktop reasoners.
+    """
+    accepted = inspect.signature(_TESTS[(task, mode)].__init__).parameters
+    supported = [k for k in _OPTIONS if k in accepted or (k in _FILTER_OPTIONS and 'ontology_filter' in accepted)]
+
+    if mode == TestMode.MOBILE:
+        supported = [k for k in supported if k not in _DESKTOP_OPTIONS]
+
+    if mode != TestMode.TIME:
+        supported = [k for k in supported if k != 'warm_jvm']
+
+    return supported
+
+
+# Run plan
+
+
+class PlannedTest:
+    """Test of a run plan: a reasoning task in a test mode, run by the same reasoners with the same options."""
+
+    @property
+    def name(self) -> str:
+        return '{} {}'.format(self.task, self.mode)
+
+    def __init__(self, task: str, mode: str, reasoners: List[str], datasets: List[str], options: Dict):
+        """
+        :param task : Reasoning task.
+        :param mode : Test mode.
+        :param reasoners : Names of the reasoners.
+        :param datasets : Names of the datasets.
+        :param options : Test options, named after the keyword arguments of the test constructors.
+        """
+        self.task = task
+        self.mode = mode
+        self.reasoners = reasoners
+        self.datasets = datasets
+        self.options = options
+
+    def instantiate(self, cgroups: Optional[CGroupBackend] = None) -> Test:
+        """Builds the test.
+
+        :raise ValueError : If options which the test does not support are set.
+        """
+        supported = supported_options(self.task, self.mode)
+        unsupported = _unsupported(self.options, supported)
+
+        if unsupported:
+            raise ValueError('The {} test does not support: {}'.format(self.name, ', '.join(unsupported)))
+
+        kwargs = dict((k, v) for k, v in self.options.items() if k in supported and k not in _FILTER_OPTIONS)
+
+        if 'vm_profiles' in kwargs:
+            kwargs['vm_profiles'] = [Reasoners.vm_profile(p) for p in kwargs['vm_profiles']]
+
+        if any(k in self.options for k in _FILTER_OPTIONS):
+            kwargs['ontology_filter'] = OntologyFilter(min_size=self.options.get('min_size'),
+                                                       max_size=self.options.get('max_size'),
+                                                       patterns=self.options.get('only'))
+
+        test_class = _TESTS[(self.task, self.mode)]
+
+        if cgroups and 'cgroups' in inspect.signature(test_class.__init__).parameters:
+            kwargs['cgroups'] = cgroups
+
+        return test_class(datasets=self.datasets, reasoners=self.reasoners, **kwargs)
+
+
+class Plan:
+    """Run plan of a benchmark matrix.
+
+    Tests are run dataset by dataset, in task and mode order: each test runs over all the ontologies
+    of a dataset it selects before the next test starts, so that parallel jobs, timeout passes
+    and ontology ordering apply to the whole dataset. As a consequence, the runs of an ontology
+    by different tests are not back to back, and may not find it in the page cache.
+    """
+
+    def __init__(self, tests: List[PlannedTest], skipped: List[Tuple[str, str, str, str, str]]):
+        """
+        :param tests : Planned tests, in run order.
+        :param skipped : Task, mode, dataset, reasoner and reason of each matrix cell excluded by the constraints.
+        """
+        self.tests = tests
+        self.skipped = skipped
+
+    @property
+    def datasets(self) -> List[str]:
+        """Names of the datasets of the plan, in run order."""
+        datasets = []
+
+        for test in self.tests:
+            datasets.extend(d for d in test.datasets if d not in datasets)
+
+        return datasets
+
+    def print(self) -> None:
+        """Prints the plan."""
+        for dataset in self.datasets:
+            count = len(dataset_entries(dataset_dirs([dataset])[0]))
+            echo.pretty('Dataset "{}" ({} ontologies)'.format(dataset, count), color=echo.Color.GREEN)
+
+            for test in [t for t in self.tests if dataset in t.datasets]:
+                echo.pretty('  {}: {}'.format(test.name, ', '.join(test.reasoners)))
+
+                for key, value in sorted(test.options.items()):
+                    echo.pretty('    {}: {}'.format(key, value))
+
+        if self.skipped:
+            echo.pretty('Excluded by constraints:', color=echo.Color.YELLOW)
+
+            for task, mode, dataset, reasoner, reason in self.skipped:
+                echo.pretty('  {} {} on "{}": {} {}'.format(task, mode, dataset, reasoner, reason))
+
+    def run(self, cgroups: Optional[CGroupBackend] = None) -> None:
+        """Runs the plan.
+
+        :param cgroups : If specified, each reasoner run of the tests which support it
+                         happens in its own transient cgroup.
+        """
+        tests = [(planned, planned.instantiate(cgroups)) for planned in self.tests]
+
+        with ExitStack() as stack:
+            sessions = [stack.enter_context(test.session()) for _, test in tests]
+
+            for dataset in self.datasets:
+                runs = [(test, session) for (planned, test), session in zip(tests, sessions)
+                        if dataset in planned.datasets]
+                entries = dataset_entries(dataset_dirs([dataset])[0])
+
+                # Hello
+                echo.pretty('Starting {} tests on "{}" dataset ({} ontologies)...\n'.format(len(runs), dataset,
+                                                                                            len(entries)),
+                            color=echo.Color.GREEN)
+
+                for test, (logger, csv_writer) in runs:
+                    test_entries = [e for e in entries
+                                    if not test.ontology_filter or test.ontology_filter.matches(*e)]
+                    echo.pretty('{} ({} ontologies):'.format(test.name.capitalize(), len(test_entries)),
+                                color=echo.Color.GREEN)
+                    test.run_dataset(test_entries, logger, csv_writer)
+                    logger.log('')
+
+
+# Matrix files
+
+
+def load(file_path: str) -> Dict:
+    """Loads a matrix file, either TOML (.toml) or JSON."""
+    if path.splitext(file_path)[1].lower() == '.toml':
+        try:
+            import tomllib as toml
+        except ImportError:
+            try:
+                import tomli as toml
+            except ImportError:
+                raise ValueError('TOML matrix files require Python 3.11 or the tomli package.')
+
+        with open(file_path, mode='rb') as in_file:
+            return toml.load(in_file)
+
+    with open(file_path) as in_file:
+        return json.load(in_file)
+
+
+def plan(matrix: Dict) -> Plan:
+    """Expands a benchmark matrix into a run plan.
+
+    The matrix holds default test options, a 'datasets' table of per-dataset options,
+    an 'exclude' list of cells to leave out, and a 'runs' list of entries.
+    Each entry expands into the cells of all its 'tasks', 'modes', 'datasets' and 'reasoners',
+    with its own options, which override those of the dataset, which override the defaults.
+    Cells are deduplicated, the first entry of each being retained, and are then grouped into tests.
+    """
+    _check_keys(matrix, ['datasets', 'exclude', 'runs'] + list(_OPTIONS), 'matrix')
+
+    defaults = dict(_DEFAULTS)
+    defaults.update(_options(matrix, 'matrix'))
+
+    dataset_options = matrix.get('datasets', {})
+    exclusions = matrix.get('exclude', [])
+    entries = matrix.get('runs', [])
+
+    if not isinstance(dataset_options, dict):
+        raise ValueError('Matrix "datasets" must be a table of per-dataset options.')
+
+    for dataset, options in dataset_options.items():
+        _check_keys(options, list(_OPTIONS), 'dataset "{}"'.format(dataset))
+
+    for exclusion in exclusions:
+        _check_keys(exclusion, ['task', 'mode', 'dataset', 'reasoner'], 'exclusion')
+
+    if not entries:
+        raise ValueError('Matrix has no runs.')
+
+    cells = {}  # type: Dict[Tuple[str, str, str, str], Dict]
+    skipped = []
+
+    for idx, entry in enumerate(entries):
+        what = 'run {}'.format(idx + 1)
+        _check_keys(entry, ['tasks', 'modes', 'datasets', 'reasoners'] + list(_OPTIONS), what)
+
+        tasks = _names(entry, 'tasks', ReasoningTask.ALL, what)
+        modes = _names(entry, 'modes', TestMode.ALL, what)
+        reasoners = _names(entry, 'reasoners', list(Reasoners.by_name()), what, optional=True)
+
+        for task in tasks:
+            datasets = _datasets(entry, task, what)
+
+            for mode in modes:
+                if (task, mode) not in _TESTS:
+                    raise ValueError('{}: the {} {} test is not implemented.'.format(what.capitalize(), task, mode))
+
+                for dataset in datasets:
+                    options = dict(defaults)
+                    options.update(_options(dataset_options.get(dataset, {}), 'dataset "{}"'.format(dataset)))
+                    options.update(_options(entry, what))
+
+                    for reasoner in (reasoners if reasoners else list(Reasoners.by_name())):
+                        cell = (task, mode, dataset, reasoner)
+
+                        if cell in cells or _excluded(cell, exclusions):
+                            continue
+
+                        reasons = [c(Reasoners.by_name()[reasoner], task, mode) for c in CONSTRAINTS]
+                        reasons = [r for r in reasons if r]
+
+                        if reasons:
+                            # Only report the exclusion of explicitly requested reasoners.
+                            if reasoners:
+                                skipped.append(cell + (reasons[0],))
+                            continue
+
+                        unsupported = _unsupported(options, supported_options(task, mode))
+
+                        if unsupported:
+                            raise ValueError('{}: the {} {} test of "{}" on "{}" does not support: {}'.format(
+                                what.capitalize(), task, mode, reasoner, dataset, ', '.join(unsupported)))
+
+                        cells[cell] = options
+
+    return Plan(_group(cells), skipped)
+
+
+# Private
+
+
+_TESTS = {
+    (ReasoningTask.CLASSIFICATION, TestMode.CORRECTNESS): ClassificationCorrectnessTest,
+    (ReasoningTask.CLASSIFICATION, TestMode.TIME): ClassificationTimeTest,
+    (ReasoningTask.CLASSIFICATION, TestMode.MEMORY): ClassificationMemoryTest,
+    (ReasoningTask.CLASSIFICATION, TestMode.COMBINED): ClassificationCombinedTest,
+    (ReasoningTask.CLASSIFICATION, TestMode.MOBILE): ClassificationMobileTest,
+    (ReasoningTask.CONSISTENCY, TestMode.CORRECTNESS): ConsistencyCorrectnessTest,
+    (ReasoningTask.CONSISTENCY, TestMode.TIME): ConsistencyTimeTest,
+    (ReasoningTask.CONSISTENCY, TestMode.MEMORY): ConsistencyMemoryTest,
+    (ReasoningTask.CONSISTENCY, TestMode.COMBINED): ConsistencyCombinedTest,
+    (ReasoningTask.CONSISTENCY, TestMode.MOBILE): ConsistencyMobileTest,
+    (ReasoningTask.NON_STANDARD, TestMode.TIME): AbductionContractionTimeTest,
+    (ReasoningTask.NON_STANDARD, TestMode.MEMORY): AbductionContractionMemoryTest,
+    (ReasoningTask.NON_STANDARD, TestMode.MOBILE): AbductionContractionMobileTest
+}
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Test options, named after the keyword arguments of the test constructors, with their validity checks.
+_OPTIONS = {
+    'iterations': (lambda v: _is_int(v) and v > 0, 'a positive integer'),
+    'warmup': (lambda v: _is_int(v) and v >= 0, 'a non-negative integer'),
+    'target_ci': (lambda v: _is_number(v) and 0.0 < v < 1.0, 'a number in the (0, 1) range'),
+    'max_iterations': (lambda v: _is_int(v) and v > 0, 'a positive integer'),
+    'timeouts': (lambda v: isinstance(v, list) and len(v) > 0 and all(_is_number(t) and t > 0 for t in v),
+                 'a list of positive numbers'),
+    'relative_timeout': (lambda v: _is_number(v) and v > 0, 'a positive number'),
+    'all_syntaxes': (lambda v: isinstance(v, bool), 'a boolean'),
+    'jobs': (lambda v: _is_int(v) and v > 0, 'a positive integer'),
+    'warm_jvm': (lambda v: isinstance(v, bool), 'a boolean'),
+    'cache': (lambda v: isinstance(v, bool), 'a boolean'),
+    'store': (lambda v: isinstance(v, bool), 'a boolean'),
+    'sample_rate': (lambda v: _is_number(v) and v > 0, 'a positive number'),
+    'vm_profiles': (lambda v: isinstance(v, list) and len(v) > 0 and all(isinstance(p, str) for p in v),
+                    'a list of VM profiles'),
+    'min_size': (lambda v: _is_int(v) and v >= 0, 'a non-negative size in bytes'),
+    'max_size': (lambda v: _is_int(v) and v > 0, 'a positive size in bytes'),
+    'only': (lambda v: isinstance(v, list) and len(v) > 0 and all(isinstance(p, str) for p in v),
+             'a list of glob patterns'),
+    'order': (lambda v: v in Order.ALL, 'one of: {}'.format(', '.join(Order.ALL)))
+}
+
+
+# Options which build the ontology filter of the tests.
+_FILTER_OPTIONS = ['min_size', 'max_size', 'only']
+
+# Options which only apply to desktop reasoners.
+_DESKTOP_OPTIONS = ['all_syntaxes', 'vm_profiles', 'jobs', 'warm_jvm', 'cache', 'sample_rate']
+
+# Options set by default, which are only checked against the tests if overridden.
+_DEFAULTS = {'iterations': Reasoners.DEFAULT_ITERATIONS, 'max_iterations': Reasoners.MAX_ITERATIONS}
+
+
+def _unsupported(options: Dict, supported: List[str]) -> List[str]:
+    """Returns the names of the set options which are not supported, ignoring unchanged defaults."""
+    return sorted(k for k, v in options.items()
+                  if k not in supported and not (k in _DEFAULTS and v == _DEFAULTS[k]))
+
+
+def _check_keys(table, keys: List[str], what: str) -> None:
+    if not isinstance(table, dict):
+        raise ValueError('{} must be a table.'.format(what.capitalize()))
+
+    unknown = sorted(k for k in table if k not in keys)
+
+    if unknown:
+        raise ValueError('Unknown keys in {}: {}'.format(what, ', '.join(unknown)))
+
+
+def _options(table: Dict, what: str) -> Dict:
+    """Returns the valid test options of a table."""
+    options = dict((k, v) for k, v in table.items() if k in _OPTIONS)
+
+    for key, value in options.items():
+        is_valid, expected = _OPTIONS[key]
+
+        if not is_valid(value):
+            raise ValueError('{}: "{}" must be {}.'.format(what.capitalize(), key, expected))
+
+    for profile in options.get('vm_profiles', []):
+        Reasoners.vm_profile(profile)
+
+    return options
+
+
+def _names(entry: Dict, key: str, valid: List[str], what: str, optional: bool = False) -> List[str]:
+    """Returns the names listed under a key of a run entry, which must be valid."""
+    names = entry.get(key, [])
+
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise ValueError('{}: "{}" must be a list of names.'.format(what.capitalize(), key))
+
+    if not names and not optional:
+        raise ValueError('{}: "{}" must not be empty.'.format(what.capitalize(), key))
+
+    invalid = [n for n in names if n not in valid]
+
+    if invalid:
+        raise ValueError('{}: invalid {}: {}'.format(what.capitalize(), key, ', '.join(invalid)))
+
+    return list(dict.fromkeys(names))
+
+
+def _datasets(entry: Dict, task: str, what: str) -> List[str]:
+    """Returns the datasets of a run entry for a task, which default to those of the test subcommands."""
+    if 'datasets' not in entry:
+        if task == ReasoningTask.NON_STANDARD:
+            return ['sisinflab']
+        return [path.basename(d) for d in dataset_dirs()]
+
+    return _names(entry, 'datasets', [path.basename(d) for d in dataset_dirs()], what)
+
+
+def _excluded(cell: Tuple[str, str, str, str], exclusions: List[Dict]) -> bool:
+    """True if the (task, mode, dataset, reasoner) cell matches an exclusion, False otherwise."""
+    values = dict(zip(['task', 'mode', 'dataset', 'reasoner'], cell))
+    return any(all(values[k] == v for k, v in e.items()) for e in exclusions)
+
+
+def _group(cells: Dict[Tuple[str, str, str, str], Dict]) -> List[PlannedTest]:
+    """Groups the cells of a matrix into tests, ordered by task and mode.
+
+    Each test runs the same reasoners with the same options on all its datasets.
+    """
+    by_dataset = {}
+
+    for (task, mode, dataset, reasoner), options in cells.items():
+        key = (task, mode, json.dumps(options, sort_keys=True), dataset)
+        by_dataset.setdefault(key, []).append(reasoner)
+
+    by_reasoners = {}
+
+    for (task, mode, options, dataset), reasoners in by_dataset.items():
+        by_reasoners.setdefault((task, mode, options, tuple(reasoners)), []).append(dataset)
+
+    tests = [PlannedTest(task, mode, list(reasoners), datasets, json.loads(options))
+             for (task, mode, options, reasoners), datasets in by_reasoners.items()]
+    tests.sort(key=lambda t: (ReasoningTask.ALL.index(t.task), TestMode.ALL.index(t.mode)))
+
+    return tests
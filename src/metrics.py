@@ -0,0 +1,487 @@
+import mmap
+import os
+import re
+import xml.sax
+import xml.sax.handler
+from typing import Dict, List, Optional, Tuple
+
+from .cache import MetricsCache
+from .reasoners.owl import OWLOntology, OWLSyntax
+
+
+class OntologyMetrics:
+    """Structural metrics of an ontology."""
+
+    # Bumped whenever metrics are computed differently, so that cached metrics are invalidated.
+    VERSION = 1
+
+    FIELDS = ['axioms', 'logical axioms', 'classes', 'object properties', 'data properties', 'individuals',
+              'max depth', 'expressivity']
+
+    @property
+    def axiom_count(self) -> int:
+        """Number of axioms."""
+        return sum(self.axioms.values())
+
+    @property
+    def logical_axiom_count(self) -> int:
+        """Number of axioms, except for declarations and annotation axioms."""
+        return sum(c for a, c in self.axioms.items() if a not in _NON_LOGICAL_AXIOMS)
+
+    @property
+    def expressivity(self) -> str:
+        """Name of the description logic of the ontology, e.g. 'SROIQ(D)'."""
+        features = self.features
+
+        if 'C' in features or ('U' in features and 'E' in features):
+            name = 'S' if '+' in features else 'ALC'
+        else:
+            name = 'AL' + ''.join(f for f in 'UE+' if f in features)
+
+        name += 'R' if 'R' in features else 'H' if 'H' in features else ''
+        name += ''.join(f for f in 'OI' if f in features)
+        name += 'Q' if 'Q' in features else 'N' if 'N' in features else 'F' if 'F' in features else ''
+        return name + '(D)' if 'D' in features else name
+
+    def __init__(self,
+                 axioms: Optional[Dict[str, int]] = None,
+                 declarations: Optional[Dict[str, int]] = None,
+                 max_depth: int = 0,
+                 features: Optional[List[str]] = None):
+        """
+        :param axioms : Number of axioms by type, named after the functional syntax.
+        :param declarations : Number of declared entities by type, named after the functional syntax.
+        :param max_depth : Maximum nesting depth of the axioms. Axioms without nested expressions have depth 1.
+        :param features : Expressivity features, as description logic letters.
+        """
+        self.axioms = axioms if axioms else {}
+        self.declarations = declarations if declarations else {}
+        self.max_depth = max_depth
+        self.features = set(features) if features else set()
+
+    def values(self) -> List:
+        """Values for the CSV result fields, in FIELDS order."""
+        declarations = self.declarations
+        return [self.axiom_count, self.logical_axiom_count, declarations.get('Class', 0),
+                declarations.get('ObjectProperty', 0), declarations.get('DataProperty', 0),
+                declarations.get('NamedIndividual', 0), self.max_depth, self.expressivity]
+
+    def to_dict(self) -> Dict:
+        return {'axioms': self.axioms, 'declarations': self.declarations,
+                'max_depth': self.max_depth, 'features': sorted(self.features)}
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> 'OntologyMetrics':
+        return cls(**values)
+
+
+def compute(file_path: str, syntax: str) -> OntologyMetrics:
+    """Computes the metrics of an ontology file in a single streaming pass.
+
+    Files are memory-mapped, so that memory usage does not depend on their size.
+    Metrics of RDF/XML files are derived from the mapping of OWL to RDF, and are approximate:
+    functional syntax should be preferred when available.
+    """
+    metrics = OntologyMetrics()
+
+    with open(file_path, 'rb') as in_file:
+        # Empty files cannot be mapped.
+        if not os.fstat(in_file.fileno()).st_size:
+            return metrics
+
+        with mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if syntax == OWLSyntax.FUNCTIONAL:
+                _scan_functional(data, metrics)
+            elif syntax == OWLSyntax.RDFXML:
+                _scan_rdfxml(data, metrics)
+            else:
+                raise ValueError('Unsupported syntax: {}'.format(syntax))
+
+    return metrics
+
+
+def ontology_metrics(ontology: OWLOntology, cache: Optional[MetricsCache] = None) -> OntologyMetrics:
+    """Returns the metrics of an ontology, computing them only if they are not in the cache."""
+    cached = cache.get(ontology, OntologyMetrics.VERSION) if cache else None
+
+    if cached:
+        return OntologyMetrics.from_dict(cached)
+
+    metrics = compute(ontology.path, ontology.syntax)
+
+    if cache:
+        cache.set(ontology, OntologyMetrics.VERSION, metrics.to_dict())
+
+    return metrics
+
+
+def logical_axiom_counts(entries: List[Tuple[str, Dict[str, OWLOntology]]],
+                         cache: Optional[MetricsCache] = None) -> Dict[str, int]:
+    """Returns the number of logical axioms of each ontology by name, from its functional syntax file."""
+    return dict((onto_name, ontology_metrics(ontologies[OWLSyntax.FUNCTIONAL], cache).logical_axiom_count)
+                for onto_name, ontologies in entries)
+
+
+# Private
+
+
+_NON_LOGICAL_AXIOMS = {'Declaration', 'AnnotationAssertion', 'SubAnnotationPropertyOf',
+                       'AnnotationPropertyDomain', 'AnnotationPropertyRange'}
+
+
+# Functional syntax
+
+
+# Only literals, IRIs and comments, which may contain parentheses, and parentheses are matched,
+# so that the scan loop only runs for the tokens which define the structure of the ontology.
+_LITERAL = rb'"(?:[^"\\]|\\.)*"'
+_FUNCTIONAL_TOKENS = re.compile(_LITERAL + rb'|<[^>]*>|#[^\n]*|([A-Za-z]+)\s*\(|(\))|\(')
+_ARGUMENT_TOKENS = re.compile(_LITERAL + rb'(?:\^\^(?:<[^>]*>|[^\s()"<>#]+)|@[^\s()]+)?'
+                                         rb'|<[^>]*>|#[^\n]*|[A-Za-z]+\s*\(|\(|\)|[^\s()"<>#]+')
+
+_ONTOLOGY_KEYWORDS = {b'Import', b'Annotation'}
+_CARDINALITIES = {b'ObjectMinCardinality', b'ObjectMaxCardinality', b'ObjectExactCardinality'}
+_FUNCTIONAL_FEATURES = {
+    b'ObjectComplementOf': 'C',
+    b'ObjectUnionOf': 'U',
+    b'DisjointUnion': 'U',
+    b'ObjectSomeValuesFrom': 'E',
+    b'ObjectHasValue': 'O',
+    b'ObjectOneOf': 'O',
+    b'ObjectInverseOf': 'I',
+    b'InverseObjectProperties': 'I',
+    b'SymmetricObjectProperty': 'I',
+    b'SubObjectPropertyOf': 'H',
+    b'EquivalentObjectProperties': 'H',
+    b'ObjectPropertyChain': 'R',
+    b'DisjointObjectProperties': 'R',
+    b'ReflexiveObjectProperty': 'R',
+    b'IrreflexiveObjectProperty': 'R',
+    b'AsymmetricObjectProperty': 'R',
+    b'ObjectHasSelf': 'R',
+    b'TransitiveObjectProperty': '+',
+    b'FunctionalObjectProperty': 'F',
+    b'InverseFunctionalObjectProperty': 'IF',
+    b'ObjectMinCardinality': 'N',
+    b'ObjectMaxCardinality': 'N',
+    b'ObjectExactCardinality': 'N'
+}
+
+
+def _scan_functional(data: mmap.mmap, metrics: OntologyMetrics) -> None:
+    axioms, declarations, features = {}, {}, set()
+    axiom = None
+    depth, max_depth = 0, 0
+    cardinalities = []
+
+    # Prefixes and the ontology are at depth 1, axioms at depth 2.
+    for match in _FUNCTIONAL_TOKENS.finditer(data):
+        keyword, close = match.group(1, 2)
+
+        if keyword:
+            depth += 1
+
+            if depth == 2:
+                axiom = None if keyword in _ONTOLOGY_KEYWORDS else keyword
+
+                if axiom:
+                    axioms[keyword] = axioms.get(keyword, 0) + 1
+                    max_depth = max(max_depth, 1)
+            elif depth > 2 and axiom:
+                if axiom != b'Declaration':
+                    max_depth = max(max_depth, depth - 1)
+                elif depth == 3 and keyword != b'Annotation':
+                    declarations[keyword] = declarations.get(keyword, 0) + 1
+
+            letters = _FUNCTIONAL_FEATURES.get(keyword)
+
+            if letters:
+                features.update(letters)
+            elif keyword.startswith(b'Data'):
+                features.add('D')
+
+            if keyword in _CARDINALITIES:
+                cardinalities.append((depth, match.start()))
+        elif close:
+            if cardinalities and cardinalities[-1][0] == depth:
+                start = cardinalities.pop()[1]
+
+                if _argument_count(data[start:match.end()]) > 2:
+                    features.add('Q')
+
+            depth -= 1
+        elif match.group().startswith(b'('):
+            depth += 1
+
+    metrics.axioms = dict((k.decode(), v) for k, v in axioms.items())
+    metrics.declarations = dict((k.decode(), v) for k, v in declarations.items())
+    metrics.max_depth = max_depth
+    metrics.features = features
+
+
+def _argument_count(expression: bytes) -> int:
+    """Number of arguments of an expression, e.g. 3 for 'ObjectMinCardinality(1 :r :C)'."""
+    level, count = 0, 0
+
+    for match in _ARGUMENT_TOKENS.finditer(expression):
+        token = match.group()
+
+        if token == b')':
+            level -= 1
+        elif not token.startswith(b'#'):
+            if level == 1:
+                count += 1
+            if token.endswith(b'('):
+                level += 1
+
+    return count
+
+
+# RDF/XML
+
+
+_CHUNK_SIZE = 1024 * 1024
+
+_RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+_RDFS = 'http://www.w3.org/2000/01/rdf-schema#'
+_OWL = 'http://www.w3.org/2002/07/owl#'
+
+_RDF_DECLARATIONS = {
+    _OWL + 'Class': 'Class',
+    _OWL + 'ObjectProperty': 'ObjectProperty',
+    _OWL + 'DatatypeProperty': 'DataProperty',
+    _OWL + 'AnnotationProperty': 'AnnotationProperty',
+    _OWL + 'NamedIndividual': 'NamedIndividual',
+    _RDFS + 'Datatype': 'Datatype'
+}
+
+# Property characteristics, as axiom name (formatted with the kind of property) and features.
+_RDF_CHARACTERISTICS = {
+    _OWL + 'TransitiveProperty': ('TransitiveObjectProperty', '+'),
+    _OWL + 'FunctionalProperty': ('Functional{}Property', 'F'),
+    _OWL + 'InverseFunctionalProperty': ('InverseFunctionalObjectProperty', 'IF'),
+    _OWL + 'SymmetricProperty': ('SymmetricObjectProperty', 'I'),
+    _OWL + 'AsymmetricProperty': ('AsymmetricObjectProperty', 'R'),
+    _OWL + 'ReflexiveProperty': ('ReflexiveObjectProperty', 'R'),
+    _OWL + 'IrreflexiveProperty': ('IrreflexiveObjectProperty', 'R')
+}
+
+# Anonymous nodes which stand for an axiom.
+_RDF_AXIOM_NODES = {
+    _OWL + 'AllDisjointClasses': 'DisjointClasses',
+    _OWL + 'AllDifferent': 'DifferentIndividuals',
+    _OWL + 'AllDisjointProperties': 'DisjointObjectProperties',
+    _OWL + 'NegativePropertyAssertion': 'NegativeObjectPropertyAssertion'
+}
+
+# Axioms stated by a predicate about a named subject, formatted with the kind of property.
+_RDF_AXIOMS = {
+    _RDFS + 'subClassOf': 'SubClassOf',
+    _OWL + 'equivalentClass': 'EquivalentClasses',
+    _OWL + 'disjointWith': 'DisjointClasses',
+    _OWL + 'disjointUnionOf': 'DisjointUnion',
+    _OWL + 'hasKey': 'HasKey',
+    _OWL + 'sameAs': 'SameIndividual',
+    _OWL + 'differentFrom': 'DifferentIndividuals',
+    _OWL + 'inverseOf': 'InverseObjectProperties',
+    _OWL + 'propertyChainAxiom': 'SubObjectPropertyOf',
+    _OWL + 'equivalentProperty': 'Equivalent{}Properties',
+    _OWL + 'propertyDisjointWith': 'Disjoint{}Properties',
+    _RDFS + 'subPropertyOf': 'Sub{}PropertyOf',
+    _RDFS + 'domain': '{}PropertyDomain',
+    _RDFS + 'range': '{}PropertyRange'
+}
+
+# Types of the subjects of property assertions.
+_RDF_INDIVIDUAL_TYPES = (None, _OWL + 'NamedIndividual', _OWL + 'Thing')
+
+_RDF_ANNOTATIONS = {_RDFS + 'label', _RDFS + 'comment', _RDFS + 'seeAlso', _RDFS + 'isDefinedBy',
+                    _OWL + 'versionInfo', _OWL + 'deprecated'}
+
+_RDF_FEATURES = {
+    _OWL + 'complementOf': 'C',
+    _OWL + 'unionOf': 'U',
+    _OWL + 'disjointUnionOf': 'U',
+    _OWL + 'someValuesFrom': 'E',
+    _OWL + 'hasValue': 'O',
+    _OWL + 'oneOf': 'O',
+    _OWL + 'inverseOf': 'I',
+    _RDFS + 'subPropertyOf': 'H',
+    _OWL + 'equivalentProperty': 'H',
+    _OWL + 'propertyChainAxiom': 'R',
+    _OWL + 'propertyDisjointWith': 'R',
+    _OWL + 'hasSelf': 'R',
+    _OWL + 'cardinality': 'N',
+    _OWL + 'minCardinality': 'N',
+    _OWL + 'maxCardinality': 'N',
+    _OWL + 'qualifiedCardinality': 'Q',
+    _OWL + 'minQualifiedCardinality': 'Q',
+    _OWL + 'maxQualifiedCardinality': 'Q',
+    _OWL + 'onDataRange': 'D',
+    _OWL + 'withRestrictions': 'D',
+    _OWL + 'datatypeComplementOf': 'D'
+}
+
+
+class _Frame:
+    """Open element of an RDF/XML document."""
+
+    # Kinds of element, which determine the kind of their children.
+    ROOT = 'root'
+    NODE = 'node'
+    PROPERTY = 'property'
+    COLLECTION = 'collection'
+    LITERAL = 'literal'
+
+    def __init__(self, kind: str, level: int, node_type: Optional[str] = None, named: bool = False):
+        """
+        :param level : Nesting level of the node element, or of the node element it belongs to.
+        :param node_type : Type of the node element, if known.
+        :param named : True if the node element has an IRI, False otherwise.
+        """
+        self.kind = kind
+        self.level = level
+        self.node_type = node_type
+        self.named = named
+
+
+class _RDFXMLHandler(xml.sax.handler.ContentHandler):
+    """Computes metrics from the events of a namespace-aware SAX parser.
+
+    Only the open elements are kept in memory.
+    """
+
+    def __init__(self, metrics: OntologyMetrics):
+        super(_RDFXMLHandler, self).__init__()
+        self.metrics = metrics
+        self._stack = []  # type: List[_Frame]
+
+    def startElementNS(self, name, qname, attrs):
+        del qname  # Unused
+        tag = (name[0] or '') + name[1]
+        parent = self._stack[-1] if self._stack else None
+
+        if not parent:
+            frame = _Frame(_Frame.ROOT, 0) if tag == _RDF + 'RDF' else self._node(tag, attrs, 1)
+        elif parent.kind in (_Frame.ROOT, _Frame.PROPERTY, _Frame.COLLECTION):
+            frame = self._node(tag, attrs, parent.level + 1)
+        elif parent.kind == _Frame.NODE:
+            frame = self._property(tag, attrs, parent)
+        else:
+            frame = _Frame(_Frame.LITERAL, parent.level)
+
+        self._stack.append(frame)
+
+    def endElementNS(self, name, qname):
+        del name, qname  # Unused
+        self._stack.pop()
+
+    # Private
+
+    def _node(self, tag: str, attrs, level: int) -> _Frame:
+        named = (_RDF, 'about') in attrs or (_RDF, 'ID') in attrs
+        frame = _Frame(_Frame.NODE, level, named=named)
+        axiom = _RDF_AXIOM_NODES.get(tag)
+
+        if level > 1:
+            self.metrics.max_depth = max(self.metrics.max_depth, level)
+
+        if axiom and level == 1:
+            self._axiom(axiom)
+
+            if tag == _OWL + 'AllDisjointProperties':
+                self.metrics.features.add('R')
+
+        self._type(frame, tag)
+        return frame
+
+    def _property(self, tag: str, attrs, subject: _Frame) -> _Frame:
+        metrics = self.metrics
+        parse_type = attrs.get((_RDF, 'parseType'))
+        features = _RDF_FEATURES.get(tag)
+
+        if features:
+            metrics.features.update(features)
+
+        if (_RDF, 'datatype') in attrs:
+            metrics.features.add('D')
+
+        if tag == _RDF + 'type':
+            resource = attrs.get((_RDF, 'resource'))
+
+            if resource:
+                self._type(subject, resource)
+        elif subject.level == 1 and subject.named and subject.node_type != _OWL + 'Ontology':
+            axiom = _RDF_AXIOMS.get(tag)
+
+            if axiom:
+                self._axiom(axiom.format(self._property_kind(subject)))
+            elif tag in _RDF_ANNOTATIONS or subject.node_type not in _RDF_INDIVIDUAL_TYPES:
+                self._axiom('AnnotationAssertion')
+            elif (_RDF, 'resource') in attrs or (_RDF, 'nodeID') in attrs or parse_type:
+                self._axiom('ObjectPropertyAssertion')
+            else:
+                self._axiom('DataPropertyAssertion')
+                metrics.features.add('D')
+
+        if parse_type == 'Resource':
+            return _Frame(_Frame.NODE, subject.level + 1)
+        if parse_type == 'Collection':
+            return _Frame(_Frame.COLLECTION, subject.level)
+        if parse_type == 'Literal':
+            return _Frame(_Frame.LITERAL, subject.level)
+
+        return _Frame(_Frame.PROPERTY, subject.level)
+
+    def _type(self, frame: _Frame, node_type: str) -> None:
+        """Handles a type of a node element."""
+        if node_type == _RDF + 'Description':
+            return
+
+        metrics = self.metrics
+        declared = _RDF_DECLARATIONS.get(node_type)
+        characteristic = _RDF_CHARACTERISTICS.get(node_type)
+
+        if declared == 'DataProperty':
+            metrics.features.add('D')
+
+        if frame.level == 1 and frame.named:
+            if declared:
+                metrics.declarations[declared] = metrics.declarations.get(declared, 0) + 1
+                self._axiom('Declaration')
+            elif characteristic:
+                self._axiom(characteristic[0].format(self._property_kind(frame)))
+            elif not node_type.startswith((_RDF, _RDFS, _OWL)):
+                self._axiom('ClassAssertion')
+
+        if characteristic:
+            metrics.features.update(characteristic[1])
+
+        # Only vocabulary types are kept, and declarations are more specific than other types.
+        if node_type.startswith((_RDF, _RDFS, _OWL)) and (declared or not frame.node_type):
+            frame.node_type = node_type
+
+    def _axiom(self, axiom: str) -> None:
+        metrics = self.metrics
+        metrics.axioms[axiom] = metrics.axioms.get(axiom, 0) + 1
+        metrics.max_depth = max(metrics.max_depth, 1)
+
+    @staticmethod
+    def _property_kind(frame: _Frame) -> str:
+        if frame.node_type == _OWL + 'DatatypeProperty':
+            return 'Data'
+        if frame.node_type == _OWL + 'AnnotationProperty':
+            return 'Annotation'
+        return 'Object'
+
+
+def _scan_rdfxml(data: mmap.mmap, metrics: OntologyMetrics) -> None:
+    parser = xml.sax.make_parser()
+    parser.setFeature(xml.sax.handler.feature_namespaces, True)
+    parser.setFeature(xml.sax.handler.feature_external_ges, False)
+    parser.setContentHandler(_RDFXMLHandler(metrics))
+
+    for offset in range(0, len(data), _CHUNK_SIZE):
+        parser.feed(data[offset:offset + _CHUNK_SIZE])
+
+    parser.close()
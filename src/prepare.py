@@ -0,0 +1,152 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+from .cache import ConversionStore
+from .config import DEBUG, Paths
+from .manifest import DatasetManifest
+from .reasoners import owltool
+from .reasoners.owl import OWLOntology, OWLSyntax
+from .pyutils import echo, exc
+
+
+class Conversion:
+    """Conversion of an ontology of a dataset to another syntax."""
+
+    @property
+    def target_path(self) -> str:
+        """Path of the converted ontology."""
+        return os.path.join(os.path.dirname(os.path.dirname(self.source.path)), self.syntax, self.onto_name)
+
+    def __init__(self, onto_name: str, source: OWLOntology, source_digest: str, syntax: str):
+        """
+        :param source : Ontology to convert.
+        :param source_digest : Content hash of the ontology to convert.
+        :param syntax : Target syntax.
+        """
+        self.onto_name = onto_name
+        self.source = source
+        self.source_digest = source_digest
+        self.syntax = syntax
+
+
+class DatasetPreparer:
+    """Generates the syntax variants missing from a dataset via owltool.
+
+    Ontologies which are missing from a syntax directory are converted from the file in the first available syntax,
+    in OWLSyntax.ALL order. Converted files are recorded in the manifest of the dataset, and converted again
+    when the file they were converted from changes. Files which were not converted are never overwritten.
+    Conversions are kept in a content-addressed store, so that they are only run once for each file contents.
+    """
+
+    def __init__(self,
+                 dataset_dir: str,
+                 owl_tool_path: str = Paths.OWLTOOL,
+                 store: Optional[ConversionStore] = None,
+                 jobs: int = 1):
+        """
+        :param dataset_dir : Dataset directory.
+        :param owl_tool_path : Path of the owltool jar.
+        :param store : Store of converted ontologies. Defaults to the one in the cache directory.
+        :param jobs : Number of conversions to run in parallel.
+        """
+        exc.raise_if_not_found(owl_tool_path, file_type=exc.FileType.FILE)
+
+        self.dataset_dir = dataset_dir
+        self.owl_tool_path = owl_tool_path
+        self.store = store if store else ConversionStore(Paths.CONVERSIONS_DIR)
+        self.jobs = jobs
+        self.manifest = DatasetManifest(dataset_dir)
+
+    def plan(self) -> List[Conversion]:
+        """Refreshes the manifest of the dataset, and returns the conversions needed to bring it up to date."""
+        manifest = self.manifest
+
+        for syntax in OWLSyntax.ALL:
+            os.makedirs(os.path.join(self.dataset_dir, syntax), exist_ok=True)
+
+        # Every file is checked, so that sources rewritten in place are detected.
+        manifest.refresh(rescan=True)
+        conversions = []
+
+        for onto_name, missing in manifest.unpaired.items():
+            syntax = next(s for s in OWLSyntax.ALL if s not in missing)
+            source = manifest.source(onto_name, syntax)
+
+            if source:
+                echo.pretty('Skipping {}: its {} file was converted from a {} file which no longer exists.'
+                            .format(onto_name, syntax, source[0]), color=echo.Color.YELLOW)
+                continue
+
+            conversions.extend(Conversion(onto_name, manifest.ontology(onto_name, syntax),
+                                          manifest.digest(onto_name, syntax), s) for s in missing)
+
+        for onto_name in manifest.onto_names:
+            for syntax in OWLSyntax.ALL:
+                source = manifest.source(onto_name, syntax)
+
+                if source and source[1] != manifest.digest(onto_name, source[0]):
+                    conversions.append(Conversion(onto_name, manifest.ontology(onto_name, source[0]),
+                                                  manifest.digest(onto_name, source[0]), syntax))
+
+        return conversions
+
+    def run(self, conversions: List[Conversion]) -> int:
+        """Runs the specified conversions, and refreshes the manifest of the dataset.
+
+        :return : Number of failed conversions.
+        """
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = dict((executor.submit(self._convert, c), c) for c in conversions)
+
+            for idx, future in enumerate(as_completed(futures)):
+                conversion = futures[future]
+                progress = '[{}/{}] {} -> {}'.format(idx + 1, len(conversions), conversion.onto_name, conversion.syntax)
+
+                try:
+                    cached = future.result()
+                except Exception as e:
+                    if DEBUG:
+                        raise e
+                    echo.error('{}: {}'.format(progress, e))
+                    failed += 1
+                    continue
+
+                echo.pretty('{}{}'.format(progress, ' (cached)' if cached else ''))
+                self.manifest.set_source(conversion.onto_name, conversion.syntax,
+                                         conversion.source.syntax, conversion.source_digest)
+
+        self.manifest.refresh()
+        return failed
+
+    # Private
+
+    def _convert(self, conversion: Conversion) -> bool:
+        """Converts an ontology, unless its conversion is in the store.
+
+        :return : True if the conversion was in the store, False otherwise.
+        """
+        key = self.store.key(self.owl_tool_path, conversion.source, conversion.syntax)
+        target_path = conversion.target_path
+
+        # Conversions are written next to their target and moved in place, so that they are never partial.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), suffix='.tmp')
+        os.close(fd)
+
+        try:
+            cached = self.store.retrieve(key, temp_path)
+
+            if not cached:
+                owltool.convert(self.owl_tool_path, conversion.source.path, temp_path, conversion.syntax)
+                self.store.store(key, temp_path)
+
+            os.replace(temp_path, target_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return cached
@@ -0,0 +1,181 @@
+import itertools
+import os
+import signal
+import time
+from typing import Dict, List, Optional
+
+from src.pyutils import exc
+
+
+class CGroup:
+    """Transient cgroup v2 group, holding the process tree of a single reasoner run."""
+
+    def __init__(self, path: str):
+        """:param path : Path of the group in the cgroup filesystem."""
+        self.path = path
+
+    def attach(self) -> None:
+        """Moves the calling process to the group. Meant to be called in the child process before exec."""
+        with open(os.path.join(self.path, 'cgroup.procs'), 'w') as out_file:
+            out_file.write('0')
+
+    def kill(self) -> None:
+        """Kills every process in the group."""
+        kill_path = os.path.join(self.path, 'cgroup.kill')
+
+        if os.path.isfile(kill_path):
+            try:
+                _write(kill_path, '1')
+            except OSError:
+                pass
+            return
+
+        for pid in self._pids():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def usage(self) -> Dict[str, int]:
+        """Resource usage accounted to the group.
+
+        :return : Peak memory in bytes, CPU times in microseconds, I/O in bytes, and number of OOM kills.
+        """
+        usage = {}
+
+        peak = _read(os.path.join(self.path, 'memory.peak'))
+        if peak:
+            usage['memory_peak'] = int(peak)
+
+        cpu = _read_keyed(os.path.join(self.path, 'cpu.stat'))
+        for key in ('usage_usec', 'user_usec', 'system_usec'):
+            if key in cpu:
+                usage['cpu_' + key] = cpu[key]
+
+        io_lines = _read(os.path.join(self.path, 'io.stat'))
+        if io_lines is not None:
+            usage['io_read_bytes'] = 0
+            usage['io_write_bytes'] = 0
+
+            for line in io_lines.splitlines():
+                for field in line.split()[1:]:
+                    key, _, value = field.partition('=')
+                    if key == 'rbytes':
+                        usage['io_read_bytes'] += int(value)
+                    elif key == 'wbytes':
+                        usage['io_write_bytes'] += int(value)
+
+        events = _read_keyed(os.path.join(self.path, 'memory.events'))
+        if 'oom_kill' in events:
+            usage['oom_kills'] = events['oom_kill']
+
+        return usage
+
+    def remove(self, timeout: float = 5.0) -> None:
+        """Kills any leftover process and removes the group."""
+        deadline = time.monotonic() + timeout
+
+        while True:
+            self.kill()
+
+            try:
+                os.rmdir(self.path)
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+
+            time.sleep(0.01)
+
+    # Private
+
+    def _pids(self) -> List[int]:
+        procs = _read(os.path.join(self.path, 'cgroup.procs'))
+        return [int(pid) for pid in procs.split()] if procs else []
+
+
+class CGroupBackend:
+    """Creates a transient cgroup v2 group for each reasoner run, below a delegated parent group.
+
+    The parent group must be writable by the current user, and it must not contain processes,
+    so that the memory and cpu controllers (and io, if available) can be enabled for its children.
+    """
+
+    REQUIRED_CONTROLLERS = ['memory', 'cpu']
+    OPTIONAL_CONTROLLERS = ['io']
+
+    def __init__(self, parent: str, memory_max: Optional[int] = None, cpu_max: Optional[float] = None):
+        """
+        :param parent : Path of the parent group in the cgroup filesystem.
+        :param memory_max : If specified, hard memory limit of each run, in bytes.
+        :param cpu_max : If specified, CPU bandwidth limit of each run, in CPUs.
+        """
+        exc.raise_if_not_found(os.path.join(parent, 'cgroup.controllers'), file_type=exc.FileType.FILE)
+
+        self.parent = parent
+        self.memory_max = memory_max
+        self.cpu_max = cpu_max
+        self._enable_controllers()
+
+    def create(self) -> CGroup:
+        """Creates a new group with the configured limits."""
+        group_path = os.path.join(self.parent, 'owl-{}-{}'.format(os.getpid(), next(_COUNTER)))
+        os.mkdir(group_path)
+
+        if self.memory_max:
+            _write(os.path.join(group_path, 'memory.max'), str(self.memory_max))
+
+            swap_path = os.path.join(group_path, 'memory.swap.max')
+            if os.path.isfile(swap_path):
+                _write(swap_path, '0')
+
+        if self.cpu_max:
+            _write(os.path.join(group_path, 'cpu.max'),
+                   '{} {}'.format(int(self.cpu_max * _CPU_PERIOD_USEC), _CPU_PERIOD_USEC))
+
+        return CGroup(group_path)
+
+    # Private
+
+    def _enable_controllers(self) -> None:
+        available = (_read(os.path.join(self.parent, 'cgroup.controllers')) or '').split()
+        missing = [c for c in self.REQUIRED_CONTROLLERS if c not in available]
+
+        if missing:
+            raise ValueError('Controllers not delegated to {}: {}'.format(self.parent, ', '.join(missing)))
+
+        controllers = self.REQUIRED_CONTROLLERS + [c for c in self.OPTIONAL_CONTROLLERS if c in available]
+        _write(os.path.join(self.parent, 'cgroup.subtree_control'), ' '.join('+' + c for c in controllers))
+
+
+# Private
+
+
+_COUNTER = itertools.count()
+_CPU_PERIOD_USEC = 100000
+
+
+def _read(file_path: str) -> Optional[str]:
+    try:
+        with open(file_path) as in_file:
+            return in_file.read().strip()
+    except OSError:
+        return None
+
+
+def _read_keyed(file_path: str) -> Dict[str, int]:
+    """Reads a flat keyed cgroup file, such as cpu.stat."""
+    contents = _read(file_path)
+    values = {}
+
+    for line in contents.splitlines() if contents else []:
+        key, _, value = line.partition(' ')
+        if value.strip().isdigit():
+            values[key] = int(value)
+
+    return values
+
+
+def _write(file_path: str, contents: str) -> None:
+    with open(file_path, 'w') as out_file:
+        out_file.write(contents)
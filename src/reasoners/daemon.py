@@ -0,0 +1,229 @@
+import atexit
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from . import watchdog
+
+
+class DaemonError(RuntimeError):
+    """Raised when a daemon terminates unexpectedly."""
+    pass
+
+
+class JobUsage:
+    """CPU time (in seconds) and page faults of a JVM. Mimics the fields of struct_rusage."""
+
+    def __init__(self, ru_utime: float, ru_stime: float, ru_majflt: int, ru_minflt: int):
+        self.ru_utime = ru_utime
+        self.ru_stime = ru_stime
+        self.ru_majflt = ru_majflt
+        self.ru_minflt = ru_minflt
+
+    def __sub__(self, other: 'JobUsage') -> 'JobUsage':
+        return JobUsage(ru_utime=self.ru_utime - other.ru_utime, ru_stime=self.ru_stime - other.ru_stime,
+                        ru_majflt=self.ru_majflt - other.ru_majflt, ru_minflt=self.ru_minflt - other.ru_minflt)
+
+
+class DaemonTask:
+    """Result of a job run by a JVM daemon. Mimics the interface of pyutils' Task."""
+
+    def __init__(self,
+                 args: List[str],
+                 stdout: str,
+                 exit_code: int,
+                 wall_time: float = 0.0,
+                 rusage: Optional[JobUsage] = None):
+        """
+        :param wall_time : Time elapsed between submitting the job and reading its end marker, in seconds.
+        :param rusage : Resource usage of the JVM during the job, if available.
+        """
+        self.args = args
+        self.stdout = stdout
+        self.stderr = ''
+        self.exit_code = exit_code
+        self.wall_time = wall_time
+        self.rusage = rusage
+
+
+class JVMDaemon:
+    """Long-lived JVM which runs reasoner jobs, avoiding JVM startup and class loading costs.
+
+    The reasoner jar is launched with the 'daemon' argument, and it must implement the following
+    line-based protocol over stdin and stdout:
+
+    - each job is sent as a single line, containing the JSON-encoded list of its arguments;
+    - the daemon runs the job as if its arguments had been passed on the command line,
+      writing the usual output to stdout;
+    - the end of each job is signalled by a line containing END_MARKER followed by the exit code of the job.
+
+    Jobs which exceed their timeout kill the JVM, which is restarted by the next job.
+    The wall time of each job is measured by the harness, together with the CPU time
+    and page faults of the JVM while running it, if procfs is available.
+    """
+
+    END_MARKER = '<<<END>>>'
+
+    @property
+    def is_running(self) -> bool:
+        """True if the JVM is alive, False otherwise."""
+        return self._process is not None and self._process.poll() is None
+
+    def __init__(self, path: str, vm_opts: Optional[List[str]] = None):
+        """
+        :param path : Path of the reasoner jar.
+        :param vm_opts : Options for the Java VM.
+        """
+        self.path = path
+        self.vm_opts = vm_opts if vm_opts else []
+        self.jobs = 0
+        self._process = None
+        self._lines = None
+
+    def run(self,
+            args: List[str],
+            timeout: Optional[float] = None,
+            line_filter: Optional[Pattern] = None) -> DaemonTask:
+        """Runs a job, starting the JVM if needed.
+
+        :param line_filter : If specified, only the output lines matching this pattern are retained.
+        """
+        if not self.is_running:
+            self.start()
+
+        usage_before = _jvm_usage(self._process.pid)
+        start = time.perf_counter()
+
+        try:
+            self._process.stdin.write(json.dumps(args) + '\n')
+            self._process.stdin.flush()
+        except BrokenPipeError:
+            self.stop()
+            raise DaemonError('{} daemon terminated unexpectedly.'.format(os.path.basename(self.path)))
+
+        deadline = time.monotonic() + timeout if timeout else None
+        output = []
+
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+            except queue.Empty:
+                self.stop()
+                raise subprocess.TimeoutExpired(args, timeout)
+
+            if line is None:
+                self.stop()
+
+                # Jars which do not implement the protocol exit without completing any job.
+                message = 'daemon terminated unexpectedly' if self.jobs else 'does not implement the daemon protocol'
+                raise DaemonError('{} {}.'.format(os.path.basename(self.path), message))
+
+            if line.startswith(self.END_MARKER):
+                exit_code = int(line[len(self.END_MARKER):].strip() or 0)
+                break
+
+            if not line_filter or line_filter.search(line):
+                output.append(line)
+
+        wall_time = time.perf_counter() - start
+        usage_after = _jvm_usage(self._process.pid)
+        rusage = usage_after - usage_before if usage_before and usage_after else None
+
+        self.jobs += 1
+        return DaemonTask(args, ''.join(output), exit_code, wall_time=wall_time, rusage=rusage)
+
+    def check(self, timeout: float) -> None:
+        """Checks that the jar implements the daemon protocol, by running a job without arguments.
+
+        :raise DaemonError : If the jar does not implement the protocol.
+        """
+        try:
+            self.run([], timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise DaemonError('{} does not implement the daemon protocol.'.format(os.path.basename(self.path)))
+
+    def start(self) -> None:
+        """Starts the JVM in its own session, so that it is only stopped by the harness."""
+        self._process = subprocess.Popen(['java'] + self.vm_opts + ['-jar', self.path, 'daemon'],
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL,
+                                         universal_newlines=True,
+                                         bufsize=1,
+                                         start_new_session=True)
+        self.jobs = 0
+        self._lines = queue.Queue()
+        threading.Thread(target=_read_lines, args=(self._process.stdout, self._lines), daemon=True).start()
+
+    def stop(self) -> None:
+        """Stops the JVM."""
+        if self._process is None:
+            return
+
+        if self.is_running:
+            # Processes spawned by the JVM are killed as well.
+            watchdog.kill_group(self._process.pid)
+
+        self._process.wait()
+        self._process = None
+        self._lines = None
+
+
+def get_daemon(path: str, vm_opts: Optional[List[str]] = None) -> JVMDaemon:
+    """Returns the daemon for the specified jar and VM options, creating it if needed.
+
+    Daemons are never shared between processes.
+    """
+    key = (os.getpid(), path, tuple(vm_opts) if vm_opts else ())
+    daemon = _DAEMONS.get(key)
+
+    if not daemon:
+        daemon = JVMDaemon(path, vm_opts)
+        _DAEMONS[key] = daemon
+
+    return daemon
+
+
+def stop_daemons() -> None:
+    """Stops all the daemons started by the current process."""
+    pid = os.getpid()
+
+    for key, daemon in list(_DAEMONS.items()):
+        if key[0] == pid:
+            daemon.stop()
+            del _DAEMONS[key]
+
+
+# Private
+
+
+_DAEMONS = {}  # type: Dict[Tuple[int, str, Tuple[str, ...]], JVMDaemon]
+
+
+def _jvm_usage(pid: int) -> Optional[JobUsage]:
+    """Returns the cumulative resource usage of the JVM, read from procfs, or None if not available."""
+    try:
+        with open('/proc/{}/stat'.format(pid)) as in_file:
+            stat = in_file.read()
+    except OSError:
+        return None
+
+    # Fields after the command name, which may contain spaces, starting from the process state.
+    fields = stat[stat.rfind(')') + 2:].split()
+    ticks = float(os.sysconf('SC_CLK_TCK'))
+
+    return JobUsage(ru_utime=int(fields[11]) / ticks, ru_stime=int(fields[12]) / ticks,
+                    ru_majflt=int(fields[9]), ru_minflt=int(fields[7]))
+
+
+def _read_lines(stream, lines: queue.Queue) -> None:
+    for line in iter(stream.readline, ''):
+        lines.put(line)
+    lines.put(None)
+
+
+atexit.register(stop_daemons)
@@ -16,6 +16,11 @@ from .results import ConsistencyResults, ReasoningStats, ResultsParser
 class KoncludeResultsParser(ResultsParser):
     """Parser for Konclude results."""
 
+    @property
+    def output_patterns(self) -> List[str]:
+        return [r'>> Ontology parsed in ', r'Total processing time: ', r'Ontology \'.*\' is ',
+                r'Query \'UnnamedWriteClassHierarchyQuery\' processed in ', r'Memory: ']
+
     def parse_classification_results(self, task: Union[Task, Benchmark]) -> ReasoningStats:
         stats = self._parse_reasoning_stats(task)
 
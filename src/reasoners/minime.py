@@ -1,5 +1,7 @@
+import asyncio
 import errno
 import os
+import re
 from typing import List, Optional
 
 from src.pyutils import exc
@@ -12,7 +14,8 @@ from .owl import (
     ReasoningTask,
     TestMode
 )
-from .results import ConsistencyResults
+from .process import Process
+from .results import ConsistencyResults, ResultsParser
 
 
 class MiniMEJava2(JavaReasoner):
@@ -97,6 +100,7 @@ class MiniMESwiftMobile(OWLReasoner):
         exc.raise_if_falsy(scheme=scheme, classification_test=classification_test, consistency_test=consistency_test)
 
         super(MiniMESwiftMobile, self).__init__(find_executable('xcodebuild'), None, None)
+        self.results_parser = MobileResultsParser()
         self._project = project
         self._scheme = scheme
         self._classification_test = classification_test
@@ -106,33 +110,40 @@ class MiniMESwiftMobile(OWLReasoner):
     def args(self, task: str, mode: str) -> List[str]:
         return []
 
-    def classify(self, input_file, output_file=None, timeout=None, mode=TestMode.CORRECTNESS):
+    async def classify_async(self, input_file, output_file=None, timeout=None, mode=TestMode.CORRECTNESS,
+                             wait_for_output=True):
         exc.raise_if_not_found(input_file, file_type=exc.FileType.FILE)
-        task = self._run(test=self._classification_test, resource=input_file, timeout=timeout)
-        return self.results_parser.parse_reasoning_stats(task)
+        task = await self._run_async(test=self._classification_test, resource=input_file, timeout=timeout)
+        return self.results_parser.parse_classification_results(task)
 
-    def consistency(self, input_file, timeout=None, mode=TestMode.CORRECTNESS):
+    async def consistency_async(self, input_file, timeout=None, mode=TestMode.CORRECTNESS):
         exc.raise_if_not_found(input_file, file_type=exc.FileType.FILE)
-        task = self._run(test=self._consistency_test, resource=input_file, timeout=timeout)
-        return ConsistencyResults(consistent=True, stats=self.results_parser.parse_reasoning_stats(task))
+        task = await self._run_async(test=self._consistency_test, resource=input_file, timeout=timeout)
+        return ConsistencyResults(consistent=True, stats=self.results_parser.parse_classification_results(task))
 
-    def abduction_contraction(self, resource_file, request_file, timeout=None, mode=TestMode.CORRECTNESS):
+    async def abduction_contraction_async(self, resource_file, request_file, timeout=None,
+                                          mode=TestMode.CORRECTNESS):
         exc.raise_if_not_found(resource_file, file_type=exc.FileType.FILE)
         exc.raise_if_not_found(request_file, file_type=exc.FileType.FILE)
 
-        task = self._run(test=self._abduction_contraction_test,
-                         resource=resource_file,
-                         request=request_file,
-                         timeout=timeout)
+        task = await self._run_async(test=self._abduction_contraction_test,
+                                     resource=resource_file,
+                                     request=request_file,
+                                     timeout=timeout)
 
         return self.results_parser.parse_abduction_contraction_results(task)
 
     # Private
 
-    def _run(self, test: str, resource: str, timeout: Optional[float], request: Optional[str] = None) -> Task:
+    async def _run_async(self,
+                         test: str,
+                         resource: str,
+                         timeout: Optional[float],
+                         request: Optional[str] = None) -> Process:
+        device = await asyncio.get_event_loop().run_in_executor(None, self._detect_connected_device)
         args = ['-project', self._project,
                 '-scheme', self._scheme,
-                '-destination', 'platform=iOS,name={}'.format(self._detect_connected_device()),
+                '-destination', 'platform=iOS,name={}'.format(device),
                 '-only-testing:{}'.format(test),
                 'test-without-building',
                 'RESOURCE={}'.format(os.path.splitext(os.path.basename(resource))[0])]
@@ -140,10 +151,10 @@ class MiniMESwiftMobile(OWLReasoner):
         if request:
             args.append('REQUEST={}'.format(os.path.splitext(os.path.basename(request))[0]))
 
-        task = Task(self.path, args=args)
-        task.run(timeout=timeout)
-
-        return task
+        # xcodebuild output is verbose: only keep the lines needed to parse the results.
+        return await Process(self.path, args=args,
+                             line_filter=self.results_parser.line_filter,
+                             spill_path=self._spill_path()).run_async(timeout=timeout)
 
     def _detect_connected_device(self) -> str:
         """Returns the name of a connected device."""
@@ -157,3 +168,15 @@ class MiniMESwiftMobile(OWLReasoner):
                 return components[0]
 
         exc.raise_ioerror(errno.ENODEV, message='No connected devices.')
+
+
+class MobileResultsParser(ResultsParser):
+    """Parser for the results of mobile reasoners.
+
+    Memory usage is reported by the test application running on the device:
+    the resource usage of the xcodebuild process on the host is not relevant.
+    """
+
+    def _parse_memory(self, task) -> int:
+        res = re.search(r'Memory: (.*) B', task.stdout)
+        return int(res.group(1)) if res else 0
@@ -1,10 +1,17 @@
+import asyncio
+import functools
 import os
+import re
 from abc import ABCMeta, abstractmethod
 from typing import List, Optional
 
 from src.pyutils import exc, fileutils
-from src.pyutils.proc import Benchmark, Jar, OutputAction, Task
-from .results import AbductionContractionResults, ConsistencyResults, ReasoningStats, ResultsParser
+from src.pyutils.proc import Benchmark, Jar, Task
+from .cgroup import CGroupBackend
+from .daemon import DaemonError, get_daemon
+from .owltool import get_normalizer
+from .process import Process, run_sync
+from .results import AbductionContractionResults, ConsistencyResults, HarnessStats, ReasoningStats, ResultsParser
 
 
 class TestMode:
@@ -12,9 +19,10 @@ class TestMode:
     CORRECTNESS = 'correctness'
     TIME = 'time'
     MEMORY = 'memory'
+    COMBINED = 'combined'
     MOBILE = 'mobile'
 
-    ALL = [CORRECTNESS, TIME, MEMORY, MOBILE]
+    ALL = [CORRECTNESS, TIME, MEMORY, COMBINED, MOBILE]
 
 
 class OWLSyntax:
@@ -86,6 +94,16 @@ class OWLReasoner:
         """True if the class wraps a mobile reasoner, False otherwise."""
         return False
 
+    @property
+    def is_java(self) -> bool:
+        """True if the reasoner runs in a Java VM, False otherwise."""
+        return self.path.endswith('.jar')
+
+    @property
+    def supports_daemon(self) -> bool:
+        """True if the reasoner can run its jobs in a long-lived JVM daemon, False otherwise."""
+        return self.is_java
+
     # Public methods
 
     def __init__(self, path: str, owl_tool_path: Optional[str] = None, vm_opts: Optional[List[str]] = None):
@@ -97,6 +115,24 @@ class OWLReasoner:
         self.owl_tool_path = owl_tool_path
         self.vm_opts = vm_opts
         self.results_parser = ResultsParser()
+        self.use_daemon = False
+        self.cgroups = None  # type: Optional[CGroupBackend]
+        self.spill_dir = None  # type: Optional[str]
+        self._pending_output = None
+
+    def check_daemon(self, timeout: float) -> None:
+        """Checks that the reasoner can run its jobs in a JVM daemon.
+
+        :raise DaemonError : If it cannot.
+        """
+        if not self.supports_daemon:
+            raise DaemonError('{} does not run in a Java VM.'.format(self.name))
+
+        get_daemon(self.path, self.vm_opts).check(timeout)
+
+    def stop_daemon(self) -> None:
+        """Stops the JVM daemon of the reasoner, if running, so that its next job runs in a fresh JVM."""
+        get_daemon(self.path, self.vm_opts).stop()
 
     @abstractmethod
     def args(self, task: str, mode: str) -> List[str]:
@@ -107,8 +143,46 @@ class OWLReasoner:
                  input_file: str,
                  output_file: Optional[str] = None,
                  timeout: Optional[float] = None,
-                 mode: str = TestMode.CORRECTNESS) -> ReasoningStats:
-        """Performs the classification reasoning task."""
+                 mode: str = TestMode.CORRECTNESS,
+                 wait_for_output: bool = True) -> ReasoningStats:
+        """Performs the classification reasoning task.
+
+        :param wait_for_output : If false, the output is normalized in the background,
+                                 and 'wait_for_output' must be called before reading it.
+        """
+        return run_sync(self.classify_async(input_file, output_file, timeout, mode, wait_for_output))
+
+    def wait_for_output(self) -> None:
+        """Waits for the normalization of the last classification output to complete."""
+        pending, self._pending_output = self._pending_output, None
+
+        if pending:
+            pending.result()
+
+    def consistency(self,
+                    input_file: str,
+                    timeout: Optional[float] = None,
+                    mode: str = TestMode.CORRECTNESS) -> ConsistencyResults:
+        """Checks if the given ontology is consistent."""
+        return run_sync(self.consistency_async(input_file, timeout, mode))
+
+    def abduction_contraction(self,
+                              resource_file: str,
+                              request_file: str,
+                              timeout: Optional[float] = None,
+                              mode: str = TestMode.CORRECTNESS) -> AbductionContractionResults:
+        """Performs abductions or contractions between all resource and request individuals."""
+        return run_sync(self.abduction_contraction_async(resource_file, request_file, timeout, mode))
+
+    # Coroutines
+
+    async def classify_async(self,
+                             input_file: str,
+                             output_file: Optional[str] = None,
+                             timeout: Optional[float] = None,
+                             mode: str = TestMode.CORRECTNESS,
+                             wait_for_output: bool = True) -> ReasoningStats:
+        """Coroutine version of 'classify'."""
         exc.raise_if_not_found(input_file, file_type=exc.FileType.FILE)
 
         classification_out = None
@@ -122,35 +196,44 @@ class OWLReasoner:
                                 input_arg=input_file,
                                 output_arg=classification_out)
 
-        task = self._run(args=args, timeout=timeout, mode=mode)
+        task = await self._run_async(args=args, timeout=timeout, mode=mode)
 
         if mode == TestMode.CORRECTNESS and self.owl_tool_path:
-            exc.raise_if_not_found(self.owl_tool_path, file_type=exc.FileType.FILE)
-            args = ['print-tbox', '-o', output_file, classification_out]
-            jar = Jar(self.owl_tool_path, jar_args=args, vm_opts=self.vm_opts, output_action=OutputAction.DISCARD)
-            jar.run()
-
-        return self.results_parser.parse_classification_results(task)
-
-    def consistency(self,
-                    input_file: str,
-                    timeout: Optional[float] = None,
-                    mode: str = TestMode.CORRECTNESS) -> ConsistencyResults:
-        """Checks if the given ontology is consistent."""
+            # Normalization is bounded by the same timeout as the classification.
+            self._pending_output = get_normalizer(self.owl_tool_path, self.vm_opts).normalize(classification_out,
+                                                                                                output_file,
+                                                                                                timeout=timeout)
+            if wait_for_output:
+                pending, self._pending_output = self._pending_output, None
+                await asyncio.wrap_future(pending)
+
+        stats = self.results_parser.parse_classification_results(task)
+        stats.resource_usage = getattr(task, 'resource_usage', {})
+        stats.harness = HarnessStats.from_task(task)
+        return stats
+
+    async def consistency_async(self,
+                                input_file: str,
+                                timeout: Optional[float] = None,
+                                mode: str = TestMode.CORRECTNESS) -> ConsistencyResults:
+        """Coroutine version of 'consistency'."""
         exc.raise_if_not_found(input_file, file_type=exc.FileType.FILE)
 
         args = MetaArgs.replace(args=self.args(task=ReasoningTask.CONSISTENCY, mode=mode),
                                 input_arg=input_file)
 
-        task = self._run(args, timeout=timeout, mode=mode)
-        return self.results_parser.parse_consistency_results(task)
-
-    def abduction_contraction(self,
-                              resource_file: str,
-                              request_file: str,
-                              timeout: Optional[float] = None,
-                              mode: str = TestMode.CORRECTNESS) -> AbductionContractionResults:
-        """Performs abductions or contractions between all resource and request individuals."""
+        task = await self._run_async(args, timeout=timeout, mode=mode)
+        results = self.results_parser.parse_consistency_results(task)
+        results.stats.resource_usage = getattr(task, 'resource_usage', {})
+        results.stats.harness = HarnessStats.from_task(task)
+        return results
+
+    async def abduction_contraction_async(self,
+                                          resource_file: str,
+                                          request_file: str,
+                                          timeout: Optional[float] = None,
+                                          mode: str = TestMode.CORRECTNESS) -> AbductionContractionResults:
+        """Coroutine version of 'abduction_contraction'."""
         exc.raise_if_not_found(resource_file, file_type=exc.FileType.FILE)
         exc.raise_if_not_found(request_file, file_type=exc.FileType.FILE)
 
@@ -158,26 +241,105 @@ class OWLReasoner:
                                 input_arg=resource_file,
                                 request_arg=request_file)
 
-        task = self._run(args, timeout=timeout, mode=mode)
-        return self.results_parser.parse_abduction_contraction_results(task)
+        task = await self._run_async(args, timeout=timeout, mode=mode)
+        results = self.results_parser.parse_abduction_contraction_results(task)
+        results.harness = HarnessStats.from_task(task)
+        return results
 
     # Protected methods
 
-    def _run(self, args: List[str], timeout: Optional[float], mode: str) -> Task:
-        """Runs the reasoner."""
-        if self.path.endswith('.jar'):
-            if mode == TestMode.MEMORY:
-                task = Jar(self.path, jar_args=args, vm_opts=['-Xms1m'] + self.vm_opts)
+    async def _run_async(self, args: List[str], timeout: Optional[float], mode: str) -> Task:
+        """Runs the reasoner. If cancelled, the reasoner is killed before the cancellation propagates."""
+        loop = asyncio.get_event_loop()
+        line_filter = self.results_parser.line_filter
+
+        if self.use_daemon and self.supports_daemon and mode == TestMode.TIME:
+            daemon = get_daemon(self.path, self.vm_opts)
+
+            try:
+                return await loop.run_in_executor(None, functools.partial(daemon.run, args, timeout=timeout,
+                                                                          line_filter=line_filter))
+            except asyncio.CancelledError:
+                # Killing the JVM ends the job, and the daemon is restarted by the next one.
+                daemon.stop()
+                raise
+
+        vm_opts = ['-Xms1m'] + self.vm_opts if mode == TestMode.MEMORY else self.vm_opts
+
+        # Memory mode relies on pyutils' Benchmark, unless memory is read from the cgroup of the reasoner.
+        # Benchmarks cannot be killed on cancellation, though they are still bound by the timeout.
+        if mode == TestMode.MEMORY and not self.cgroups:
+            if self.path.endswith('.jar'):
+                task = Benchmark(Jar(self.path, jar_args=args, vm_opts=vm_opts))
             else:
-                task = Jar(self.path, jar_args=args, vm_opts=self.vm_opts)
+                task = Benchmark(Task(self.path, args=args))
+
+            await loop.run_in_executor(None, functools.partial(task.run, timeout=timeout))
+            return task
+
+        # Output is parsed while the reasoner runs, and only the lines needed by the results parser are kept.
+        cgroup = self.cgroups.create() if self.cgroups else None
+        spill_path = self._spill_path()
+
+        if self.path.endswith('.jar'):
+            process = Process.jar(self.path, jar_args=args, vm_opts=vm_opts, cgroup=cgroup,
+                                  line_filter=line_filter, spill_path=spill_path)
         else:
-            task = Task(self.path, args=args)
+            process = Process(self.path, args=args, cgroup=cgroup, line_filter=line_filter, spill_path=spill_path)
+
+        return await process.run_async(timeout=timeout)
 
-        if mode == TestMode.MEMORY:
-            task = Benchmark(task)
+    def _spill_path(self) -> Optional[str]:
+        """Path of the file the full output of the reasoner is written to, if any.
 
-        task.run(timeout=timeout)
-        return task
+        Each worker process overwrites its own file, which therefore holds the output of its last run.
+        """
+        if not self.spill_dir:
+            return None
+
+        return os.path.join(self.spill_dir, '{}_{}.out'.format(re.sub(r'\W+', '_', self.name), os.getpid()))
+
+
+class VMProfileReasoner(OWLReasoner):
+    """Runs a Java reasoner with the additional VM options of a named profile.
+
+    Each profile behaves as a distinct reasoner, named after the wrapped reasoner and the profile,
+    so that its results get their own columns.
+    """
+
+    @property
+    def name(self) -> str:
+        return '{} ({})'.format(self.reasoner.name, self.profile)
+
+    @property
+    def supported_syntaxes(self) -> List[str]:
+        return self.reasoner.supported_syntaxes
+
+    @property
+    def supported_tasks(self) -> List[str]:
+        return self.reasoner.supported_tasks
+
+    @property
+    def preferred_syntax(self) -> str:
+        return self.reasoner.preferred_syntax
+
+    def __init__(self, reasoner: OWLReasoner, profile: str, vm_opts: List[str]):
+        """
+        :param reasoner : Java reasoner.
+        :param profile : Name of the profile.
+        :param vm_opts : VM options of the profile, which follow and override those of the reasoner.
+        """
+        if not reasoner.is_java:
+            raise ValueError('{} does not run in a Java VM.'.format(reasoner.name))
+
+        super(VMProfileReasoner, self).__init__(reasoner.path, reasoner.owl_tool_path,
+                                                (reasoner.vm_opts if reasoner.vm_opts else []) + vm_opts)
+        self.reasoner = reasoner
+        self.profile = profile
+        self.results_parser = reasoner.results_parser
+
+    def args(self, task: str, mode: str) -> List[str]:
+        return self.reasoner.args(task, mode)
 
 
 class OWLOntology:
@@ -191,14 +353,20 @@ class OWLOntology:
     @property
     def size(self) -> int:
         """Size of the ontology in bytes."""
-        return os.path.getsize(self.path)
+        if self._size is None:
+            self._size = os.path.getsize(self.path)
+        return self._size
 
     @property
     def readable_size(self) -> str:
         """Human readable string for the ontology size."""
-        return fileutils.human_readable_size(self.path)
+        return fileutils.human_readable_bytes(self.size)
+
+    def __init__(self, path: str, syntax: str, size: Optional[int] = None):
+        """:param size : Size of the ontology in bytes, if known, in which case the file is not checked."""
+        if size is None:
+            exc.raise_if_not_found(path, file_type=exc.FileType.FILE)
 
-    def __init__(self, path: str, syntax: str):
-        exc.raise_if_not_found(path, file_type=exc.FileType.FILE)
         self.path = path
         self.syntax = syntax
+        self._size = size
@@ -0,0 +1,87 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.pyutils import exc
+from src.pyutils.proc import Jar, OutputAction
+from .daemon import DaemonError, get_daemon
+
+
+class Normalizer:
+    """Normalizes classification outputs via owltool's print-tbox command.
+
+    Jobs are queued and run in the background, so that normalization overlaps with the next reasoner run.
+    All jobs share a single long-lived owltool JVM; if the owltool jar does not support daemon mode,
+    the normalizer falls back to launching a JVM per job.
+    """
+
+    def __init__(self, owl_tool_path: str, vm_opts: Optional[List[str]] = None):
+        """
+        :param owl_tool_path : Path of the owltool jar.
+        :param vm_opts : Options for the Java VM.
+        """
+        exc.raise_if_not_found(owl_tool_path, file_type=exc.FileType.FILE)
+        self.owl_tool_path = owl_tool_path
+        self.vm_opts = vm_opts
+        self._use_daemon = True
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def normalize(self, input_file: str, output_file: str, timeout: Optional[float] = None) -> Future:
+        """Queues the normalization of a classification output.
+
+        :param timeout : If specified, the normalization is aborted after this number of seconds,
+                         and the returned future raises TimeoutExpired.
+        """
+        return self._executor.submit(self._print_tbox, input_file, output_file, timeout)
+
+    # Private
+
+    def _print_tbox(self, input_file: str, output_file: str, timeout: Optional[float]) -> None:
+        args = ['print-tbox', '-o', output_file, input_file]
+
+        if self._use_daemon:
+            try:
+                task = get_daemon(self.owl_tool_path, self.vm_opts).run(args, timeout=timeout)
+            except DaemonError:
+                self._use_daemon = False
+            else:
+                if task.exit_code != 0:
+                    raise RuntimeError('owltool exited with code {}.'.format(task.exit_code))
+                return
+
+        jar = Jar(self.owl_tool_path, jar_args=args, vm_opts=self.vm_opts, output_action=OutputAction.DISCARD)
+        jar.run(timeout=timeout)
+
+
+def convert(owl_tool_path: str,
+            input_file: str,
+            output_file: str,
+            syntax: str,
+            vm_opts: Optional[List[str]] = None) -> None:
+    """Converts an ontology to the specified syntax via owltool's convert command."""
+    args = ['convert', '-s', syntax, '-o', output_file, input_file]
+    jar = Jar(owl_tool_path, jar_args=args, vm_opts=vm_opts, output_action=OutputAction.DISCARD)
+    jar.run()
+
+    if jar.exit_code != 0:
+        raise RuntimeError('owltool exited with code {}.'.format(jar.exit_code))
+
+    exc.raise_if_not_found(output_file, file_type=exc.FileType.FILE)
+
+
+def get_normalizer(owl_tool_path: str, vm_opts: Optional[List[str]] = None) -> Normalizer:
+    """Returns the normalizer for the specified owltool jar and VM options, creating it if needed."""
+    key = (os.getpid(), owl_tool_path, tuple(vm_opts) if vm_opts else ())
+    normalizer = _NORMALIZERS.get(key)
+
+    if not normalizer:
+        normalizer = Normalizer(owl_tool_path, vm_opts)
+        _NORMALIZERS[key] = normalizer
+
+    return normalizer
+
+
+# Private
+
+
+_NORMALIZERS = {}  # type: Dict[Tuple[int, str, Tuple[str, ...]], Normalizer]
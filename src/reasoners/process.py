@@ -0,0 +1,272 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Dict, List, Optional, Pattern, Tuple, TypeVar
+
+from src.pyutils import exc
+from . import watchdog
+from .cgroup import CGroup
+
+T = TypeVar('T')
+
+
+class Process:
+    """Runs an executable and collects its resource usage when reaping it. Mimics the interface of pyutils' Task.
+
+    Unlike pyutils' Benchmark, peak memory is read from the rusage returned by wait4,
+    so measuring it does not require wrapping the executable. If a cgroup is specified,
+    the process runs in it, and resource usage is also read from the cgroup, accounting
+    for the whole process tree.
+
+    Standard output is consumed line by line while the process runs. If a line filter is specified,
+    only matching lines are retained, so that verbose executables do not inflate the memory usage
+    of the harness; the full output can be spilled to a file instead.
+
+    The executable is launched in its own session and process group, and its whole process tree
+    is killed on timeout, cancellation or exit, so that no orphaned process interferes with later runs.
+    """
+
+    @property
+    def max_memory(self) -> int:
+        """Peak memory usage, in bytes."""
+        if 'memory_peak' in self.resource_usage:
+            return self.resource_usage['memory_peak']
+
+        if self.rusage is None:
+            return 0
+
+        # ru_maxrss is in kilobytes on Linux, and in bytes on macOS.
+        return self.rusage.ru_maxrss if sys.platform == 'darwin' else self.rusage.ru_maxrss * 1024
+
+    def __init__(self,
+                 path: str,
+                 args: Optional[List[str]] = None,
+                 cgroup: Optional[CGroup] = None,
+                 line_filter: Optional[Pattern] = None,
+                 spill_path: Optional[str] = None):
+        """
+        :param path : Path of the executable.
+        :param args : Arguments to pass to the executable.
+        :param cgroup : If specified, the process runs in this group, which is removed when it exits.
+        :param line_filter : If specified, only the stdout lines matching this pattern are retained.
+        :param spill_path : If specified, the full stdout is written to this file.
+        """
+        self.path = path
+        self.args = args if args else []
+        self.cgroup = cgroup
+        self.line_filter = line_filter
+        self.spill_path = spill_path
+        self.resource_usage = {}  # type: Dict[str, int]
+        self.pid = None
+        self.stdout = None
+        self.stderr = None
+        self.exit_code = None
+        self.rusage = None
+        self.wall_time = 0.0
+
+    @classmethod
+    def jar(cls,
+            path: str,
+            jar_args: Optional[List[str]] = None,
+            vm_opts: Optional[List[str]] = None,
+            cgroup: Optional[CGroup] = None,
+            line_filter: Optional[Pattern] = None,
+            spill_path: Optional[str] = None) -> 'Process':
+        """Returns a process which runs the specified jar."""
+        return cls('java', (vm_opts if vm_opts else []) + ['-jar', path] + (jar_args if jar_args else []),
+                   cgroup=cgroup, line_filter=line_filter, spill_path=spill_path)
+
+    def run(self, timeout: Optional[float] = None) -> 'Process':
+        """Runs the executable, waiting for it to exit.
+
+        :raise TimeoutExpired : If the executable does not exit before the timeout, in which case it is killed.
+        """
+        return run_sync(self.run_async(timeout))
+
+    async def run_async(self, timeout: Optional[float] = None) -> 'Process':
+        """Coroutine version of 'run'. If cancelled, the executable is killed and reaped before
+        the cancellation propagates."""
+        exc.raise_if_falsy(path=self.path)
+        spill_file = None
+
+        try:
+            spill_file = open(self.spill_path, 'w') if self.spill_path else None
+            return await self._run(timeout, spill_file)
+        finally:
+            if spill_file:
+                spill_file.close()
+
+            if self.cgroup:
+                self.cgroup.remove()
+
+    # Private
+
+    async def _run(self, timeout: Optional[float], spill_file) -> 'Process':
+        run_id, env = watchdog.new_run()
+
+        try:
+            start = time.perf_counter()
+            process = subprocess.Popen([self.path] + self.args,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       universal_newlines=True,
+                                       env=env,
+                                       start_new_session=True,
+                                       preexec_fn=self.cgroup.attach if self.cgroup else None)
+        except BaseException:
+            watchdog.finish(run_id)
+            raise
+
+        self.pid = process.pid
+        watchdog.track(run_id, process.pid)
+
+        loop = asyncio.get_event_loop()
+        stdout, stderr = [], []
+        readers = [threading.Thread(target=_read_lines, args=(process.stdout, stdout, self.line_filter, spill_file),
+                                    daemon=True),
+                   threading.Thread(target=_read_all, args=(process.stderr, stderr), daemon=True)]
+
+        for reader in readers:
+            reader.start()
+
+        # Where possible, the process is only reaped after it has exited or has been killed,
+        # so that its pid cannot be reused while its process group is being killed.
+        exited = loop.run_in_executor(None, _wait_for_exit, process.pid)
+        timed_out = False
+
+        try:
+            await asyncio.wait_for(asyncio.shield(exited), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            # Timeout or cancellation.
+            if not exited.done():
+                self._kill()
+                await exited
+
+            if self.cgroup:
+                self.resource_usage = self.cgroup.usage()
+
+            # Leftover children may keep the output pipes open. The process group cannot be reused
+            # until its leader is reaped, so it is only killed if the leader has not been reaped yet;
+            # otherwise, leftover children are killed by the watchdog below.
+            reaped = exited.result()
+
+            if not reaped:
+                self._kill()
+            elif self.cgroup:
+                self.cgroup.kill()
+
+            _, status, self.rusage = reaped if reaped else os.wait4(process.pid, 0)
+            self.wall_time = time.perf_counter() - start
+            self.exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+            # Let Popen know that the process has been reaped.
+            process.returncode = self.exit_code
+
+            # Kill descendants which left the process group as well.
+            watchdog.finish(run_id)
+
+            for reader in readers:
+                await loop.run_in_executor(None, reader.join)
+
+        self.stdout = ''.join(stdout)
+        self.stderr = ''.join(stderr)
+
+        if timed_out:
+            raise subprocess.TimeoutExpired([self.path] + self.args, timeout)
+
+        return self
+
+    def _kill(self) -> None:
+        watchdog.kill_group(self.pid)
+
+        if self.cgroup:
+            self.cgroup.kill()
+
+
+def run_sync(coroutine: Awaitable[T]) -> T:
+    """Runs a coroutine to completion in a new event loop, for synchronous wrappers of coroutines.
+
+    If interrupted, the coroutine is cancelled, so that it can kill and reap its processes.
+    """
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(coroutine)
+
+    try:
+        return loop.run_until_complete(task)
+    except KeyboardInterrupt:
+        if not task.done():
+            task.cancel()
+
+            try:
+                loop.run_until_complete(task)
+            except BaseException:
+                pass
+        raise
+    finally:
+        loop.close()
+
+
+def measurement_overhead(runs: int = 20) -> Optional[float]:
+    """Estimates the overhead of running an executable as a Process rather than through subprocess.
+
+    :return : Difference between the median wall times of a no-op executable, in seconds,
+              or None if no such executable is available.
+    """
+    noop = next((p for p in ('/bin/true', '/usr/bin/true') if os.path.isfile(p)), None)
+
+    if not noop:
+        return None
+
+    def median_time(run) -> float:
+        times = []
+
+        for _ in range(runs):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+
+        times.sort()
+        return times[len(times) // 2]
+
+    baseline = median_time(lambda: subprocess.run([noop], stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+    measured = median_time(lambda: Process(noop).run())
+
+    return measured - baseline
+
+
+# Private
+
+
+def _wait_for_exit(pid: int) -> Optional[Tuple[int, int, Any]]:
+    """Waits for a child process to exit, without reaping it if the platform allows it.
+
+    :return : None if the process has not been reaped, otherwise the result of wait4.
+    """
+    # waitid is not available on macOS before Python 3.13: the process is reaped right away.
+    if not hasattr(os, 'waitid'):
+        return os.wait4(pid, 0)
+
+    os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+    return None
+
+
+def _read_all(stream, chunks: List[str]) -> None:
+    for chunk in iter(lambda: stream.read(65536), ''):
+        chunks.append(chunk)
+    stream.close()
+
+
+def _read_lines(stream, lines: List[str], line_filter: Optional[Pattern], spill_file) -> None:
+    for line in stream:
+        if spill_file:
+            spill_file.write(line)
+
+        if not line_filter or line_filter.search(line):
+            lines.append(line)
+
+    stream.close()
@@ -0,0 +1,63 @@
+import importlib
+from typing import Dict, List, Optional, Type
+
+from .owl import OWLReasoner
+
+
+class ReasonerSpec:
+    """Cheap description of a reasoner, which is only built, and its files validated, when first needed.
+
+    Specs expose the same 'name', 'supported_tasks' and 'is_mobile' properties as reasoners,
+    so that reasoners can be selected without building them. The latter are read from the reasoner class.
+    """
+
+    @property
+    def supported_tasks(self) -> List[str]:
+        """Reasoning tasks supported by the reasoner."""
+        return self._class_property('supported_tasks')
+
+    @property
+    def is_mobile(self) -> bool:
+        """True if the spec describes a mobile reasoner, False otherwise."""
+        return self._class_property('is_mobile')
+
+    def __init__(self, name: str, cls: str, args: Optional[Dict] = None):
+        """
+        :param name : Name of the reasoner.
+        :param cls : Reasoner class, as 'module.Class' relative to the reasoners package.
+        :param args : Keyword arguments of the reasoner class constructor.
+        """
+        self.name = name
+        self.cls = cls
+        self.args = args if args else {}
+        self._reasoner = None  # type: Optional[OWLReasoner]
+
+    def reasoner_class(self) -> Type[OWLReasoner]:
+        """Returns the reasoner class, importing its module if needed."""
+        module, cls = self.cls.rsplit('.', 1)
+        return getattr(importlib.import_module('.' + module, __package__), cls)
+
+    def build(self) -> OWLReasoner:
+        """Builds the reasoner on first call, and returns the same instance afterwards."""
+        if not self._reasoner:
+            reasoner = self.reasoner_class()(**self.args)
+
+            if reasoner.name != self.name:
+                raise ValueError('Reasoner spec "{}" builds "{}".'.format(self.name, reasoner.name))
+
+            self._reasoner = reasoner
+
+        return self._reasoner
+
+    # Private
+
+    def _class_property(self, name: str):
+        """Reads a property of the reasoner, without building it if it has not been built yet.
+
+        The property must not depend on the state of the reasoner, which is not initialized.
+        """
+        if self._reasoner:
+            return getattr(self._reasoner, name)
+
+        cls = self.reasoner_class()
+        return getattr(cls, name).fget(cls.__new__(cls))
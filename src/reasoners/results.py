@@ -1,8 +1,50 @@
 import re
-from typing import Union
+from typing import Dict, List, Pattern, Union
 
 from src.pyutils import exc
+from src.pyutils.decorators import cached_property
 from src.pyutils.proc import Benchmark, Task
+from .process import Process
+
+
+class HarnessStats:
+    """Resource usage of a reasoning task, as measured by the harness rather than reported by the reasoner.
+
+    Unlike reported times, these also account for startup and teardown, and are measured
+    in the same way for every reasoner.
+    """
+
+    FIELDS = ['wall time', 'user time', 'system time', 'major faults', 'minor faults']
+
+    def __init__(self,
+                 wall_ms: float = 0.0,
+                 user_ms: float = 0.0,
+                 sys_ms: float = 0.0,
+                 major_faults: int = 0,
+                 minor_faults: int = 0):
+        self.wall_ms = wall_ms
+        self.user_ms = user_ms
+        self.sys_ms = sys_ms
+        self.major_faults = major_faults
+        self.minor_faults = minor_faults
+
+    @classmethod
+    def from_task(cls, task) -> 'HarnessStats':
+        """Reads the wall time and rusage of a task, if available."""
+        stats = cls(wall_ms=getattr(task, 'wall_time', 0.0) * 1000.0)
+        rusage = getattr(task, 'rusage', None)
+
+        if rusage:
+            stats.user_ms = rusage.ru_utime * 1000.0
+            stats.sys_ms = rusage.ru_stime * 1000.0
+            stats.major_faults = rusage.ru_majflt
+            stats.minor_faults = rusage.ru_minflt
+
+        return stats
+
+    def values(self) -> List:
+        """Values for the CSV result fields, in FIELDS order."""
+        return [self.wall_ms, self.user_ms, self.sys_ms, self.major_faults, self.minor_faults]
 
 
 class ReasoningStats:
@@ -12,6 +54,8 @@ class ReasoningStats:
         self.parsing_ms = parsing_ms
         self.reasoning_ms = reasoning_ms
         self.max_memory = max_memory
+        self.resource_usage = {}  # type: Dict[str, int]
+        self.harness = HarnessStats()
 
 
 class ConsistencyResults:
@@ -36,11 +80,25 @@ class AbductionContractionResults(object):
         self.init_ms = init_ms
         self.reasoning_ms = reasoning_ms
         self.max_memory = max_memory
+        self.harness = HarnessStats()
 
 
 class ResultsParser:
     """Parses reasoning task results."""
 
+    # Public properties
+
+    @property
+    def output_patterns(self) -> List[str]:
+        """Regular expressions matching the output lines needed to parse the results."""
+        return [r'Parsing: ', r'Reasoning: ', r'The ontology is ', r'Memory: ',
+                r'Resource parsing: ', r'Request parsing: ', r'Reasoner initialization: ']
+
+    @cached_property
+    def line_filter(self) -> Pattern:
+        """Pattern matching the output lines needed to parse the results. Other lines can be discarded."""
+        return re.compile('|'.join('(?:{})'.format(p) for p in self.output_patterns))
+
     # Public methods
 
     def parse_classification_results(self, task: Union[Task, Benchmark]) -> ReasoningStats:
@@ -107,7 +165,7 @@ class ResultsParser:
 
     def _parse_memory(self, task: Union[Task, Benchmark]) -> int:
         """Parse the peak memory for a reasoning task."""
-        if isinstance(task, Benchmark):
+        if isinstance(task, (Benchmark, Process)):
             max_memory = task.max_memory
         else:
             res = re.search(r'Memory: (.*) B', task.stdout)
@@ -0,0 +1,163 @@
+import hashlib
+import heapq
+import os
+import re
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+
+class TaxonomyDiff:
+    """Differences between two normalized taxonomies."""
+
+    @property
+    def same(self) -> bool:
+        """True if the taxonomies entail the same subsumptions, False otherwise."""
+        return self.missing == 0 and self.extra == 0
+
+    def __init__(self):
+        self.missing = 0
+        self.extra = 0
+        self.missing_samples = []  # type: List[str]
+        self.extra_samples = []  # type: List[str]
+
+
+class TaxonomyComparator:
+    """Compares normalized taxonomies (owltool print-tbox output) in bounded memory.
+
+    Taxonomies are parsed into subsumption pairs, which are hashed, sorted
+    and merged. Taxonomies which exceed the chunk size are sorted externally,
+    by spilling sorted chunks to temporary files.
+    """
+
+    def __init__(self, chunk_size: int = 1000000, max_samples: int = 10, temp_dir: Optional[str] = None):
+        """
+        :param chunk_size : Maximum number of subsumptions held in memory for each taxonomy.
+        :param max_samples : Maximum number of missing and extra subsumptions to report.
+        :param temp_dir : Directory for temporary files.
+        """
+        self.chunk_size = chunk_size
+        self.max_samples = max_samples
+        self.temp_dir = temp_dir
+
+    def compare(self, taxonomy: str, reference: str) -> TaxonomyDiff:
+        """Compares a taxonomy against a reference one."""
+        diff = TaxonomyDiff()
+        temp_files = []
+
+        try:
+            actual = _unique(self._sorted_facts(taxonomy, temp_files))
+            expected = _unique(self._sorted_facts(reference, temp_files))
+
+            cur_actual = next(actual, None)
+            cur_expected = next(expected, None)
+
+            while cur_actual is not None or cur_expected is not None:
+                if cur_expected is None or (cur_actual is not None and cur_actual[0] < cur_expected[0]):
+                    diff.extra += 1
+                    self._sample(diff.extra_samples, cur_actual[1])
+                    cur_actual = next(actual, None)
+                elif cur_actual is None or cur_expected[0] < cur_actual[0]:
+                    diff.missing += 1
+                    self._sample(diff.missing_samples, cur_expected[1])
+                    cur_expected = next(expected, None)
+                else:
+                    cur_actual = next(actual, None)
+                    cur_expected = next(expected, None)
+        finally:
+            for temp_file in temp_files:
+                os.remove(temp_file)
+
+        return diff
+
+    # Private
+
+    def _sample(self, samples: List[str], fact: str) -> None:
+        if len(samples) < self.max_samples:
+            samples.append(fact)
+
+    def _sorted_facts(self, taxonomy: str, temp_files: List[str]) -> Iterator[Tuple[str, str]]:
+        """Returns the (hash, subsumption) pairs of a taxonomy, sorted by hash."""
+        chunks = []
+        chunk = []
+
+        for fact in _parse_facts(taxonomy):
+            chunk.append((_hash(fact), fact))
+
+            if len(chunk) >= self.chunk_size:
+                chunks.append(self._spill(chunk, temp_files))
+                chunk = []
+
+        chunk.sort()
+
+        if not chunks:
+            return iter(chunk)
+
+        chunks.append(iter(chunk))
+        return heapq.merge(*chunks)
+
+    def _spill(self, chunk: List[Tuple[str, str]], temp_files: List[str]) -> Iterator[Tuple[str, str]]:
+        """Writes a sorted chunk to a temporary file, returning an iterator over its contents."""
+        chunk.sort()
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir, suffix='.chunk')
+        temp_files.append(temp_path)
+
+        with os.fdopen(fd, 'w') as out_file:
+            for digest, fact in chunk:
+                out_file.write('{}\t{}\n'.format(digest, fact))
+
+        return _read_chunk(temp_path)
+
+
+# Private
+
+
+_AXIOM_REGEX = re.compile(r'^(SubClassOf|EquivalentClasses)\((.*)\)$')
+_TOKEN_REGEX = re.compile(r'<[^>]*>|[^\s()]+')
+
+
+def _hash(fact: str) -> str:
+    return hashlib.blake2b(fact.encode(), digest_size=8).hexdigest()
+
+
+def _parse_facts(taxonomy: str) -> Iterator[str]:
+    """Parses a normalized taxonomy into subsumptions.
+
+    Equivalences are split into pairs of subsumptions, while other lines are treated as opaque facts.
+    """
+    with open(taxonomy) as in_file:
+        for line in in_file:
+            line = line.strip()
+
+            if not line:
+                continue
+
+            match = _AXIOM_REGEX.match(line)
+            classes = _TOKEN_REGEX.findall(match.group(2)) if match else None
+
+            if not classes or len(classes) < 2:
+                yield line
+            elif match.group(1) == 'SubClassOf' and len(classes) == 2:
+                yield '{} SubClassOf {}'.format(classes[0], classes[1])
+            elif match.group(1) == 'EquivalentClasses':
+                for sub in classes:
+                    for sup in classes:
+                        if sub != sup:
+                            yield '{} SubClassOf {}'.format(sub, sup)
+            else:
+                yield line
+
+
+def _read_chunk(file_path: str) -> Iterator[Tuple[str, str]]:
+    with open(file_path) as in_file:
+        for line in in_file:
+            digest, fact = line.rstrip('\n').split('\t', 1)
+            yield digest, fact
+
+
+def _unique(facts: Iterator[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+    last = None
+
+    for fact in facts:
+        if fact != last:
+            yield fact
+            last = fact
@@ -0,0 +1,130 @@
+import atexit
+import itertools
+import os
+import signal
+from typing import Dict, List, Set, Tuple
+
+
+MARKER_VAR = 'OWL_TEST_RUN'
+
+
+def new_run() -> Tuple[str, Dict[str, str]]:
+    """Registers a new reasoner run.
+
+    Each run is marked by an environment variable, inherited by all the processes it spawns,
+    even those which leave its process group or session.
+
+    :return : Run identifier, and environment of the run.
+    """
+    run_id = '{}:{}'.format(os.getpid(), next(_COUNTER))
+    _LIVE_RUNS.add(run_id)
+
+    env = os.environ.copy()
+    env[MARKER_VAR] = run_id
+
+    return run_id, env
+
+
+def track(run_id: str, pgid: int) -> None:
+    """Tracks the process group of a live run, so that it is killed if the harness exits."""
+    _LIVE_GROUPS[run_id] = pgid
+
+
+def finish(run_id: str) -> None:
+    """Stops tracking a run, killing its processes which left its process group.
+
+    The process group itself must be killed before its leader is reaped, as its id may be reused afterwards.
+    """
+    _LIVE_GROUPS.pop(run_id, None)
+    _LIVE_RUNS.discard(run_id)
+
+    for pid, _ in _marked_processes(lambda marker: marker == run_id):
+        _kill(pid)
+
+
+def kill_group(pgid: int) -> None:
+    """Kills every process in the specified process group."""
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def kill_all() -> None:
+    """Kills the process groups of the live runs of the current process, and any process left behind by its runs."""
+    for pgid in list(_LIVE_GROUPS.values()):
+        kill_group(pgid)
+
+    prefix = '{}:'.format(os.getpid())
+
+    for pid, _ in _marked_processes(lambda marker: marker.startswith(prefix)):
+        _kill(pid)
+
+
+def can_find_strays() -> bool:
+    """True if processes left behind by finished runs can be found on this platform, False otherwise."""
+    return os.path.isfile(os.path.join(_PROC_DIR, 'self', 'environ'))
+
+
+def reap_strays() -> List[str]:
+    """Kills the processes left behind by the finished runs of the current process.
+
+    :return : Description ('pid name') of each killed process.
+    """
+    prefix = '{}:'.format(os.getpid())
+    strays = _marked_processes(lambda marker: marker.startswith(prefix) and marker not in _LIVE_RUNS)
+    descriptions = []
+
+    for pid, name in strays:
+        _kill(pid)
+        descriptions.append('{} {}'.format(pid, name))
+
+    return descriptions
+
+
+# Private
+
+
+_PROC_DIR = '/proc'
+_COUNTER = itertools.count()
+_LIVE_RUNS = set()  # type: Set[str]
+_LIVE_GROUPS = {}  # type: Dict[str, int]
+
+
+def _marked_processes(matches) -> List[Tuple[int, str]]:
+    """Returns the pid and name of the processes whose run marker satisfies the specified predicate."""
+    if not can_find_strays():
+        return []
+
+    marker_prefix = (MARKER_VAR + '=').encode()
+    own_pid = os.getpid()
+    processes = []
+
+    for entry in os.listdir(_PROC_DIR):
+        if not entry.isdigit() or int(entry) == own_pid:
+            continue
+
+        try:
+            with open(os.path.join(_PROC_DIR, entry, 'environ'), 'rb') as in_file:
+                environ = in_file.read()
+            with open(os.path.join(_PROC_DIR, entry, 'comm')) as in_file:
+                name = in_file.read().strip()
+        except OSError:
+            continue
+
+        for var in environ.split(b'\0'):
+            if var.startswith(marker_prefix) and matches(var[len(marker_prefix):].decode(errors='replace')):
+                processes.append((int(entry), name))
+                break
+
+    return processes
+
+
+def _kill(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+atexit.register(kill_all)
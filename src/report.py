@@ -0,0 +1,273 @@
+import csv
+import itertools
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .store import Status, parse_header, parse_run_dir
+
+
+class ResultSet:
+    """Performance results loaded from one or more results directories into typed arrays.
+
+    Measurements are grouped into cells, one for each column (test, reasoner, syntax, field) and ontology.
+    The iterations of each cell lie along the second axis of a masked array, where timeouts, errors,
+    skipped and missing iterations are masked.
+    """
+
+    @property
+    def cell_count(self) -> int:
+        """Number of cells."""
+        return len(self.cell_columns)
+
+    def __init__(self,
+                 columns: List[Tuple[str, str, str, str]],
+                 ontologies: List[str],
+                 cell_columns: np.ndarray,
+                 cell_ontologies: np.ndarray,
+                 values: np.ma.MaskedArray,
+                 status_counts: np.ndarray):
+        """
+        :param columns : (test, reasoner, syntax, field) tuples.
+        :param ontologies : Ontology names.
+        :param cell_columns : Index of the column of each cell.
+        :param cell_ontologies : Index of the ontology of each cell.
+        :param values : Values of each cell, with one iteration per row.
+        :param status_counts : Number of iterations of each cell for each status, in Status.ALL order.
+        """
+        self.columns = columns
+        self.ontologies = ontologies
+        self.cell_columns = cell_columns
+        self.cell_ontologies = cell_ontologies
+        self.values = values
+        self.status_counts = status_counts
+
+    def select_fields(self, fields: List[str]) -> 'ResultSet':
+        """Returns the results of the specified fields, including their cold counterparts."""
+        selected = np.array([c[3] in fields or (c[3].startswith('cold ') and c[3][5:] in fields)
+                             for c in self.columns], dtype=bool)
+        cells = np.nonzero(selected[self.cell_columns])[0]
+        return ResultSet(columns=self.columns,
+                         ontologies=self.ontologies,
+                         cell_columns=self.cell_columns[cells],
+                         cell_ontologies=self.cell_ontologies[cells],
+                         values=self.values[cells],
+                         status_counts=self.status_counts[cells])
+
+    def cell_statistics(self) -> Dict[str, np.ndarray]:
+        """Statistics of each cell, computed over the successful iterations."""
+        values = self.values
+        return {
+            'runs': self.status_counts.sum(axis=1),
+            'solved': values.count(axis=1),
+            'timeouts': self.status_counts[:, _STATUS_CODES[Status.TIMEOUT]],
+            'errors': self.status_counts[:, _STATUS_CODES[Status.ERROR]],
+            'median': np.ma.median(values, axis=1).filled(np.nan),
+            'mean': values.mean(axis=1).filled(np.nan),
+            'std': values.std(axis=1).filled(np.nan),
+            'min': values.min(axis=1).filled(np.nan)
+        }
+
+    def column_statistics(self, cell_stats: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """Statistics of each column, aggregated over the ontologies.
+
+        An ontology is solved if at least one iteration succeeded. Totals and medians refer to the
+        per-ontology medians of the solved ontologies.
+        """
+        if cell_stats is None:
+            cell_stats = self.cell_statistics()
+
+        n_columns = len(self.columns)
+        solved = cell_stats['solved'] > 0
+        medians = np.where(solved, cell_stats['median'], 0.0)
+
+        order = np.lexsort((np.where(solved, cell_stats['median'], np.inf), self.cell_columns))
+        sorted_columns = self.cell_columns[order]
+        column_solved = np.bincount(self.cell_columns, weights=solved, minlength=n_columns).astype(int)
+        column_starts = np.searchsorted(sorted_columns, np.arange(n_columns))
+        median_of_medians = np.full(n_columns, np.nan)
+
+        for col in np.nonzero(column_solved)[0]:
+            start, count = column_starts[col], column_solved[col]
+            median_of_medians[col] = np.median(cell_stats['median'][order[start:start + count]])
+
+        return {
+            'ontologies': np.bincount(self.cell_columns, minlength=n_columns),
+            'solved': column_solved,
+            'timeouts': np.bincount(self.cell_columns, weights=cell_stats['timeouts'] > 0,
+                                    minlength=n_columns).astype(int),
+            'errors': np.bincount(self.cell_columns, weights=cell_stats['errors'] > 0,
+                                  minlength=n_columns).astype(int),
+            'total': np.bincount(self.cell_columns, weights=medians, minlength=n_columns),
+            'median': median_of_medians
+        }
+
+
+def load_results(results_dirs: List[str]) -> ResultSet:
+    """Loads the results.csv files of the specified standard performance test results directories.
+
+    Iterations of the same cell from different directories are pooled together.
+    Cold results are reported as separate fields, prefixed by 'cold'.
+    """
+    column_ids = {}  # type: Dict[Tuple[str, str, str, str], int]
+    ontology_ids = {}  # type: Dict[str, int]
+    chunks = []
+
+    for results_dir in results_dirs:
+        try:
+            test = parse_run_dir(results_dir)[1]
+        except ValueError:
+            test = os.path.basename(os.path.normpath(results_dir))
+
+        csv_path = os.path.join(results_dir, 'results.csv')
+
+        with open(csv_path) as csv_file:
+            rows = [row for row in csv.reader(csv_file) if row]
+
+        if len(rows) < 2:
+            continue
+
+        header = parse_header(rows[0])
+        columns = np.array([column_ids.setdefault((test, reasoner, syntax, 'cold ' + field if cold else field),
+                                                  len(column_ids))
+                            for reasoner, syntax, field, cold in header])
+        ontologies = np.array([ontology_ids.setdefault(row[0], len(ontology_ids)) for row in rows[1:]])
+        cells = list(itertools.chain.from_iterable(row[1:] for row in rows[1:]))
+
+        if len(cells) != len(ontologies) * len(header):
+            raise ValueError('Malformed results file: {}'.format(csv_path))
+
+        # Parsing cells as Python floats is much faster than converting NumPy string arrays.
+        codes = np.fromiter(map(_CELL_CODES.get, cells, itertools.repeat(_STATUS_CODES[Status.OK])),
+                            dtype=np.int8, count=len(cells))
+        numeric = codes == _STATUS_CODES[Status.OK]
+        values = np.zeros(len(cells))
+        values[numeric] = np.fromiter(map(float, itertools.compress(cells, numeric.tolist())), dtype=float)
+        codes = codes.reshape(len(ontologies), len(header))
+        values = values.reshape(codes.shape)
+
+        # Cold results are repeated in every row of an ontology.
+        cold = np.array([c for _, _, _, c in header], dtype=bool)
+
+        if cold.any():
+            first = np.zeros(len(ontologies), dtype=bool)
+            first[np.unique(ontologies, return_index=True)[1]] = True
+            codes[np.ix_(~first, cold)] = _EMPTY
+
+        present = codes >= 0
+        row_idx, col_idx = np.nonzero(present)
+        chunks.append((columns[col_idx], ontologies[row_idx], values[present], codes[present]))
+
+    if not chunks:
+        raise ValueError('No results found.')
+
+    cell_columns, cell_ontologies, values, codes = (np.concatenate(parts) for parts in zip(*chunks))
+
+    # Group measurements by cell, numbering the iterations of each cell.
+    keys = cell_columns.astype(np.int64) * len(ontology_ids) + cell_ontologies
+    unique_keys, cells = np.unique(keys, return_inverse=True)
+    counts = np.bincount(cells)
+    order = np.argsort(cells, kind='stable')
+    iterations = np.empty(len(cells), dtype=np.int64)
+    iterations[order] = np.arange(len(cells)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    data = np.zeros((len(unique_keys), counts.max()))
+    mask = np.ones(data.shape, dtype=bool)
+    data[cells, iterations] = values
+    mask[cells, iterations] = codes != _STATUS_CODES[Status.OK]
+
+    status_counts = np.zeros((len(unique_keys), len(Status.ALL)), dtype=np.int64)
+    np.add.at(status_counts, (cells, codes), 1)
+
+    return ResultSet(columns=sorted(column_ids, key=column_ids.get),
+                     ontologies=sorted(ontology_ids, key=ontology_ids.get),
+                     cell_columns=unique_keys // len(ontology_ids),
+                     cell_ontologies=unique_keys % len(ontology_ids),
+                     values=np.ma.array(data, mask=mask),
+                     status_counts=status_counts)
+
+
+def per_axiom(results: ResultSet, axioms: Dict[str, int]) -> ResultSet:
+    """Returns the time fields of the results, divided by the number of axioms of each ontology.
+
+    Fields are suffixed by 'per axiom'. Ontologies whose number of axioms is unknown are left out.
+    """
+    keep = [idx for idx, column in enumerate(results.columns) if not is_memory_field(column[3])]
+    column_ids = np.full(len(results.columns), -1)
+    column_ids[keep] = np.arange(len(keep))
+
+    counts = np.array([axioms.get(o, 0) for o in results.ontologies], dtype=float)
+    cells = np.nonzero((column_ids[results.cell_columns] >= 0) & (counts[results.cell_ontologies] > 0))[0]
+
+    return ResultSet(columns=[results.columns[idx][:3] + (results.columns[idx][3] + ' per axiom',) for idx in keep],
+                     ontologies=results.ontologies,
+                     cell_columns=column_ids[results.cell_columns[cells]],
+                     cell_ontologies=results.cell_ontologies[cells],
+                     values=results.values[cells] / counts[results.cell_ontologies[cells], np.newaxis],
+                     status_counts=results.status_counts[cells])
+
+
+def summary_table(results: ResultSet) -> Tuple[List[str], List[List]]:
+    """Returns the header and rows of a table summarizing each column over all ontologies."""
+    col_stats = results.column_statistics()
+    header = ['Test', 'Reasoner', 'Syntax', 'Field', 'Ontologies', 'Solved', 'Timeouts', 'Errors',
+              'Total', 'Median']
+    keys = ['ontologies', 'solved', 'timeouts', 'errors', 'total', 'median']
+    columns = [_to_list(col_stats[k]) for k in keys]
+    rows = [list(column) + [c[idx] for c in columns] for idx, column in enumerate(results.columns)]
+    return header, rows
+
+
+def cell_table(results: ResultSet) -> Tuple[List[str], List[List]]:
+    """Returns the header and rows of a table with the statistics of each reasoner, ontology and field."""
+    cell_stats = results.cell_statistics()
+    header = ['Test', 'Reasoner', 'Syntax', 'Field', 'Ontology', 'Runs', 'Solved', 'Timeouts', 'Errors',
+              'Median', 'Mean', 'Std', 'Min']
+    keys = ['runs', 'solved', 'timeouts', 'errors', 'median', 'mean', 'std', 'min']
+    columns = [_to_list(cell_stats[k]) for k in keys]
+    rows = []
+
+    for idx, (col, onto) in enumerate(zip(results.cell_columns.tolist(), results.cell_ontologies.tolist())):
+        rows.append(list(results.columns[col]) + [results.ontologies[onto]] + [c[idx] for c in columns])
+
+    return header, rows
+
+
+def is_memory_field(field: str) -> bool:
+    """True if the specified result field holds memory usage, False if it holds elapsed time."""
+    return field.rsplit(' ', 1)[-1] == 'memory'
+
+
+def format_table(header: List[str], rows: List[List]) -> str:
+    """Formats a table as aligned text. Text columns are left-aligned, numeric columns right-aligned."""
+    cells = [header] + [[_format_value(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    text = [not rows or isinstance(rows[0][i], str) for i in range(len(header))]
+    lines = ['  '.join(v.ljust(w) if t else v.rjust(w) for v, w, t in zip(row, widths, text)) for row in cells]
+    lines.insert(1, '  '.join('-' * w for w in widths))
+    return '\n'.join(line.rstrip() for line in lines)
+
+
+# Private
+
+
+_STATUS_CODES = {status: code for code, status in enumerate(Status.ALL)}
+_EMPTY = -1
+_CELL_CODES = {status: code for status, code in _STATUS_CODES.items() if status != Status.OK}
+_CELL_CODES[''] = _EMPTY
+
+
+def _to_list(values: np.ndarray) -> List:
+    """Converts an array to a list, replacing NaNs with None so that they are exported as empty cells."""
+    if values.dtype.kind != 'f':
+        return values.tolist()
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return '{:.3g}'.format(value) if 0 < abs(value) < 1 else '{:.1f}'.format(value)
+    return str(value)
@@ -0,0 +1,311 @@
+import csv
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .reasoners.owl import OWLSyntax, ReasoningTask, TestMode
+
+
+class Measurement:
+    """Measurement columns namespace. Measurements are tuples with these columns, in this order."""
+    RUN = 'run'
+    REASONER = 'reasoner'
+    BUILD = 'build'
+    DATASET = 'dataset'
+    ONTOLOGY = 'ontology'
+    SYNTAX = 'syntax'
+    TASK = 'task'
+    MODE = 'mode'
+    ITERATION = 'iteration'
+    FIELD = 'field'
+    VALUE = 'value'
+    STATUS = 'status'
+
+    ALL = [RUN, REASONER, BUILD, DATASET, ONTOLOGY, SYNTAX, TASK, MODE, ITERATION, FIELD, VALUE, STATUS]
+
+
+class Status:
+    """Measurement status namespace."""
+    OK = 'ok'
+    TIMEOUT = 'timeout'
+    ERROR = 'error'
+    SKIP = 'skip'
+
+    ALL = [OK, TIMEOUT, ERROR, SKIP]
+
+
+class ResultStore:
+    """SQLite store of performance test results, in long format: each measurement is a single row.
+
+    Measurements are keyed by run, reasoner, reasoner build (executable hash), dataset, ontology, syntax,
+    task, mode, iteration and field, so that queries across runs hit the primary key index.
+    Cold results of reasoners running in a JVM daemon are stored with iteration -1.
+    Stores created before datasets were recorded are migrated on open, with an empty dataset.
+    """
+
+    COLD_ITERATION = -1
+
+    def __init__(self, db_path: str):
+        """:param db_path : Path of the database file, which is created if needed."""
+        self.db_path = db_path
+        self._connection = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # Connections cannot be shared between processes.
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    def open(self) -> None:
+        """Opens the database, creating the schema if needed."""
+        if self._connection:
+            return
+
+        db_dir = os.path.dirname(self.db_path)
+
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.db_path, timeout=30.0)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+
+        columns = [row[1] for row in self._connection.execute('PRAGMA table_info(measurements)')]
+
+        if columns and Measurement.DATASET not in columns:
+            self._connection.executescript(_MIGRATION)
+        else:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Closes the database."""
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    def add_run(self, run: str, test: str, date: Optional[str] = None) -> None:
+        """Registers a test run, replacing any run with the same identifier."""
+        with self._connection:
+            self._connection.execute('DELETE FROM measurements WHERE run = ?', (run,))
+            self._connection.execute('INSERT OR REPLACE INTO runs (run, test, date) VALUES (?, ?, ?)',
+                                     (run, test, date))
+
+    def insert(self, measurements: Iterable[Tuple]) -> None:
+        """Inserts measurements in a single transaction."""
+        with self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO measurements ({}) VALUES ({})'.format(
+                ', '.join(Measurement.ALL), ', '.join('?' * len(Measurement.ALL))), measurements)
+
+    def query(self, **filters) -> List[Tuple]:
+        """Returns the measurements matching the specified column values.
+
+        Filter values can either be single values or lists of values.
+        """
+        clauses, params = [], []
+
+        for column, value in filters.items():
+            if column not in Measurement.ALL:
+                raise ValueError('No such column: {}'.format(column))
+
+            if isinstance(value, (list, tuple, set)):
+                clauses.append('{} IN ({})'.format(column, ', '.join('?' * len(value))))
+                params.extend(value)
+            else:
+                clauses.append('{} = ?'.format(column))
+                params.append(value)
+
+        sql = 'SELECT {} FROM measurements'.format(', '.join(Measurement.ALL))
+
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+
+        return self._connection.execute(sql, params).fetchall()
+
+    def runs(self) -> List[Tuple[str, str, str]]:
+        """Returns the (run, test, date) tuples of the stored runs."""
+        return self._connection.execute('SELECT run, test, date FROM runs ORDER BY date').fetchall()
+
+    def import_dir(self, results_dir: str, dataset: str = '') -> int:
+        """Imports the results.csv file of a performance test results directory.
+
+        :param dataset : Dataset of the results, which results.csv files do not record.
+        :return : Number of imported measurements.
+        """
+        run, test, date = parse_run_dir(results_dir)
+        task, mode = test_task_mode(test)
+        measurements = list(read_results_csv(os.path.join(results_dir, 'results.csv'), run, task, mode,
+                                             dataset=dataset))
+        self.add_run(run, test, date)
+        self.insert(measurements)
+        return len(measurements)
+
+
+def parse_run_dir(results_dir: str) -> Tuple[str, str, Optional[str]]:
+    """Parses the name of a results directory.
+
+    :return : Run identifier, test name and date.
+    """
+    run = os.path.basename(os.path.normpath(results_dir))
+    match = _RUN_DIR_REGEX.match(run)
+
+    if not match:
+        raise ValueError('Not a performance test results directory: {}'.format(results_dir))
+
+    date = re.sub(r'(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})', r'\1-\2-\3 \4:\5:\6', match.group(3))
+    return run, '{} {}'.format(match.group(1), match.group(2)), date
+
+
+def test_task_mode(test: str) -> Tuple[str, str]:
+    """Returns the reasoning task and test mode of a performance test, given its name."""
+    task, mode = test.split(' ', 1)
+    return task, mode
+
+
+def parse_header(header: List[str]) -> List[Tuple[str, str, str, bool]]:
+    """Parses the header of a results.csv file of a standard performance test.
+
+    :return : (reasoner, syntax, field, cold) tuples for each column after the ontology.
+    """
+    columns = []
+
+    for column in header[1:]:
+        for syntax in OWLSyntax.ALL:
+            reasoner, sep, field = column.partition(' {} '.format(syntax))
+            if sep:
+                break
+        else:
+            raise ValueError('Invalid results column: {}'.format(column))
+
+        cold = field.startswith('cold ')
+        columns.append((reasoner, syntax, field[5:] if cold else field, cold))
+
+    return columns
+
+
+def read_results_csv(csv_path: str,
+                     run: str,
+                     task: str,
+                     mode: str,
+                     builds: Optional[Dict[str, str]] = None,
+                     dataset: str = '') -> Iterator[Tuple]:
+    """Reads the measurements in a results.csv file of a standard performance test.
+
+    :param builds : Build hashes, keyed by reasoner name.
+    :param dataset : Dataset of the ontologies.
+    """
+    with open(csv_path) as csv_file:
+        reader = csv.reader(csv_file)
+        columns = parse_header(next(reader))
+
+        for measurement in row_measurements(columns, reader, run, task, mode, builds, dataset):
+            yield measurement
+
+
+def row_measurements(columns: List[Tuple[str, str, str, bool]],
+                     rows: Iterable[List],
+                     run: str,
+                     task: str,
+                     mode: str,
+                     builds: Optional[Dict[str, str]] = None,
+                     dataset: str = '') -> Iterator[Tuple]:
+    """Converts rows of a results.csv file to measurements.
+
+    Rows of the same ontology are numbered as successive iterations. Empty cells,
+    left by adaptive iterations, are skipped.
+
+    :param columns : Columns, as returned by 'parse_header'.
+    :param builds : Build hashes, keyed by reasoner name.
+    :param dataset : Dataset of the ontologies.
+    """
+    iterations = {}
+
+    for row in rows:
+        if not row:
+            continue
+
+        ontology = row[0]
+        iteration = iterations.get(ontology, 0)
+        iterations[ontology] = iteration + 1
+
+        for (reasoner, syntax, field, cold), cell in zip(columns, row[1:]):
+            if cold and iteration > 0:
+                continue
+
+            measurement = parse_cell(cell)
+
+            if measurement:
+                yield (run, reasoner, builds.get(reasoner, '') if builds else '', dataset, ontology, syntax, task,
+                       mode, ResultStore.COLD_ITERATION if cold else iteration, field) + measurement
+
+
+def parse_cell(cell) -> Optional[Tuple[Optional[float], str]]:
+    """Parses a results cell.
+
+    :return : (value, status) tuple, or None if the cell is empty.
+    """
+    if cell == '' or cell is None:
+        return None
+
+    if isinstance(cell, str) and cell in Status.ALL:
+        return None, cell
+
+    try:
+        return float(cell), Status.OK
+    except ValueError:
+        return None, Status.ERROR
+
+
+# Private
+
+
+_RUN_DIR_REGEX = re.compile(r'^({})_({})_(\d{{8}}_\d{{6}})_'.format('|'.join(ReasoningTask.STANDARD),
+                                                                   '|'.join(m for m in TestMode.ALL
+                                                                            if m != TestMode.CORRECTNESS)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    test TEXT NOT NULL,
+    date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS measurements (
+    run TEXT NOT NULL,
+    reasoner TEXT NOT NULL,
+    build TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    ontology TEXT NOT NULL,
+    syntax TEXT NOT NULL,
+    task TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    iteration INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value REAL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (reasoner, build, dataset, ontology, syntax, task, mode, iteration, run, field)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS measurements_run ON measurements (run);
+CREATE INDEX IF NOT EXISTS measurements_ontology ON measurements (ontology, task, mode);
+"""
+
+# Measurements stored before datasets were recorded are moved to the current schema, with an empty dataset.
+_MIGRATION = """
+BEGIN;
+DROP INDEX IF EXISTS measurements_run;
+DROP INDEX IF EXISTS measurements_ontology;
+ALTER TABLE measurements RENAME TO measurements_old;
+""" + _SCHEMA + """
+INSERT INTO measurements ({0})
+    SELECT {1} FROM measurements_old;
+DROP TABLE measurements_old;
+COMMIT;
+""".format(', '.join(Measurement.ALL), ', '.join("''" if c == Measurement.DATASET else c for c in Measurement.ALL))
@@ -1,13 +1,18 @@
+import csv
 import os
 from abc import ABCMeta, abstractmethod
 from subprocess import TimeoutExpired
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from src.config import Reasoners
+from src.manifest import OntologyFilter
 from src.reasoners.owl import OWLReasoner, OWLSyntax, ReasoningTask, TestMode
+from src.reasoners.results import HarnessStats
 from src.pyutils import echo, fileutils
 from src.pyutils.logger import Logger
-from .test import Test
+from . import stats
+from .scheduler import LogRecorder
+from .test import Test, build_iteration_policy
 
 
 # noinspection PyTypeChecker
@@ -20,6 +25,11 @@ class AbductionContractionPerformanceTest(Test):
     def result_fields(self) -> List[str]:
         pass
 
+    @property
+    def total_fields(self) -> int:
+        """Number of leading result fields whose values add up to the total of a run."""
+        return stats.total_fields(self.result_fields, HarnessStats.FIELDS)
+
     @property
     def default_reasoners(self):
         return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.NON_STANDARD))
@@ -36,9 +46,26 @@ class AbductionContractionPerformanceTest(Test):
         """
         pass
 
-    def __init__(self, datasets: Optional[List[str]]=None, reasoners: Optional[List[str]]=None, iterations: int=1):
-        Test.__init__(self, datasets, reasoners)
-        self._iterations = iterations
+    def __init__(self,
+                 datasets: Optional[List[str]] = None,
+                 reasoners: Optional[List[str]] = None,
+                 iterations: int = 1,
+                 warmup: int = 0,
+                 target_ci: Optional[float] = None,
+                 max_iterations: Optional[int] = None,
+                 ontology_filter: Optional[OntologyFilter] = None):
+        """
+        :param datasets : If specified, limit the tests to the specified datasets.
+        :param reasoners : If specified, limit the tests to the specified reasoners.
+        :param iterations : Number of iterations per request.
+        :param warmup : Number of discarded warm-up runs for each reasoner and request.
+        :param target_ci : If specified, iterations continue until the relative confidence interval
+                           of the median falls below this value, overriding 'iterations'.
+        :param max_iterations : Maximum number of iterations if 'target_ci' is specified.
+        :param ontology_filter : If specified, limit the tests to the resources it selects.
+        """
+        Test.__init__(self, datasets, reasoners, ontology_filter=ontology_filter)
+        self.policy = build_iteration_policy(iterations, warmup, target_ci, max_iterations)
 
     def setup(self, logger, csv_writer):
         del logger  # Unused
@@ -50,6 +77,9 @@ class AbductionContractionPerformanceTest(Test):
 
         csv_writer.writerow(csv_header)
 
+        with open(self.summary_path, mode='w') as summary_file:
+            csv.writer(summary_file).writerow(['Resource', 'Request', 'Reasoner', 'Field'] + stats.summary_header())
+
     def run(self, onto_name: str, ontologies, logger, csv_writer):
 
         resource = ontologies[OWLSyntax.RDFXML].path
@@ -63,7 +93,32 @@ class AbductionContractionPerformanceTest(Test):
             logger.log('No available requests.')
             return
 
-        for iteration in range(self._iterations):
+        if self.policy.warmup:
+            logger.log('Warm-up ({} runs)'.format(self.policy.warmup), color=echo.Color.YELLOW)
+
+            for request in requests:
+                for reasoner in self._reasoners:
+                    for _ in range(self.policy.warmup):
+                        try:
+                            self.run_reasoner(reasoner, resource, request, LogRecorder())
+                        except Exception:
+                            pass
+
+            logger.log('')
+
+        samples = {}
+        fail = []
+
+        for iteration in range(self.policy.max_iterations):
+            # Adaptive runs do not retry failed reasoners.
+            pending = [(os.path.basename(q), r.name) for q in requests for r in self._reasoners]
+            pending = [p for p in pending
+                       if self.policy.needs_more(stats.totals(samples.get(p, []), self.total_fields)) and
+                       not (self.policy.is_adaptive and p in fail)]
+
+            if iteration >= self.policy.min_iterations and not pending:
+                break
+
             logger.log('Run {}:'.format(iteration + 1), color=echo.Color.YELLOW)
             logger.indent_level += 1
 
@@ -76,14 +131,26 @@ class AbductionContractionPerformanceTest(Test):
 
                 for reasoner in self._reasoners:
                     logger.log('- {}: '.format(reasoner.name), endl=False)
+
+                    if (request_name, reasoner.name) not in pending:
+                        result = 'skip' if (request_name, reasoner.name) in fail else ''
+                        csv_row.extend([result] * len(self.result_fields))
+                        logger.log(result if result else 'done')
+                        continue
+
                     try:
-                        csv_row.extend(self.run_reasoner(reasoner, resource, request, logger))
+                        values = self.run_reasoner(reasoner, resource, request, logger)
                     except TimeoutExpired:
-                        csv_row.extend(['timeout', 'timeout', 'timeout', 'timeout'])
+                        csv_row.extend(['timeout'] * len(self.result_fields))
                         logger.log('timeout')
+                        fail.append((request_name, reasoner.name))
                     except Exception:
-                        csv_row.extend(['error', 'error', 'error', 'error'])
+                        csv_row.extend(['error'] * len(self.result_fields))
                         logger.log('error')
+                        fail.append((request_name, reasoner.name))
+                    else:
+                        csv_row.extend(values)
+                        samples.setdefault((request_name, reasoner.name), []).append(values)
 
                 logger.indent_level -= 1
                 csv_writer.writerow(csv_row)
@@ -91,6 +158,23 @@ class AbductionContractionPerformanceTest(Test):
             logger.indent_level -= 1
             logger.log('')
 
+        self._write_summary(onto_name, samples)
+
+    # Private
+
+    def _write_summary(self, onto_name: str, samples: Dict[Tuple[str, str], List[List]]) -> None:
+        """Appends summary statistics for each request, reasoner and field to the summary file."""
+        rows = []
+
+        for (request_name, reasoner_name), runs in samples.items():
+            for idx, field in enumerate(self.result_fields):
+                values = [float(run[idx]) for run in runs]
+                rows.append([onto_name, request_name, reasoner_name, field] +
+                            stats.summary_row(stats.summarize(values)))
+
+        with open(self.summary_path, mode='a') as summary_file:
+            csv.writer(summary_file).writerows(rows)
+
 
 class AbductionContractionTimeTest(AbductionContractionPerformanceTest):
     """Abduction/contraction time test."""
@@ -101,7 +185,7 @@ class AbductionContractionTimeTest(AbductionContractionPerformanceTest):
 
     @property
     def result_fields(self):
-        return ['resource parsing', 'request parsing', 'reasoner init', 'reasoning']
+        return ['resource parsing', 'request parsing', 'reasoner init', 'reasoning'] + HarnessStats.FIELDS
 
     def run_reasoner(self, reasoner, resource, request, logger):
 
@@ -112,12 +196,15 @@ class AbductionContractionTimeTest(AbductionContractionPerformanceTest):
         logger.log(('Resource parsing {:.0f} ms | '
                     'Request parsing {:.0f} ms | '
                     'Reasoner init {:.0f} ms | '
-                    'Reasoning {:.0f} ms').format(stats.resource_parsing_ms,
-                                                  stats.request_parsing_ms,
-                                                  stats.init_ms,
-                                                  stats.reasoning_ms))
+                    'Reasoning {:.0f} ms | '
+                    'Wall {:.0f} ms').format(stats.resource_parsing_ms,
+                                             stats.request_parsing_ms,
+                                             stats.init_ms,
+                                             stats.reasoning_ms,
+                                             stats.harness.wall_ms))
 
-        return [stats.resource_parsing_ms, stats.request_parsing_ms, stats.init_ms, stats.reasoning_ms]
+        return ([stats.resource_parsing_ms, stats.request_parsing_ms, stats.init_ms, stats.reasoning_ms] +
+                stats.harness.values())
 
 
 class AbductionContractionMemoryTest(AbductionContractionPerformanceTest):
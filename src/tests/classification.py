@@ -1,9 +1,11 @@
-import filecmp
 import os
 from subprocess import TimeoutExpired
 
-from src.config import Reasoners
+from src.cache import ReferenceStore
+from src.config import Paths, Reasoners
 from src.reasoners.owl import ReasoningTask, TestMode
+from src.reasoners.results import HarnessStats
+from src.reasoners.taxonomy import TaxonomyComparator
 from src.pyutils import echo, fileutils
 from .test import Test, StandardPerformanceTest
 
@@ -22,18 +24,19 @@ class ClassificationCorrectnessTest(Test):
     def setup(self, logger, csv_writer):
         del logger  # Unused
 
+        # Fail early if the reference reasoner is not available.
+        Reasoners.REFERENCE.build()
         csv_header = ['Ontology']
 
         for reasoner in [r for r in self._reasoners if r.name != Reasoners.REFERENCE.name]:
-            csv_header.append(reasoner.name)
+            csv_header.extend([reasoner.name, '{} missing'.format(reasoner.name), '{} extra'.format(reasoner.name)])
 
         csv_writer.writerow(csv_header)
 
     def run(self, onto_name, ontologies, logger, csv_writer):
         self.clear_temp()
 
-        reference = Reasoners.REFERENCE
-        reasoner_out = os.path.join(self.temp_dir, 'reasoner.txt')
+        reference = Reasoners.REFERENCE.build()
         reference_out = os.path.join(self.temp_dir, 'reference.txt')
 
         csv_row = [onto_name]
@@ -42,34 +45,70 @@ class ClassificationCorrectnessTest(Test):
         logger.log('{}: '.format(reference.name), endl=False)
         logger.indent_level += 1
 
-        reference.classify(ontologies[reference.preferred_syntax].path,
-                           output_file=reference_out,
-                           timeout=Reasoners.CLASSIFICATION_TIMEOUT)
-        logger.log('done', color=echo.Color.GREEN)
+        reference_ontology = ontologies[reference.preferred_syntax]
+        store = ReferenceStore(Paths.REFERENCE_DIR)
+        store_key = store.key(reference, reference_ontology)
 
-        for reasoner in [r for r in self._reasoners if r.name != reference.name]:
-            logger.log('{}: '.format(reasoner.name), endl=False)
+        if store.retrieve(store_key, reference_out):
+            logger.log('cached', color=echo.Color.GREEN)
+        else:
+            reference.classify(reference_ontology.path,
+                               output_file=reference_out,
+                               timeout=Reasoners.CLASSIFICATION_TIMEOUT)
+            store.store(store_key, reference_out)
+            logger.log('done', color=echo.Color.GREEN)
+
+        # Classification outputs are normalized in the background while the next reasoner runs.
+        results = []
+
+        for idx, reasoner in enumerate([r for r in self._reasoners if r.name != reference.name]):
+            reasoner_out = os.path.join(self.temp_dir, 'reasoner_{}.txt'.format(idx))
 
             try:
                 reasoner.classify(ontologies[reasoner.preferred_syntax].path,
                                   output_file=reasoner_out,
-                                  timeout=Reasoners.CLASSIFICATION_TIMEOUT)
+                                  timeout=Reasoners.CLASSIFICATION_TIMEOUT,
+                                  wait_for_output=False)
             except TimeoutExpired:
-                result = 'timeout'
-                color = echo.Color.RED
+                results.append((reasoner, reasoner_out, 'timeout'))
             except Exception:
-                result = 'error'
-                color = echo.Color.RED
+                results.append((reasoner, reasoner_out, 'error'))
             else:
-                if filecmp.cmp(reasoner_out, reference_out, shallow=False):
-                    result = 'same'
-                    color = echo.Color.GREEN
+                results.append((reasoner, reasoner_out, None))
+
+        comparator = TaxonomyComparator(temp_dir=self.temp_dir)
+
+        for reasoner, reasoner_out, result in results:
+            logger.log('{}: '.format(reasoner.name), endl=False)
+            diff = None
+
+            if not result:
+                try:
+                    reasoner.wait_for_output()
+                except Exception:
+                    # Also raised if the normalization timed out.
+                    result = 'error'
                 else:
-                    result = 'different'
-                    color = echo.Color.RED
+                    diff = comparator.compare(reasoner_out, reference_out)
+                    result = 'same' if diff.same else 'different'
+
+            color = echo.Color.GREEN if result == 'same' else echo.Color.RED
+
+            if diff and not diff.same:
+                logger.log('{} ({} missing, {} extra)'.format(result, diff.missing, diff.extra), color=color)
+                logger.indent_level += 1
+
+                for sample in diff.missing_samples:
+                    logger.log('- {}'.format(sample))
+
+                for sample in diff.extra_samples:
+                    logger.log('+ {}'.format(sample))
+
+                logger.indent_level -= 1
+            else:
+                logger.log(result, color=color)
 
-            logger.log(result, color=color)
-            csv_row.append(result)
+            csv_row.extend([result, diff.missing, diff.extra] if diff else [result, result, result])
 
         logger.indent_level -= 1
         csv_writer.writerow(csv_row)
@@ -86,20 +125,29 @@ class ClassificationTimeTest(StandardPerformanceTest):
     def default_reasoners(self):
         return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.CLASSIFICATION))
 
+    @property
+    def task(self):
+        return ReasoningTask.CLASSIFICATION
+
+    @property
+    def mode(self):
+        return TestMode.TIME
+
     @property
     def result_fields(self):
-        return ['parsing', 'classification']
+        return ['parsing', 'classification'] + HarnessStats.FIELDS
 
-    def run_reasoner(self, reasoner, ontology, logger):
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
 
         stats = reasoner.classify(ontology.path,
-                                  timeout=Reasoners.CLASSIFICATION_TIMEOUT,
+                                  timeout=timeout,
                                   mode=TestMode.TIME)
 
-        logger.log('{}: Parsing {:.0f} ms | Classification {:.0f} ms'.format(ontology.syntax,
-                                                                             stats.parsing_ms,
-                                                                             stats.reasoning_ms))
-        return [stats.parsing_ms, stats.reasoning_ms]
+        logger.log('{}: Parsing {:.0f} ms | Classification {:.0f} ms | Wall {:.0f} ms'.format(ontology.syntax,
+                                                                                               stats.parsing_ms,
+                                                                                               stats.reasoning_ms,
+                                                                                               stats.harness.wall_ms))
+        return [stats.parsing_ms, stats.reasoning_ms] + stats.harness.values()
 
 
 class ClassificationMemoryTest(StandardPerformanceTest):
@@ -113,14 +161,22 @@ class ClassificationMemoryTest(StandardPerformanceTest):
     def default_reasoners(self):
         return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.CLASSIFICATION))
 
+    @property
+    def task(self):
+        return ReasoningTask.CLASSIFICATION
+
+    @property
+    def mode(self):
+        return TestMode.MEMORY
+
     @property
     def result_fields(self):
         return ['memory']
 
-    def run_reasoner(self, reasoner, ontology, logger):
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
 
         stats = reasoner.classify(ontology.path,
-                                  timeout=Reasoners.CLASSIFICATION_TIMEOUT,
+                                  timeout=timeout,
                                   mode=TestMode.MEMORY)
 
         logger.log('{}: {}'.format(ontology.syntax, fileutils.human_readable_bytes(stats.max_memory)))
@@ -128,6 +184,44 @@ class ClassificationMemoryTest(StandardPerformanceTest):
         return [stats.max_memory]
 
 
+class ClassificationCombinedTest(StandardPerformanceTest):
+    """Classification time and memory test, measuring both in a single run.
+
+    Adaptive iterations stop on the confidence interval of the reported times, not of memory usage.
+    """
+
+    @property
+    def name(self):
+        return 'classification combined'
+
+    @property
+    def default_reasoners(self):
+        return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.CLASSIFICATION))
+
+    @property
+    def task(self):
+        return ReasoningTask.CLASSIFICATION
+
+    @property
+    def mode(self):
+        return TestMode.COMBINED
+
+    @property
+    def result_fields(self):
+        return ['parsing', 'classification', 'memory'] + HarnessStats.FIELDS
+
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
+
+        stats = reasoner.classify(ontology.path,
+                                  timeout=timeout,
+                                  mode=TestMode.COMBINED)
+        human_readable_memory = fileutils.human_readable_bytes(stats.max_memory)
+
+        logger.log('{}: Parsing {:.0f} ms | Classification {:.0f} ms | Memory {} | Wall {:.0f} ms'.format(
+            ontology.syntax, stats.parsing_ms, stats.reasoning_ms, human_readable_memory, stats.harness.wall_ms))
+        return [stats.parsing_ms, stats.reasoning_ms, stats.max_memory] + stats.harness.values()
+
+
 class ClassificationMobileTest(StandardPerformanceTest):
     """Mobile classification performance test."""
 
@@ -139,13 +233,21 @@ class ClassificationMobileTest(StandardPerformanceTest):
     def default_reasoners(self):
         return Reasoners.mobile(Reasoners.supporting_task(ReasoningTask.CLASSIFICATION))
 
+    @property
+    def task(self):
+        return ReasoningTask.CLASSIFICATION
+
+    @property
+    def mode(self):
+        return TestMode.MOBILE
+
     @property
     def result_fields(self):
         return ['parsing', 'classification', 'memory']
 
-    def run_reasoner(self, reasoner, ontology, logger):
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
 
-        stats = reasoner.classify(ontology.path, timeout=Reasoners.CLASSIFICATION_TIMEOUT)
+        stats = reasoner.classify(ontology.path, timeout=timeout)
         human_readable_memory = fileutils.human_readable_bytes(stats.max_memory)
 
         logger.log('Parsing {:.0f} ms | Classification {:.0f} ms | Memory {}'.format(stats.parsing_ms,
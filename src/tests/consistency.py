@@ -2,6 +2,7 @@ from subprocess import TimeoutExpired
 
 from src.config import Reasoners
 from src.reasoners.owl import ReasoningTask, TestMode
+from src.reasoners.results import HarnessStats
 from src.pyutils import echo, fileutils
 from .test import Test, StandardPerformanceTest
 
@@ -65,21 +66,30 @@ class ConsistencyTimeTest(StandardPerformanceTest):
     def default_reasoners(self):
         return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.CONSISTENCY))
 
+    @property
+    def task(self):
+        return ReasoningTask.CONSISTENCY
+
+    @property
+    def mode(self):
+        return TestMode.TIME
+
     @property
     def result_fields(self):
-        return ['parsing', 'consistency']
+        return ['parsing', 'consistency'] + HarnessStats.FIELDS
 
-    def run_reasoner(self, reasoner, ontology, logger):
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
 
         results = reasoner.consistency(ontology.path,
-                                       timeout=Reasoners.CONSISTENCY_TIMEOUT,
+                                       timeout=timeout,
                                        mode=TestMode.TIME)
 
         stats = results.stats
-        logger.log('{}: Parsing {:.0f} ms | Consistency {:.0f} ms'.format(ontology.syntax,
-                                                                          stats.parsing_ms,
-                                                                          stats.reasoning_ms))
-        return [stats.parsing_ms, stats.reasoning_ms]
+        logger.log('{}: Parsing {:.0f} ms | Consistency {:.0f} ms | Wall {:.0f} ms'.format(ontology.syntax,
+                                                                                            stats.parsing_ms,
+                                                                                            stats.reasoning_ms,
+                                                                                            stats.harness.wall_ms))
+        return [stats.parsing_ms, stats.reasoning_ms] + stats.harness.values()
 
 
 class ConsistencyMemoryTest(StandardPerformanceTest):
@@ -93,13 +103,21 @@ class ConsistencyMemoryTest(StandardPerformanceTest):
     def default_reasoners(self):
         return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.CONSISTENCY))
 
+    @property
+    def task(self):
+        return ReasoningTask.CONSISTENCY
+
+    @property
+    def mode(self):
+        return TestMode.MEMORY
+
     @property
     def result_fields(self):
         return ['memory']
 
-    def run_reasoner(self, reasoner, ontology, logger):
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
         results = reasoner.consistency(ontology.path,
-                                       timeout=Reasoners.CONSISTENCY_TIMEOUT,
+                                       timeout=timeout,
                                        mode=TestMode.MEMORY)
         stats = results.stats
 
@@ -108,6 +126,44 @@ class ConsistencyMemoryTest(StandardPerformanceTest):
         return [stats.max_memory]
 
 
+class ConsistencyCombinedTest(StandardPerformanceTest):
+    """Consistency time and memory test, measuring both in a single run.
+
+    Adaptive iterations stop on the confidence interval of the reported times, not of memory usage.
+    """
+
+    @property
+    def name(self):
+        return 'consistency combined'
+
+    @property
+    def default_reasoners(self):
+        return Reasoners.desktop(Reasoners.supporting_task(ReasoningTask.CONSISTENCY))
+
+    @property
+    def task(self):
+        return ReasoningTask.CONSISTENCY
+
+    @property
+    def mode(self):
+        return TestMode.COMBINED
+
+    @property
+    def result_fields(self):
+        return ['parsing', 'consistency', 'memory'] + HarnessStats.FIELDS
+
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
+
+        stats = reasoner.consistency(ontology.path,
+                                     timeout=timeout,
+                                     mode=TestMode.COMBINED).stats
+        human_readable_memory = fileutils.human_readable_bytes(stats.max_memory)
+
+        logger.log('{}: Parsing {:.0f} ms | Consistency {:.0f} ms | Memory {} | Wall {:.0f} ms'.format(
+            ontology.syntax, stats.parsing_ms, stats.reasoning_ms, human_readable_memory, stats.harness.wall_ms))
+        return [stats.parsing_ms, stats.reasoning_ms, stats.max_memory] + stats.harness.values()
+
+
 class ConsistencyMobileTest(StandardPerformanceTest):
     """Mobile consistency performance test."""
 
@@ -119,13 +175,21 @@ class ConsistencyMobileTest(StandardPerformanceTest):
     def default_reasoners(self):
         return Reasoners.mobile(Reasoners.supporting_task(ReasoningTask.CONSISTENCY))
 
+    @property
+    def task(self):
+        return ReasoningTask.CONSISTENCY
+
+    @property
+    def mode(self):
+        return TestMode.MOBILE
+
     @property
     def result_fields(self):
         return ['parsing', 'consistency', 'memory']
 
-    def run_reasoner(self, reasoner, ontology, logger):
+    def run_reasoner(self, reasoner, ontology, logger, timeout):
 
-        stats = reasoner.consistency(ontology.path, timeout=Reasoners.CONSISTENCY_TIMEOUT).stats
+        stats = reasoner.consistency(ontology.path, timeout=timeout).stats
         human_readable_memory = fileutils.human_readable_bytes(stats.max_memory)
 
         logger.log('Parsing {:.0f} ms | Consistency {:.0f} ms | Memory {}'.format(stats.parsing_ms,
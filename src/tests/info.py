@@ -1,6 +1,12 @@
-from src.config import Reasoners
+from typing import List, Optional
+
+from src.cache import MetricsCache
+from src.config import Paths, Reasoners
+from src.manifest import OntologyFilter
+from src.metrics import OntologyMetrics, compute, ontology_metrics
 from src.pyutils import echo
-from src.reasoners.owl import OWLSyntax
+from src.reasoners.owl import OWLOntology, OWLSyntax
+from .scheduler import Scheduler
 from .test import Test
 
 
@@ -15,8 +21,26 @@ class InfoTest(Test):
     def default_reasoners(self):
         return Reasoners.ALL
 
+    def __init__(self,
+                 datasets: Optional[List[str]] = None,
+                 reasoners: Optional[List[str]] = None,
+                 all_syntaxes: bool = False,
+                 ontology_filter: Optional[OntologyFilter] = None,
+                 jobs: int = 1):
+        """
+        :param all_syntaxes : If true, metrics are computed for all syntaxes, rather than for functional syntax only.
+        :param jobs : Number of ontologies whose metrics are computed in parallel.
+        """
+        Test.__init__(self, datasets, reasoners, all_syntaxes, ontology_filter)
+        self.jobs = jobs
+        self.cache = MetricsCache(Paths.METRICS_DIR)
+        self._syntaxes = OWLSyntax.ALL if all_syntaxes else [OWLSyntax.FUNCTIONAL]
+        self._pending = {}
+
     def setup(self, logger, csv_writer):
-        csv_writer.writerow(['Ontology'] + ['Size ({})'.format(s) for s in OWLSyntax.ALL])
+        csv_writer.writerow(['Ontology'] + ['Size ({})'.format(s) for s in OWLSyntax.ALL] +
+                            ['{} ({})'.format(f.capitalize(), s) for s in self._syntaxes
+                             for f in OntologyMetrics.FIELDS])
 
         logger.log('Reasoners:', color=echo.Color.YELLOW)
         logger.indent_level += 1
@@ -27,5 +51,52 @@ class InfoTest(Test):
         logger.indent_level -= 1
         logger.log('')
 
+    def run_dataset(self, entries, logger, csv_writer):
+        if self.jobs == 1:
+            Test.run_dataset(self, entries, logger, csv_writer)
+            return
+
+        # Metrics which are not cached are computed in the background, and collected in order by 'run'.
+        with Scheduler(self.jobs, pin=False) as scheduler:
+            for _, ontologies in entries:
+                for ontology in (ontologies[s] for s in self._syntaxes):
+                    if not self.cache.get(ontology, OntologyMetrics.VERSION):
+                        self._pending[ontology.path] = scheduler.submit(compute, ontology.path, ontology.syntax)
+
+            try:
+                Test.run_dataset(self, entries, logger, csv_writer)
+            finally:
+                self._pending = {}
+
     def run(self, onto_name, ontologies, logger, csv_writer):
-        csv_writer.writerow([onto_name] + [ontologies[s].size for s in OWLSyntax.ALL])
+        row = [onto_name] + [ontologies[s].size for s in OWLSyntax.ALL]
+
+        for syntax in self._syntaxes:
+            metrics = self._metrics(ontologies[syntax])
+            axioms = sorted(metrics.axioms.items(), key=lambda a: (-a[1], a[0]))
+
+            logger.log('{}: {} axioms ({} logical), {}, max depth {}'.format(syntax, metrics.axiom_count,
+                                                                             metrics.logical_axiom_count,
+                                                                             metrics.expressivity,
+                                                                             metrics.max_depth))
+
+            if axioms:
+                logger.indent_level += 1
+                logger.log(', '.join('{} {}'.format(a, c) for a, c in axioms))
+                logger.indent_level -= 1
+
+            row.extend(metrics.values())
+
+        csv_writer.writerow(row)
+
+    # Private
+
+    def _metrics(self, ontology: OWLOntology) -> OntologyMetrics:
+        future = self._pending.pop(ontology.path, None)
+
+        if not future:
+            return ontology_metrics(ontology, self.cache)
+
+        metrics = future.result()
+        self.cache.set(ontology, OntologyMetrics.VERSION, metrics.to_dict())
+        return metrics
@@ -0,0 +1,136 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from src.reasoners.owl import OWLOntology, OWLSyntax
+from . import stats
+
+
+class Order:
+    """Ontology ordering namespace.
+
+    LPT (longest processing time) orders ontologies as LARGEST, and also submits the reasoner runs
+    to the parallel workers by decreasing cost, so that each run goes to the least loaded worker.
+    """
+    NAME = 'name'
+    SMALLEST = 'smallest'
+    LARGEST = 'largest'
+    LPT = 'lpt'
+
+    ALL = [NAME, SMALLEST, LARGEST, LPT]
+
+
+class CostModel:
+    """Estimates the cost of reasoner jobs, in milliseconds.
+
+    Estimates come from the median time taken by the reasoner on the same ontology in previous runs,
+    as stored in the results store, with timed out runs counting as the current timeout. As warm-up runs,
+    which are not stored, cold runs in a fresh JVM are left out, since they include the JVM startup. Jobs without
+    previous results are estimated from the size of the ontology, scaled by the median time per byte
+    of the reasoner on the other ontologies (or of all reasoners, if it has no previous results).
+    """
+
+    # Time per byte assumed when there are no previous results at all.
+    FALLBACK_MS_PER_BYTE = 0.001
+
+    def __init__(self, history: Dict[Tuple[str, str], float]):
+        """:param history : Median time of previous runs in milliseconds, keyed by reasoner and ontology name."""
+        self.history = history
+
+    @classmethod
+    def from_store(cls, db_path: str, task: str, timeout: float, dataset: Optional[str] = None) -> 'CostModel':
+        """Builds a cost model from the results of the specified task in a results store, if it exists.
+
+        The time of a run is its harness-measured wall time, if available,
+        otherwise the sum of the parsing and reasoning times reported by the reasoner.
+
+        :param timeout : Time assumed for timed out runs, in seconds.
+        :param dataset : If specified, only the results on the ontologies of this dataset are used.
+        """
+        if not os.path.isfile(db_path):
+            return cls({})
+
+        # Only imported when needed, since the Order namespace is used by the CLI parser.
+        from src.reasoners.results import HarnessStats
+        from src.store import ResultStore, Status
+
+        wall_field = HarnessStats.FIELDS[0]
+
+        with ResultStore(db_path) as store:
+            filters = {'dataset': dataset} if dataset is not None else {}
+            measurements = store.query(task=task, field=[wall_field, 'parsing', task], **filters)
+
+        wall_runs, reported_runs = {}, {}
+
+        for run, reasoner, _, onto_dataset, ontology, syntax, _, mode, iteration, field, value, status in measurements:
+            # Cold runs are stored with a negative iteration index.
+            if iteration < 0:
+                continue
+
+            if status == Status.OK:
+                value = float(value)
+            elif status == Status.TIMEOUT:
+                value = timeout * 1000.0
+            else:
+                continue
+
+            runs = wall_runs if field == wall_field else reported_runs
+            run_key = (run, onto_dataset, syntax, mode, iteration)
+            cell = runs.setdefault((reasoner, ontology), {})
+
+            # Timed out runs are reported once for each field.
+            cell[run_key] = value if status == Status.TIMEOUT else cell.get(run_key, 0.0) + value
+
+        history = {}
+
+        for key in set(wall_runs) | set(reported_runs):
+            history[key] = stats.median(list(wall_runs.get(key, reported_runs.get(key)).values()))
+
+        return cls(history)
+
+    def estimates(self,
+                  reasoner_names: List[str],
+                  entries: List[Tuple[str, Dict[str, OWLOntology]]]) -> Dict[Tuple[str, str], Tuple[float, bool]]:
+        """Estimates the cost of each reasoner on each ontology.
+
+        :return : Estimated cost in milliseconds, and whether it comes from previous results,
+                  keyed by reasoner and ontology name.
+        """
+        sizes = dict((onto_name, ontologies[OWLSyntax.FUNCTIONAL].size) for onto_name, ontologies in entries)
+        rates = {}
+
+        for (reasoner, ontology), cost in self.history.items():
+            if reasoner in reasoner_names and sizes.get(ontology):
+                rates.setdefault(reasoner, []).append(cost / sizes[ontology])
+
+        all_rates = [r for reasoner_rates in rates.values() for r in reasoner_rates]
+        fallback = stats.median(all_rates) if all_rates else self.FALLBACK_MS_PER_BYTE
+        rates = dict((r, stats.median(reasoner_rates)) for r, reasoner_rates in rates.items())
+
+        estimates = {}
+
+        for reasoner in reasoner_names:
+            for onto_name, size in sizes.items():
+                cost = self.history.get((reasoner, onto_name))
+
+                if cost is None:
+                    estimates[(reasoner, onto_name)] = (size * rates.get(reasoner, fallback), False)
+                else:
+                    estimates[(reasoner, onto_name)] = (cost, True)
+
+        return estimates
+
+
+def order_entries(entries: List[Tuple[str, Dict[str, OWLOntology]]],
+                  costs: Dict[str, float],
+                  order: str) -> List[Tuple[str, Dict[str, OWLOntology]]]:
+    """Orders the ontologies of a dataset.
+
+    :param costs : Estimated cost of each ontology, by name.
+    :param order : Ordering, one of the values of the Order namespace.
+                   Longest-processing-time packing runs the costliest ontologies first.
+    """
+    if order == Order.NAME:
+        return sorted(entries, key=lambda e: e[0])
+
+    sign = 1.0 if order == Order.SMALLEST else -1.0
+    return sorted(entries, key=lambda e: (sign * costs[e[0]], e[0]))
@@ -0,0 +1,199 @@
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class Sample:
+    """Resource usage of a process tree at a point in time."""
+
+    def __init__(self,
+                 time_s: float,
+                 rss: int,
+                 vms: int,
+                 read_chars: int,
+                 write_chars: int,
+                 read_bytes: int,
+                 write_bytes: int):
+        """
+        :param time_s : Seconds since sampling started.
+        :param rss : Total resident set size, in bytes.
+        :param vms : Total virtual memory size, in bytes.
+        :param read_chars : Bytes read through read-like syscalls.
+        :param write_chars : Bytes written through write-like syscalls.
+        :param read_bytes : Bytes fetched from the storage layer.
+        :param write_bytes : Bytes sent to the storage layer.
+        """
+        self.time_s = time_s
+        self.rss = rss
+        self.vms = vms
+        self.read_chars = read_chars
+        self.write_chars = write_chars
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+
+
+class ResourceSampler:
+    """Periodically samples memory and I/O of the processes spawned by the current process, via procfs.
+
+    Only processes started after the sampler, together with all their descendants, are sampled,
+    so that long-lived helpers (e.g. JVM daemons) are excluded. Memory is summed over the live processes,
+    while I/O counters are summed over every process seen, so that they never decrease when a child exits.
+    """
+
+    PROC_DIR = '/proc'
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        """True if procfs is available on the host, False otherwise."""
+        return os.path.isfile(os.path.join(cls.PROC_DIR, 'self', 'stat'))
+
+    def __init__(self, rate: float):
+        """:param rate : Sampling rate, in Hz."""
+        self.interval = 1.0 / rate
+        self.samples = []  # type: List[Sample]
+        self._root = os.getpid()
+        self._excluded = set()
+        self._io = {}  # type: Dict[int, Tuple[int, int, int, int]]
+        self._start_time = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Starts sampling in a background thread."""
+        self.samples = []
+        self._io = {}
+        self._excluded = set(_children(self._root))
+        self._start_time = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling."""
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def save(self, file_path: str) -> None:
+        """Saves the samples to the specified file, in a compact binary format."""
+        with open(file_path, 'wb') as out_file:
+            out_file.write(_HEADER.pack(_MAGIC, _VERSION, self.interval))
+
+            for s in self.samples:
+                out_file.write(_RECORD.pack(s.time_s, s.rss, s.vms, s.read_chars, s.write_chars,
+                                            s.read_bytes, s.write_bytes))
+
+    # Private
+
+    def _loop(self) -> None:
+        while True:
+            self._sample()
+
+            if self._stop.wait(self.interval):
+                break
+
+    def _sample(self) -> None:
+        pids = self._descendants()
+
+        if not pids:
+            return
+
+        rss, vms = 0, 0
+
+        for pid in pids:
+            memory = _read_memory(pid)
+
+            if memory:
+                rss += memory[0]
+                vms += memory[1]
+
+            io = _read_io(pid)
+
+            if io:
+                self._io[pid] = io
+
+        io_totals = [sum(counters[i] for counters in self._io.values()) for i in range(4)]
+        self.samples.append(Sample(time.monotonic() - self._start_time, rss, vms, *io_totals))
+
+    def _descendants(self) -> List[int]:
+        pids = [pid for pid in _children(self._root) if pid not in self._excluded]
+        idx = 0
+
+        while idx < len(pids):
+            pids.extend(_children(pids[idx]))
+            idx += 1
+
+        return pids
+
+
+def load_samples(file_path: str) -> Tuple[float, List[Sample]]:
+    """Loads samples saved by a ResourceSampler.
+
+    :return : Sampling interval in seconds, and samples.
+    """
+    with open(file_path, 'rb') as in_file:
+        data = in_file.read()
+
+    magic, version, interval = _HEADER.unpack_from(data)
+
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('Unsupported samples file: {}'.format(file_path))
+
+    samples = [Sample(*record) for record in _RECORD.iter_unpack(data[_HEADER.size:])]
+    return interval, samples
+
+
+# Private
+
+
+_MAGIC = b'RSMP'
+_VERSION = 1
+_HEADER = struct.Struct('<4sBf')
+_RECORD = struct.Struct('<fQQQQQQ')
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _children(pid: int) -> List[int]:
+    """Returns the child processes of the specified process."""
+    task_dir = os.path.join(ResourceSampler.PROC_DIR, str(pid), 'task')
+    children = []
+
+    try:
+        for tid in os.listdir(task_dir):
+            with open(os.path.join(task_dir, tid, 'children')) as in_file:
+                children.extend(int(c) for c in in_file.read().split())
+    except OSError:
+        pass
+
+    return children
+
+
+def _read_memory(pid: int) -> Optional[Tuple[int, int]]:
+    """Returns the resident and virtual memory size of the specified process, in bytes."""
+    try:
+        with open(os.path.join(ResourceSampler.PROC_DIR, str(pid), 'stat')) as in_file:
+            stat = in_file.read()
+    except OSError:
+        return None
+
+    # Fields after the command name, which may contain spaces. vsize and rss are fields 23 and 24.
+    fields = stat[stat.rfind(')') + 2:].split()
+    return int(fields[21]) * _PAGE_SIZE, int(fields[20])
+
+
+def _read_io(pid: int) -> Optional[Tuple[int, int, int, int]]:
+    """Returns the rchar, wchar, read_bytes and write_bytes counters of the specified process."""
+    try:
+        with open(os.path.join(ResourceSampler.PROC_DIR, str(pid), 'io')) as in_file:
+            counters = dict(line.split(':', 1) for line in in_file if ':' in line)
+    except OSError:
+        return None
+
+    try:
+        return (int(counters['rchar']), int(counters['wchar']),
+                int(counters['read_bytes']), int(counters['write_bytes']))
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,197 @@
+import multiprocessing
+import multiprocessing.util
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+from src.reasoners import watchdog
+from src.reasoners.daemon import stop_daemons
+
+
+class CPUTopology:
+    """Models the CPU topology of the host machine, as exposed by sysfs on Linux."""
+
+    SYSFS_CPU_DIR = '/sys/devices/system/cpu'
+    SYSFS_NODE_DIR = '/sys/devices/system/node'
+
+    @property
+    def cpus(self) -> List[int]:
+        """Logical CPUs the current process is allowed to run on."""
+        if hasattr(os, 'sched_getaffinity'):
+            return sorted(os.sched_getaffinity(0))
+        return list(range(os.cpu_count() or 1))
+
+    @property
+    def nodes(self) -> List[List[List[int]]]:
+        """Physical cores grouped by NUMA node. Each core is the list of its SMT siblings."""
+        cpus = set(self.cpus)
+        cores = {}
+
+        for cpu in cpus:
+            siblings = self._read_cpu_list(os.path.join(self.SYSFS_CPU_DIR, 'cpu{}'.format(cpu),
+                                                        'topology', 'thread_siblings_list'))
+            siblings = tuple(sorted(cpus.intersection(siblings))) if siblings else (cpu,)
+            cores[siblings] = True
+
+        node_cpus = []
+
+        if os.path.isdir(self.SYSFS_NODE_DIR):
+            for entry in sorted(os.listdir(self.SYSFS_NODE_DIR)):
+                if entry.startswith('node') and entry[4:].isdigit():
+                    node_cpus.append(set(self._read_cpu_list(os.path.join(self.SYSFS_NODE_DIR, entry, 'cpulist'))))
+
+        if not node_cpus:
+            node_cpus = [cpus]
+
+        nodes = [[list(core) for core in sorted(cores) if core[0] in node] for node in node_cpus]
+        return [node for node in nodes if node]
+
+    def slots(self, count: int) -> List[List[int]]:
+        """Partitions the available CPUs into the specified number of disjoint slots.
+
+        SMT siblings are always assigned to the same slot, and slots do not span
+        NUMA nodes unless there is no other way to allocate them. If there are less physical
+        cores than slots, logical CPUs are assigned individually.
+        """
+        nodes = self.nodes
+        core_count = sum(len(node) for node in nodes)
+
+        if count > core_count:
+            cpus = self.cpus
+
+            if count > len(cpus):
+                raise ValueError('Cannot run {} jobs on {} CPUs.'.format(count, len(cpus)))
+
+            return [[cpu] for cpu in cpus[:count]]
+
+        cores_per_slot = core_count // count
+        slots = []
+        leftovers = []
+
+        for node in nodes:
+            while len(node) >= cores_per_slot and len(slots) < count:
+                slots.append(_flatten(node[:cores_per_slot]))
+                node = node[cores_per_slot:]
+            leftovers.extend(node)
+
+        while len(slots) < count:
+            slots.append(_flatten(leftovers[:cores_per_slot]))
+            leftovers = leftovers[cores_per_slot:]
+
+        return slots
+
+    # Private
+
+    @staticmethod
+    def _read_cpu_list(file_path: str) -> List[int]:
+        """Reads a sysfs CPU list, e.g. '0-3,8-11'."""
+        try:
+            with open(file_path) as in_file:
+                cpu_list = in_file.read().strip()
+        except OSError:
+            return []
+
+        cpus = []
+
+        for component in (c for c in cpu_list.split(',') if c):
+            bounds = component.split('-')
+            cpus.extend(range(int(bounds[0]), int(bounds[-1]) + 1))
+
+        return cpus
+
+
+class LogRecorder:
+    """Logger stand-in which records messages in worker processes, so that they can be replayed in order."""
+
+    def __init__(self):
+        self.indent_level = 0
+        self.records = []
+
+    def log(self, message: str, color: Optional[str] = None, endl: bool = True) -> None:
+        self.records.append((message, color, endl, self.indent_level))
+
+    def replay(self, logger) -> None:
+        """Replays the recorded messages on the specified logger."""
+        base_level = logger.indent_level
+
+        for message, color, endl, indent_level in self.records:
+            logger.indent_level = base_level + indent_level
+
+            if color is None:
+                logger.log(message, endl=endl)
+            else:
+                logger.log(message, color=color, endl=endl)
+
+        logger.indent_level = base_level
+
+
+class Scheduler:
+    """Runs jobs in a pool of worker processes, each one pinned to its own set of CPU cores.
+
+    Reasoner processes inherit the affinity of the worker that spawns them,
+    so that concurrent runs do not compete for the same physical cores.
+    On Linux, memory is allocated on the NUMA node the worker runs on (first-touch policy).
+    """
+
+    @property
+    def slots(self) -> List[List[int]]:
+        """CPU slots assigned to the workers, empty if pinning is not available."""
+        return self._slots
+
+    def __init__(self, jobs: int, pin: bool = True):
+        """
+        :param jobs : Number of worker processes.
+        :param pin : If true, pin each worker to its own set of cores.
+        """
+        context = multiprocessing.get_context()
+        self._slots = CPUTopology().slots(jobs) if pin and hasattr(os, 'sched_setaffinity') else []
+        slot_queue = context.Queue()
+
+        for slot in self._slots:
+            slot_queue.put(slot)
+
+        self._executor = ProcessPoolExecutor(max_workers=jobs,
+                                             mp_context=context,
+                                             initializer=_init_worker,
+                                             initargs=(slot_queue, bool(self._slots)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(cancel=exc_type is not None)
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Schedules the execution of func(*args)."""
+        return self._executor.submit(func, *args)
+
+    def shutdown(self, cancel: bool = False) -> None:
+        """Waits for running jobs to complete. Pending jobs are dropped if cancel is true."""
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+
+
+def cancel_on_failure(future: Future, dependents: List[Future], succeeded: Callable) -> None:
+    """Cancels the dependent futures if the job represented by future fails."""
+    def callback(done: Future) -> None:
+        if done.cancelled() or done.exception() is not None or not succeeded(done.result()):
+            for dependent in dependents:
+                dependent.cancel()
+
+    future.add_done_callback(callback)
+
+
+# Private
+
+
+def _flatten(cores: List[List[int]]) -> List[int]:
+    return [cpu for core in cores for cpu in core]
+
+
+def _init_worker(slot_queue, pin: bool) -> None:
+    # Worker processes do not run atexit handlers when they exit.
+    multiprocessing.util.Finalize(None, stop_daemons, exitpriority=0)
+    multiprocessing.util.Finalize(None, watchdog.kill_all, exitpriority=0)
+
+    if pin:
+        os.sched_setaffinity(0, slot_queue.get())
+
@@ -0,0 +1,159 @@
+import math
+from typing import List, Optional, Tuple
+
+
+class Summary:
+    """Robust summary statistics of a sample of measurements."""
+
+    @property
+    def relative_ci(self) -> float:
+        """Width of the confidence interval of the median, relative to the median."""
+        width = self.ci_high - self.ci_low
+
+        if width == 0.0:
+            return 0.0
+
+        return width / abs(self.median) if self.median else math.inf
+
+    def __init__(self, runs: int, outliers: int, median: float, mad: float, ci_low: float, ci_high: float):
+        self.runs = runs
+        self.outliers = outliers
+        self.median = median
+        self.mad = mad
+        self.ci_low = ci_low
+        self.ci_high = ci_high
+
+
+class IterationPolicy:
+    """Decides how many times each reasoner should be run on each ontology.
+
+    If a target is specified, iterations continue until the relative confidence interval
+    of the median falls below the target, or the maximum number of iterations is reached.
+    Otherwise, a fixed number of iterations is run.
+    """
+
+    @property
+    def is_adaptive(self) -> bool:
+        """True if the number of iterations depends on the measurements, False otherwise."""
+        return self.target_ci is not None
+
+    def __init__(self,
+                 min_iterations: int,
+                 max_iterations: Optional[int] = None,
+                 warmup: int = 0,
+                 target_ci: Optional[float] = None,
+                 confidence: float = 0.95):
+        """
+        :param min_iterations : Minimum number of iterations.
+        :param max_iterations : Maximum number of iterations, only used if a target is specified.
+        :param warmup : Number of discarded warm-up runs.
+        :param target_ci : Target relative width of the confidence interval of the median.
+        :param confidence : Confidence level.
+        """
+        self.min_iterations = min_iterations
+        self.max_iterations = max(max_iterations, min_iterations) if target_ci and max_iterations else min_iterations
+        self.warmup = warmup
+        self.target_ci = target_ci
+        self.confidence = confidence
+
+    def needs_more(self, samples: List[float]) -> bool:
+        """Returns true if more iterations are needed for the specified samples."""
+        if len(samples) < self.min_iterations:
+            return True
+
+        if not self.is_adaptive or len(samples) >= self.max_iterations:
+            return False
+
+        return summarize(samples, self.confidence).relative_ci > self.target_ci
+
+
+def median(values: List[float]) -> float:
+    """Median of the specified values."""
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2.0
+
+
+def mad(values: List[float]) -> float:
+    """Median absolute deviation of the specified values."""
+    med = median(values)
+    return median([abs(v - med) for v in values])
+
+
+def median_ci(values: List[float], confidence: float = 0.95) -> Tuple[float, float]:
+    """Distribution-free confidence interval of the median, based on order statistics.
+
+    For small samples, the interval widens to the range of the sample.
+    """
+    values = sorted(values)
+    n = len(values)
+    alpha = (1.0 - confidence) / 2.0
+
+    # Largest k such that P(X < k) <= alpha, where X ~ Binomial(n, 0.5).
+    k = 0
+    cdf = 0.0
+
+    while k < n // 2:
+        cdf += math.comb(n, k) / 2.0 ** n
+        if cdf > alpha:
+            break
+        k += 1
+
+    k = max(k, 1)
+    return values[k - 1], values[n - k]
+
+
+def outliers(values: List[float], threshold: float = 3.5) -> List[bool]:
+    """Flags outliers by their modified z-score (Iglewicz and Hoaglin)."""
+    med = median(values)
+    deviation = mad(values)
+
+    if deviation == 0.0:
+        return [False] * len(values)
+
+    return [abs(0.6745 * (v - med) / deviation) > threshold for v in values]
+
+
+def summarize(values: List[float], confidence: float = 0.95) -> Summary:
+    """Summarizes the specified values, excluding outliers."""
+    flags = outliers(values)
+    inliers = [v for v, is_outlier in zip(values, flags) if not is_outlier]
+    ci_low, ci_high = median_ci(inliers, confidence)
+
+    return Summary(runs=len(values),
+                   outliers=len(values) - len(inliers),
+                   median=median(inliers),
+                   mad=mad(inliers),
+                   ci_low=ci_low,
+                   ci_high=ci_high)
+
+
+def total_fields(fields: List[str], harness_fields: List[str]) -> int:
+    """Number of leading result fields whose values add up to the total of a run.
+
+    Only the times reported by the reasoner, which precede its memory usage, are summed,
+    unless memory usage is the only reported value. Fields measured by the harness overlap
+    with those reported by the reasoner, so they are never summed.
+    """
+    reported = [f for f in fields if f not in harness_fields]
+    times = [f for f in reported if f != 'memory']
+    return len(times) if times else len(reported)
+
+
+def totals(runs: List[List], fields: Optional[int] = None) -> List[float]:
+    """Sums the numeric result values of each run.
+
+    :param fields : If specified, only the values of the first 'fields' result fields are summed.
+    """
+    return [float(sum(v for v in run[:fields] if isinstance(v, (int, float)))) for run in runs]
+
+
+def summary_header() -> List[str]:
+    """CSV header for summary statistics."""
+    return ['Runs', 'Outliers', 'Median', 'MAD', 'CI low', 'CI high', 'Relative CI']
+
+
+def summary_row(summary: Summary) -> List:
+    """CSV row for the specified summary statistics."""
+    return [summary.runs, summary.outliers, summary.median, summary.mad,
+            summary.ci_low, summary.ci_high, '{:.4f}'.format(summary.relative_ci)]
@@ -4,14 +4,31 @@ import tempfile
 import time
 from os import listdir, path
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
+from concurrent.futures import CancelledError
 from subprocess import TimeoutExpired
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+from src.cache import ResultCache, file_hash
 from src.config import DEBUG, Paths, Reasoners
-from src.reasoners.owl import OWLOntology, OWLReasoner, OWLSyntax
+from src.manifest import DatasetManifest, OntologyFilter
+from src.reasoners.cgroup import CGroupBackend
+from src.reasoners.daemon import DaemonError
+from src.reasoners.owl import OWLOntology, OWLReasoner, OWLSyntax, TestMode, VMProfileReasoner
+from src.reasoners import watchdog
+from src.reasoners.registry import ReasonerSpec
+from src.reasoners.process import measurement_overhead
+from src.reasoners.results import HarnessStats
+from src.store import ResultStore, parse_header, row_measurements
 from src.pyutils import echo, exc, fileutils
 from src.pyutils.decorators import cached_property
 from src.pyutils.logger import Logger
+from . import stats
+from .scheduler import LogRecorder, Scheduler, cancel_on_failure
+from .sampler import ResourceSampler
+from .stats import IterationPolicy
+from .ordering import CostModel, Order, order_entries
+from .timeouts import TimeoutPolicy
 
 
 class Test:
@@ -25,7 +42,7 @@ class Test:
 
     @property
     @abstractmethod
-    def default_reasoners(self) -> List[OWLReasoner]:
+    def default_reasoners(self) -> List[ReasonerSpec]:
         pass
 
     @abstractmethod
@@ -60,93 +77,111 @@ class Test:
     def csv_path(self) -> str:
         return path.join(self.work_dir, 'results.csv')
 
+    @cached_property
+    def summary_path(self) -> str:
+        return path.join(self.work_dir, 'summary.csv')
+
     def __init__(self,
                  datasets: Optional[List[str]] = None,
                  reasoners: Optional[List[str]] = None,
-                 all_syntaxes: bool = False):
+                 all_syntaxes: bool = False,
+                 ontology_filter: Optional[OntologyFilter] = None):
+        """
+        :param datasets : If specified, limit the tests to the specified datasets.
+        :param reasoners : If specified, limit the tests to the specified reasoners.
+        :param all_syntaxes : If true, the test is run on all supported syntaxes.
+        :param ontology_filter : If specified, limit the tests to the ontologies it selects.
+        """
         self._datasets = datasets
         self._all_syntaxes = all_syntaxes
+        self.ontology_filter = ontology_filter
 
+        # Only the selected reasoners are built: unavailable default reasoners are skipped.
         if reasoners:
             try:
-                self._reasoners = [Reasoners.by_name()[n] for n in reasoners]
+                specs = [Reasoners.by_name()[n] for n in reasoners]
             except KeyError as e:
                 exc.re_raise_new_message(e, 'No such reasoner: ' + str(e))
+            self._reasoners = Reasoners.build(specs)
         else:
-            self._reasoners = self.default_reasoners
+            self._reasoners = Reasoners.build(self.default_reasoners, skip_unavailable=True)
 
     def clear_temp(self) -> None:
         fileutils.remove_dir_contents(self.temp_dir)
 
     def start(self, resume_ontology: Optional[str] = None):
         """Starts the test."""
-        data_dir = Paths.DATA_DIR
         search_for_resume = True if resume_ontology else False
 
-        if self._datasets:
-            datasets = [path.join(data_dir, d) for d in self._datasets]
-        else:
-            datasets = [path.join(data_dir, d) for d in listdir(data_dir)]
-            datasets = [d for d in datasets if path.isdir(d)]
-
-        with Logger(self.log_path) as logger, open(self.csv_path, mode='w') as csv_file:
-
-            logger.clear()
-            csv_writer = csv.writer(csv_file)
-
-            self.setup(logger, csv_writer)
-
-            for dataset in datasets:
-                func_dir = path.join(dataset, 'functional')
-                xml_dir = path.join(dataset, 'rdfxml')
-
-                exc.raise_if_not_found(func_dir, file_type=exc.FileType.DIR)
-                exc.raise_if_not_found(xml_dir, file_type=exc.FileType.DIR)
-
-                onto_names = [f for f in listdir(func_dir) if f.endswith('.owl')]
-                onto_names.sort()
+        with self.session() as (logger, csv_writer):
+            for dataset in dataset_dirs(self._datasets):
+                entries = dataset_entries(dataset, self.ontology_filter)
 
                 # Hello
                 echo.pretty(
                     'Starting {} test on "{}" dataset ({} ontologies)...\n'.format(self.name,
                                                                                    path.basename(dataset),
-                                                                                   len(onto_names)),
+                                                                                   len(entries)),
                     color=echo.Color.GREEN)
 
-                # Test dataset
-                for onto_name in onto_names:
+                # Allow resuming the test after a certain ontology.
+                if search_for_resume:
+                    names = [onto_name for onto_name, _ in entries]
 
-                    # Allow resuming the test after a certain ontology.
-                    if search_for_resume:
-                        if onto_name == resume_ontology:
-                            search_for_resume = False
-                        continue
+                    if resume_ontology in names:
+                        entries = entries[names.index(resume_ontology) + 1:]
+                        search_for_resume = False
+                    else:
+                        entries = []
 
-                    func_ontology = OWLOntology(path.join(func_dir, onto_name), OWLSyntax.FUNCTIONAL)
-                    xml_ontology = OWLOntology(path.join(xml_dir, onto_name), OWLSyntax.RDFXML)
+                self.run_dataset(entries, logger, csv_writer)
+                logger.log('')
+
+    @contextmanager
+    def session(self) -> Iterator[Tuple[Logger, csv.writer]]:
+        """Opens the log and results files of the test and sets it up, so that datasets can be run."""
+        with Logger(self.log_path) as logger, open(self.csv_path, mode='w') as csv_file:
+            logger.clear()
+            csv_writer = csv.writer(csv_file)
+            self.setup(logger, csv_writer)
+            yield logger, csv_writer
 
-                    ontologies = {
-                        OWLSyntax.FUNCTIONAL: func_ontology,
-                        OWLSyntax.RDFXML: xml_ontology
-                    }
+    def bind_reasoners(self) -> None:
+        """Binds the reasoners, which may be shared by several tests, to this test.
 
-                    size_str = ' | '.join(['{}: {}'.format(o.syntax, o.readable_size) for o in ontologies.values()])
+        Execution options are always reset, so that those set by other tests sharing the reasoners do not apply.
+        """
+        # Only the output lines needed to parse results are kept in memory:
+        # the full output of the last run of each reasoner is spilled to the temp dir.
+        for reasoner in self._reasoners:
+            reasoner.spill_dir = self.temp_dir
+            reasoner.use_daemon = False
+            reasoner.cgroups = None
 
-                    logger.log('{}'.format(onto_name), color=echo.Color.YELLOW, endl=False)
-                    logger.log(' ({})'.format(size_str))
-                    logger.indent_level += 1
+    def run_dataset(self, entries: List[Tuple[str, Dict[str, OWLOntology]]], logger: Logger, csv_writer: csv.writer):
+        """Runs the test over the ontologies of a dataset."""
+        self.bind_reasoners()
 
-                    try:
-                        self.run(onto_name, ontologies, logger, csv_writer)
-                    except Exception as e:
-                        if DEBUG:
-                            raise e
-                        else:
-                            echo.error(str(e))
-                    finally:
-                        logger.indent_level -= 1
+        for onto_name, ontologies in entries:
+            self.log_ontology(onto_name, ontologies, logger)
+            logger.indent_level += 1
 
-                logger.log('')
+            try:
+                self.run(onto_name, ontologies, logger, csv_writer)
+            except Exception as e:
+                if DEBUG:
+                    raise e
+                else:
+                    echo.error(str(e))
+            finally:
+                logger.indent_level -= 1
+
+    def log_ontology(self, onto_name: str, ontologies: Dict[str, OWLOntology], logger: Logger):
+        """Logs the name and size of the ontology which is about to be tested."""
+        size_str = ' | '.join(['{}: {}'.format(o.syntax, o.readable_size) for o in ontologies.values()])
+
+        logger.log('{}'.format(onto_name), color=echo.Color.YELLOW, endl=False)
+        logger.log(' ({})'.format(size_str))
 
 
 # noinspection PyTypeChecker
@@ -159,83 +194,645 @@ class StandardPerformanceTest(Test):
     def result_fields(self) -> List[str]:
         pass
 
+    @property
+    def total_fields(self) -> int:
+        """Number of leading result fields whose values add up to the total of a run."""
+        return stats.total_fields(self.result_fields, HarnessStats.FIELDS)
+
+    @property
+    @abstractmethod
+    def task(self) -> str:
+        """The reasoning task measured by the test."""
+        pass
+
+    @property
+    @abstractmethod
+    def mode(self) -> str:
+        """The test mode."""
+        pass
+
     @abstractmethod
-    def run_reasoner(self, reasoner: OWLReasoner, ontology: OWLOntology, logger: Logger) -> List[str]:
+    def run_reasoner(self, reasoner: OWLReasoner, ontology: OWLOntology, logger: Logger, timeout: float) -> List[str]:
         """Called every run, for each reasoner and each ontology.
 
+        :param timeout : Timeout for the run, in seconds.
         :return : Values for the CSV result fields.
         """
         pass
 
+    @cached_property
+    def timeouts_path(self) -> str:
+        return path.join(self.work_dir, 'timeouts.csv')
+
+    @cached_property
+    def interference_path(self) -> str:
+        return path.join(self.work_dir, 'interference.csv')
+
+    @cached_property
+    def samples_dir(self) -> str:
+        return path.join(self.work_dir, 'samples')
+
     def __init__(self,
                  datasets: Optional[List[str]] = None,
                  reasoners: Optional[List[str]] = None,
                  all_syntaxes: bool = False,
-                 iterations: int = 1):
+                 iterations: int = 1,
+                 jobs: int = 1,
+                 warm_jvm: bool = False,
+                 cache: bool = False,
+                 warmup: int = 0,
+                 target_ci: Optional[float] = None,
+                 max_iterations: Optional[int] = None,
+                 timeouts: Optional[List[float]] = None,
+                 relative_timeout: Optional[float] = None,
+                 sample_rate: Optional[float] = None,
+                 cgroups: Optional[CGroupBackend] = None,
+                 store: bool = False,
+                 vm_profiles: Optional[List[Tuple[str, List[str]]]] = None,
+                 ontology_filter: Optional[OntologyFilter] = None,
+                 order: str = Order.NAME):
         """
         :param datasets : If specified, limit the tests to the specified datasets.
         :param reasoners : If specified, limit the tests to the specified reasoners.
         :param all_syntaxes : If true, the test is run on all supported syntaxes.
         :param iterations : Number of iterations per ontology.
+        :param jobs : Number of reasoner runs to execute in parallel.
+        :param warm_jvm : If true, Java reasoners run in long-lived JVM daemons.
+        :param cache : If true, results are retrieved from and stored in the persistent results cache.
+        :param warmup : Number of discarded warm-up runs for each reasoner and ontology.
+        :param target_ci : If specified, iterations continue until the relative confidence interval
+                           of the median falls below this value, overriding 'iterations'.
+        :param max_iterations : Maximum number of iterations if 'target_ci' is specified.
+        :param timeouts : Increasing timeouts of each pass over the dataset, in seconds.
+                          Defaults to the configured timeout for the reasoning task.
+        :param relative_timeout : If specified, the timeouts of later passes are capped to this multiple
+                                  of the time taken by the fastest reasoner on each ontology.
+        :param sample_rate : If specified, the memory and I/O usage of each reasoner run is sampled
+                             at this rate (in Hz), and stored in the 'samples' directory.
+        :param cgroups : If specified, each reasoner run happens in its own transient cgroup,
+                         which provides peak memory and resource limits.
+        :param store : If true, results are also stored in the SQLite results store.
+        :param vm_profiles : If specified, Java reasoners are run once for each of these (name, VM options)
+                             profiles, each with its own result columns.
+        :param ontology_filter : If specified, limit the tests to the ontologies it selects.
+        :param order : Order of the ontologies of each dataset, one of the values of the Order namespace.
+                       Except for 'name', ontologies are ordered by estimated cost.
+                       'lpt' packs the reasoner runs over the parallel jobs, and requires more than one.
         """
-        Test.__init__(self, datasets, reasoners, all_syntaxes)
+        Test.__init__(self, datasets, reasoners, all_syntaxes, ontology_filter)
         self.iterations = iterations
+        self.jobs = jobs
+        self.warm_jvm = warm_jvm
+        self.cache = ResultCache(Paths.CACHE_DIR) if cache else None
+        self.policy = build_iteration_policy(iterations, warmup, target_ci, max_iterations)
+        self.timeouts = TimeoutPolicy(timeouts if timeouts else [Reasoners.timeout(self.task)], relative_timeout)
+        self.sample_rate = sample_rate
+        self.order = order
+        self.store = ResultStore(Paths.RESULTS_DB) if store else None
+        self._store_columns = []
+        self._deferred = []  # type: List[_OntologyResults]
+
+        if vm_profiles:
+            names = [name for name, _ in vm_profiles]
+            duplicates = sorted(set(n for n in names if names.count(n) > 1))
+
+            if duplicates:
+                raise ValueError('Duplicate VM profiles: {}'.format(', '.join(duplicates)))
+
+            self._reasoners = [p for r in self._reasoners
+                               for p in ([VMProfileReasoner(r, name, opts) for name, opts in vm_profiles]
+                                         if r.is_java else [r])]
+
+        if order not in Order.ALL:
+            raise ValueError('No such order: {}'.format(order))
+
+        if order == Order.LPT and jobs == 1:
+            raise ValueError('Longest-processing-time packing requires parallel jobs.')
+
+        if sample_rate and not ResourceSampler.is_supported():
+            raise ValueError('Resource sampling is not available on this platform.')
+
+        if jobs > 1 and (self.policy.is_adaptive or warmup):
+            raise ValueError('Adaptive iterations and warm-up runs cannot be used with parallel jobs.')
+
+        if warm_jvm:
+            if self.mode != TestMode.TIME:
+                raise ValueError('JVM daemons can only be used in {} mode.'.format(TestMode.TIME))
+
+            if jobs > 1:
+                raise ValueError('JVM daemons cannot be used with parallel jobs.')
+
+        self.cgroups = cgroups
 
     def setup(self, logger, csv_writer):
-        del logger  # Unused
+        for reasoner in [r for r in self._reasoners if self._is_warm(r)]:
+            try:
+                reasoner.check_daemon(Reasoners.JVM_DAEMON_CHECK_TIMEOUT)
+            except DaemonError as e:
+                raise ValueError('JVM daemons cannot be used: {}'.format(e))
+
         csv_header = ['Ontology']
 
         for reasoner in self._reasoners:
-            for syntax in reasoner.supported_syntaxes if self._all_syntaxes else [reasoner.preferred_syntax]:
-                for field in self.result_fields:
+            for syntax in self._syntaxes(reasoner):
+                for field in self._fields(reasoner):
                     csv_header.append('{} {} {}'.format(reasoner.name, syntax, field))
 
         csv_writer.writerow(csv_header)
 
+        if self.store:
+            self._store_columns = parse_header(csv_header)
+            self.store.open()
+            self.store.add_run(path.basename(self.work_dir), self.name, time.strftime('%Y-%m-%d %H:%M:%S'))
+
+        with open(self.summary_path, mode='w') as summary_file:
+            csv.writer(summary_file).writerow(['Ontology', 'Reasoner', 'Syntax', 'Field'] + stats.summary_header())
+
+        with open(self.timeouts_path, mode='w') as timeouts_file:
+            csv.writer(timeouts_file).writerow(['Ontology', 'Reasoner', 'Syntax', 'Iteration',
+                                                'Pass', 'Timeout', 'Result'])
+
+        with open(self.interference_path, mode='w') as interference_file:
+            csv.writer(interference_file).writerow(['Ontology', 'Reasoner', 'Syntax', 'Iteration', 'Processes'])
+
+        if self.sample_rate:
+            fileutils.create_dir(self.samples_dir)
+
+        profiled = [r for r in self._reasoners if isinstance(r, VMProfileReasoner)]
+
+        if profiled:
+            logger.log('VM options:')
+            logger.indent_level += 1
+
+            for reasoner in profiled:
+                logger.log('- {}: {}'.format(reasoner.name, ' '.join(reasoner.vm_opts)))
+
+            logger.indent_level -= 1
+            logger.log('')
+
+        if self.mode == TestMode.COMBINED:
+            overhead = measurement_overhead()
+
+            if overhead is not None:
+                logger.log('Memory measurement overhead: {:.2f} ms per run\n'.format(overhead * 1000.0))
+
+    def bind_reasoners(self):
+        Test.bind_reasoners(self)
+
+        for reasoner in self._reasoners:
+            reasoner.use_daemon = self._is_warm(reasoner)
+            reasoner.cgroups = None if reasoner.is_mobile else self.cgroups
+
+    def run_dataset(self, entries, logger, csv_writer):
+        self.bind_reasoners()
+        self._deferred = []
+        entries, estimates = self._order(entries, logger)
+
+        if self.jobs > 1:
+            self._run_dataset_parallel(entries, logger, csv_writer, estimates)
+        else:
+            Test.run_dataset(self, entries, logger, csv_writer)
+
+        self._run_timeout_passes(logger, csv_writer)
+
     def run(self, onto_name, ontologies, logger, csv_writer):
+        results = _OntologyResults(onto_name, ontologies, self.total_fields)
+        self._run_iterations(results, self._job_runner(ontologies), logger)
+        self._complete(results, csv_writer)
+
+    def samples_path(self, reasoner: OWLReasoner, ontology: OWLOntology, iteration: int) -> str:
+        """Path of the resource usage samples of a reasoner run."""
+        run = 'cold' if iteration == _Iteration.COLD else iteration + 1
+        file_name = '{}_{}_{}_{}.bin'.format(path.splitext(ontology.name)[0], reasoner.name, ontology.syntax, run)
+        return path.join(self.samples_dir, re.sub(r'[^\w.+-]', '_', file_name))
+
+    # Private
+
+    def _order(self,
+               entries: List[Tuple[str, Dict[str, OWLOntology]]],
+               logger: Logger) -> Tuple[List[Tuple[str, Dict[str, OWLOntology]]], Dict[Tuple[str, str], float]]:
+        """Orders the ontologies of a dataset by estimated cost, logging the order and the estimates.
+
+        :return : Ordered entries, and estimated cost of the jobs of each reasoner and ontology, in milliseconds.
+        """
+        if self.order == Order.NAME or len(entries) < 2:
+            return entries, {}
+
+        dataset = ontology_dataset(next(iter(entries[0][1].values())))
+        model = CostModel.from_store(Paths.RESULTS_DB, self.task, self.timeouts.limit(0), dataset)
+        estimates = model.estimates([r.name for r in self._reasoners], entries)
+        costs = {}
+        jobs = {}
+
+        for reasoner in self._reasoners:
+            runs = len(self._syntaxes(reasoner)) * self.iterations
+
+            for onto_name, _ in entries:
+                cost = estimates[(reasoner.name, onto_name)][0] * runs
+                jobs[(reasoner.name, onto_name)] = cost / runs
+                costs[onto_name] = costs.get(onto_name, 0.0) + cost
+
+        known = len([e for e in estimates.values() if e[1]])
+        entries = order_entries(entries, costs, self.order)
+
+        logger.log('Order: {} ({} of {} estimates from previous results)'.format(self.order, known, len(estimates)),
+                   color=echo.Color.GREEN)
+        logger.indent_level += 1
+
+        for onto_name, _ in entries:
+            logger.log('- {}: {:.0f} ms'.format(onto_name, costs[onto_name]))
+
+        logger.indent_level -= 1
+        logger.log('')
+
+        return entries, jobs
+
+    def _syntaxes(self, reasoner: OWLReasoner) -> List[str]:
+        return reasoner.supported_syntaxes if self._all_syntaxes else [reasoner.preferred_syntax]
+
+    def _is_warm(self, reasoner: OWLReasoner) -> bool:
+        return self.warm_jvm and reasoner.supports_daemon
+
+    def _fields(self, reasoner: OWLReasoner) -> List[str]:
+        """CSV result fields for the specified reasoner.
+
+        Reasoners running in a JVM daemon also report the cold (first job) results for each ontology.
+        """
+        if self._is_warm(reasoner):
+            return ['cold {}'.format(f) for f in self.result_fields] + self.result_fields
+        return self.result_fields
+
+    @cached_property
+    def _columns(self) -> Dict[Tuple[str, str], int]:
+        """Index of the first CSV column of the results of each reasoner and syntax, excluding cold results."""
+        columns = {}
+        idx = 1
+
+        for reasoner in self._reasoners:
+            for syntax in self._syntaxes(reasoner):
+                idx += len(self._fields(reasoner)) - len(self.result_fields)
+                columns[(reasoner.name, syntax)] = idx
+                idx += len(self.result_fields)
+
+        return columns
+
+    @cached_property
+    def _builds(self) -> Dict[str, str]:
+        """Hashes of the reasoner executables, keyed by reasoner name."""
+        return {r.name: file_hash(r.path) if path.isfile(r.path) else '' for r in self._reasoners}
+
+    def _new_row(self, onto_name: str) -> List:
+        return [onto_name] + [''] * sum(len(self._fields(r)) for r in self._reasoners for _ in self._syntaxes(r))
+
+    def _set_cells(self, row: List, cell: Tuple[str, str], values: List, cold: bool = False) -> None:
+        start = self._columns[cell] - (len(self.result_fields) if cold else 0)
+        row[start:start + len(self.result_fields)] = values
+
+    def _job_runner(self, ontologies: Dict[str, OWLOntology]) -> Callable:
+        """Returns a function which runs a reasoner job in the current process.
+
+        The function is called with the reasoner, syntax, iteration, logger and timeout,
+        and returns a (status, values, logger, elapsed, strays) tuple.
+        """
+        def run_job(reasoner: OWLReasoner,
+                    syntax: str,
+                    iteration: int,
+                    job_logger: Logger,
+                    timeout: float) -> Tuple[str, List, Logger, Optional[float], List[str]]:
+            return _run_reasoner_job(self, reasoner, ontologies[syntax], iteration, timeout, job_logger)
+
+        return run_job
+
+    def _run_cold(self,
+                  results: '_OntologyResults',
+                  run_job: Callable,
+                  logger: Logger,
+                  fail: Dict[str, List[str]]) -> Dict:
+        """Runs the first job on an ontology for each reasoner in a fresh JVM daemon, followed by warm-up jobs.
+
+        :return : Cold results, keyed by reasoner name and syntax.
+        """
+        cold = {}
+        warm_reasoners = [r for r in self._reasoners if self._is_warm(r)]
+        timeout = self.timeouts.limit(0)
+
+        if not warm_reasoners:
+            return cold
+
+        logger.log('Cold run:', color=echo.Color.YELLOW)
+        logger.indent_level += 1
+
+        for reasoner in warm_reasoners:
+            logger.log('- {}:'.format(reasoner.name))
+            logger.indent_level += 1
+
+            for syntax in self._syntaxes(reasoner):
+                # The daemon is restarted, so that the cold job does not run in a JVM warmed up by previous jobs.
+                reasoner.stop_daemon()
+                status, values, _, _, strays = run_job(reasoner, syntax, _Iteration.COLD, logger, timeout)
+                results.add_interference(reasoner.name, syntax, 'cold', strays)
+
+                if status == _JobStatus.OK:
+                    cold[(reasoner.name, syntax)] = values
+
+                    for _ in range(Reasoners.JVM_WARMUP_JOBS):
+                        run_job(reasoner, syntax, _Iteration.WARMUP, LogRecorder(), timeout)
+                else:
+                    cold[(reasoner.name, syntax)] = [status] * len(self.result_fields)
+                    logger.log('{}: {}'.format(syntax, status))
+                    fail[syntax].append(reasoner.name)
+
+            logger.indent_level -= 1
+
+        logger.indent_level -= 1
+        logger.log('')
+
+        return cold
+
+    def _run_warmup(self, run_job: Callable, logger: Logger, fail: Dict[str, List[str]]) -> None:
+        """Runs the discarded warm-up jobs on an ontology."""
+        if not self.policy.warmup:
+            return
+
+        logger.log('Warm-up ({} runs)'.format(self.policy.warmup), color=echo.Color.YELLOW)
+        timeout = self.timeouts.limit(0)
+
+        for reasoner in self._reasoners:
+            for syntax in self._syntaxes(reasoner):
+                if reasoner.name not in fail[syntax]:
+                    for _ in range(self.policy.warmup):
+                        run_job(reasoner, syntax, _Iteration.WARMUP, LogRecorder(), timeout)
+
+        logger.log('')
+
+    def _run_job(self,
+                 results: '_OntologyResults',
+                 run_job: Callable,
+                 reasoner: OWLReasoner,
+                 syntax: str,
+                 iteration: int,
+                 pass_idx: int,
+                 logger: Logger) -> str:
+        """Runs a job and stores its results, returning its status."""
+        cell = (reasoner.name, syntax)
+        timeout = self.timeouts.limit(pass_idx, results.best_time)
+        status, values, job_logger, elapsed, strays = run_job(reasoner, syntax, iteration, logger, timeout)
+
+        if isinstance(job_logger, LogRecorder):
+            job_logger.replay(logger)
+
+        results.add_interference(reasoner.name, syntax, iteration + 1, strays)
+
+        if status == _JobStatus.OK:
+            self._set_cells(results.rows[iteration], cell, values)
+            results.samples.setdefault(cell, []).append(values)
+
+            if elapsed is not None and (results.best_time is None or elapsed < results.best_time):
+                results.best_time = elapsed
+        else:
+            self._set_cells(results.rows[iteration], cell, [status] * len(self.result_fields))
+            logger.log('{}: {}'.format(syntax, status))
+
+        if status == _JobStatus.TIMEOUT:
+            results.timed_out[cell] = iteration
+
+        results.limits[cell] = timeout
 
+        if pass_idx > 0 or status == _JobStatus.TIMEOUT:
+            results.provenance.append([results.onto_name, reasoner.name, syntax, iteration + 1,
+                                       pass_idx + 1, timeout, status])
+
+        return status
+
+    def _run_iterations(self, results: '_OntologyResults', run_job: Callable, logger: Logger) -> None:
+        """Runs all the iterations on an ontology with the first timeout.
+
+        Cells which do not need more iterations according to the iteration policy are left empty.
+
+        :param run_job : Called for each job with the reasoner, syntax, iteration, logger and timeout.
+                         Must return a (status, values, logger, elapsed, strays) tuple.
+        """
         fail = {syntax: [] for syntax in OWLSyntax.ALL}
+        cold = self._run_cold(results, run_job, logger, fail)
+        self._run_warmup(run_job, logger, fail)
+
+        for iteration in range(self.policy.max_iterations):
+            pending = [(r.name, s) for r in self._reasoners for s in self._syntaxes(r)
+                       if r.name not in fail[s] and self.policy.needs_more(results.totals((r.name, s)))]
+
+            if iteration >= self.policy.min_iterations and not pending:
+                break
 
-        for iteration in range(self.iterations):
             logger.log('Run {}:'.format(iteration + 1), color=echo.Color.YELLOW)
             logger.indent_level += 1
 
-            csv_row = [onto_name]
+            results.rows.append(self._new_row(results.onto_name))
 
             for reasoner in self._reasoners:
                 logger.log('- {}:'.format(reasoner.name))
                 logger.indent_level += 1
 
-                syntaxes = reasoner.supported_syntaxes if self._all_syntaxes else [reasoner.preferred_syntax]
+                for syntax in self._syntaxes(reasoner):
+                    cell = (reasoner.name, syntax)
+
+                    if cell in cold:
+                        self._set_cells(results.rows[iteration], cell, cold[cell], cold=True)
 
-                for syntax in syntaxes:
                     # Skip already failed or timed out.
                     if reasoner.name in fail[syntax]:
-                        csv_row.extend(['skip'] * len(self.result_fields))
+                        self._set_cells(results.rows[iteration], cell, ['skip'] * len(self.result_fields))
                         logger.log('{}: skip'.format(syntax))
                         continue
 
-                    ontology = ontologies[syntax]
-
-                    try:
-                        csv_row.extend(self.run_reasoner(reasoner, ontology, logger))
-                    except TimeoutExpired:
-                        csv_row.extend(['timeout'] * len(self.result_fields))
-                        logger.log('{}: timeout'.format(syntax))
-                        fail[syntax].append(reasoner.name)
-                    except Exception as e:
-                        if DEBUG:
-                            raise e
+                    if cell not in pending:
+                        logger.log('{}: done'.format(syntax))
+                        continue
 
-                        csv_row.extend(['error'] * len(self.result_fields))
-                        logger.log('{}: error'.format(syntax))
+                    if self._run_job(results, run_job, reasoner, syntax, iteration, 0, logger) != _JobStatus.OK:
                         fail[syntax].append(reasoner.name)
 
                 logger.indent_level -= 1
 
             logger.indent_level -= 1
             logger.log('')
-            csv_writer.writerow(csv_row)
+
+    def _rerun_timeouts(self, results: '_OntologyResults', pass_idx: int, logger: Logger) -> None:
+        """Re-runs the iterations which timed out on an ontology, with the timeout of the specified pass.
+
+        Iterations are resumed from the first one that timed out.
+        """
+        run_job = self._job_runner(results.ontologies)
+
+        for reasoner in self._reasoners:
+            for syntax in self._syntaxes(reasoner):
+                cell = (reasoner.name, syntax)
+                first = results.timed_out.pop(cell, None)
+
+                if first is None:
+                    continue
+
+                timeout = self.timeouts.limit(pass_idx, results.best_time)
+
+                # Timeout capped at or below the previous one.
+                if timeout <= results.limits[cell]:
+                    logger.log('- {} {}: capped at {:.1f}s'.format(reasoner.name, syntax, results.limits[cell]))
+                    continue
+
+                logger.log('- {} {} ({:.1f}s timeout):'.format(reasoner.name, syntax, timeout))
+                logger.indent_level += 1
+
+                for iteration in range(first, len(results.rows)):
+                    if iteration >= self.policy.min_iterations and not self.policy.needs_more(results.totals(cell)):
+                        self._set_cells(results.rows[iteration], cell, [''] * len(self.result_fields))
+                        continue
+
+                    if self._run_job(results, run_job, reasoner, syntax, iteration, pass_idx, logger) != _JobStatus.OK:
+                        break
+
+                logger.indent_level -= 1
+
+    def _run_timeout_passes(self, logger: Logger, csv_writer: csv.writer) -> None:
+        """Re-runs the jobs which timed out in the first pass over a dataset, with increasing timeouts."""
+        for pass_idx in range(1, self.timeouts.passes):
+            deferred = [r for r in self._deferred if r.timed_out]
+
+            if not deferred:
+                break
+
+            logger.log('Pass {} ({:.1f}s timeout)'.format(pass_idx + 1, self.timeouts.limit(pass_idx)),
+                       color=echo.Color.GREEN)
+            logger.log('')
+
+            for results in deferred:
+                self.log_ontology(results.onto_name, results.ontologies, logger)
+                logger.indent_level += 1
+
+                try:
+                    self._rerun_timeouts(results, pass_idx, logger)
+                except Exception as e:
+                    if DEBUG:
+                        raise e
+                    else:
+                        echo.error(str(e))
+                finally:
+                    logger.indent_level -= 1
+                    logger.log('')
+
+        for results in self._deferred:
+            self._write_results(results, csv_writer)
+
+        self._deferred = []
+
+    def _complete(self, results: '_OntologyResults', csv_writer: csv.writer) -> None:
+        """Writes the results of an ontology, unless they must be deferred to later timeout passes."""
+        if results.timed_out and self.timeouts.passes > 1:
+            self._deferred.append(results)
+        else:
+            self._write_results(results, csv_writer)
+
+    def _write_results(self, results: '_OntologyResults', csv_writer: csv.writer) -> None:
+        """Writes the results, summary statistics, timeout provenance and interference of an ontology."""
+        csv_writer.writerows(results.rows)
+
+        if self.store:
+            dataset = ontology_dataset(next(iter(results.ontologies.values())))
+            self.store.insert(row_measurements(self._store_columns, results.rows, path.basename(self.work_dir),
+                                               self.task, self.mode, self._builds, dataset))
+
+        with open(self.summary_path, mode='a') as summary_file:
+            summary_writer = csv.writer(summary_file)
+
+            for (reasoner_name, syntax), runs in results.samples.items():
+                for idx, field in enumerate(self.result_fields):
+                    values = [float(run[idx]) for run in runs]
+                    summary_writer.writerow([results.onto_name, reasoner_name, syntax, field] +
+                                            stats.summary_row(stats.summarize(values)))
+
+        if results.provenance:
+            with open(self.timeouts_path, mode='a') as timeouts_file:
+                csv.writer(timeouts_file).writerows(results.provenance)
+
+        if results.interference:
+            with open(self.interference_path, mode='a') as interference_file:
+                csv.writer(interference_file).writerows(results.interference)
+
+    def _run_dataset_parallel(self, entries, logger, csv_writer, estimates: Dict[Tuple[str, str], float]) -> None:
+        """Runs all the reasoner jobs of a dataset in a pool of pinned worker processes.
+
+        Results are collected and written in the same order as a sequential run.
+
+        :param estimates : Estimated cost of the jobs of each reasoner and ontology, used for LPT packing.
+        """
+        with Scheduler(self.jobs) as scheduler:
+            if scheduler.slots:
+                logger.log('CPU slots: {}'.format(' | '.join(','.join(str(c) for c in s) for s in scheduler.slots)))
+            else:
+                logger.log('CPU pinning not available on this platform.', color=echo.Color.RED)
+
+            futures = self._submit_jobs(scheduler, entries, estimates)
+            batches = [(onto_name, ontologies, futures[onto_name]) for onto_name, ontologies in entries]
+
+            for onto_name, ontologies, onto_futures in batches:
+                self.log_ontology(onto_name, ontologies, logger)
+                logger.indent_level += 1
+
+                def run_job(reasoner: OWLReasoner,
+                            syntax: str,
+                            *_) -> Tuple[str, List, Logger, Optional[float], List[str]]:
+                    future = onto_futures[(reasoner.name, syntax)].pop(0)
+
+                    try:
+                        return future.result()
+                    except CancelledError:
+                        return _JobStatus.SKIP, [], LogRecorder(), None, []
+
+                try:
+                    results = _OntologyResults(onto_name, ontologies, self.total_fields)
+                    self._run_iterations(results, run_job, logger)
+                    self._complete(results, csv_writer)
+                except Exception as e:
+                    if DEBUG:
+                        raise e
+                    else:
+                        echo.error(str(e))
+                finally:
+                    logger.indent_level -= 1
+
+    def _submit_jobs(self,
+                     scheduler: Scheduler,
+                     entries: List[Tuple[str, Dict[str, OWLOntology]]],
+                     estimates: Dict[Tuple[str, str], float]) -> Dict[str, Dict[Tuple, List]]:
+        """Submits all the iterations of each reasoner on the given ontologies, with the first timeout.
+
+        Later iterations are cancelled as soon as one of them fails or times out,
+        mirroring the sequential behavior. With LPT packing, the costliest jobs are submitted first,
+        so that the cheapest ones fill the workers at the end of the dataset.
+
+        :return : Futures of each ontology, by reasoner name and syntax.
+        """
+        jobs = [(onto_name, ontologies, reasoner, syntax, iteration)
+                for onto_name, ontologies in entries
+                for iteration in range(self.iterations)
+                for reasoner in self._reasoners
+                for syntax in self._syntaxes(reasoner)]
+
+        if self.order == Order.LPT and estimates:
+            # Sorting is stable, so the iterations of each reasoner stay in order.
+            jobs.sort(key=lambda j: -estimates[(j[2].name, j[0])])
+
+        futures = dict((onto_name, {}) for onto_name, _ in entries)
+        timeout = self.timeouts.limit(0)
+
+        for onto_name, ontologies, reasoner, syntax, iteration in jobs:
+            future = scheduler.submit(_run_reasoner_job, self, reasoner, ontologies[syntax], iteration, timeout)
+            futures[onto_name].setdefault((reasoner.name, syntax), []).append(future)
+
+        for onto_futures in futures.values():
+            for cell_futures in onto_futures.values():
+                for idx, future in enumerate(cell_futures):
+                    cancel_on_failure(future, cell_futures[idx + 1:], lambda result: result[0] == _JobStatus.OK)
+
+        return futures
 
 
 class NotImplementedTest(Test):
@@ -256,3 +853,175 @@ class NotImplementedTest(Test):
     def run(self, onto_name, ontologies, logger, csv_writer):
         del onto_name, ontologies, logger, csv_writer  # Unused
         pass
+
+
+def dataset_dirs(datasets: Optional[List[str]] = None) -> List[str]:
+    """Returns the directories of the specified datasets, or of all the datasets if none is specified."""
+    data_dir = Paths.DATA_DIR
+
+    if datasets:
+        return [path.join(data_dir, d) for d in datasets]
+
+    dirs = [path.join(data_dir, d) for d in sorted(listdir(data_dir))]
+    return [d for d in dirs if path.isdir(d)]
+
+
+def dataset_entries(dataset: str,
+                    ontology_filter: Optional[OntologyFilter] = None) -> List[Tuple[str, Dict[str, OWLOntology]]]:
+    """Returns the ontologies of a dataset directory by name, each with its files by syntax.
+
+    Ontologies are read from the manifest of the dataset, which is refreshed first.
+    Those which are not available in every syntax are skipped.
+    """
+    manifest = DatasetManifest(dataset)
+    manifest.refresh()
+
+    for onto_name, syntaxes in manifest.unpaired.items():
+        echo.pretty('Skipping {}: no {} file.'.format(onto_name, ', '.join(syntaxes)), color=echo.Color.YELLOW)
+
+    entries = manifest.entries()
+
+    if ontology_filter:
+        entries = [e for e in entries if ontology_filter.matches(*e)]
+
+    return entries
+
+
+def ontology_dataset(ontology: OWLOntology) -> str:
+    """Returns the name of the dataset of an ontology, whose files are stored by syntax in the dataset directory."""
+    return path.basename(path.dirname(path.dirname(ontology.path)))
+
+
+def build_iteration_policy(iterations: int,
+                           warmup: int = 0,
+                           target_ci: Optional[float] = None,
+                           max_iterations: Optional[int] = None) -> IterationPolicy:
+    """Builds the iteration policy for a performance test.
+
+    :param iterations : Number of iterations, if the policy is not adaptive.
+    :param warmup : Number of discarded warm-up runs.
+    :param target_ci : If specified, target relative confidence interval of the median.
+    :param max_iterations : Maximum number of iterations if 'target_ci' is specified.
+    """
+    if target_ci:
+        return IterationPolicy(min_iterations=Reasoners.MIN_ITERATIONS,
+                               max_iterations=max_iterations if max_iterations else Reasoners.MAX_ITERATIONS,
+                               warmup=warmup,
+                               target_ci=target_ci)
+
+    return IterationPolicy(min_iterations=iterations, warmup=warmup)
+
+
+# Private
+
+
+class _JobStatus:
+    """Reasoner job status namespace."""
+    OK = 'ok'
+    TIMEOUT = 'timeout'
+    ERROR = 'error'
+    SKIP = 'skip'
+
+
+class _Iteration:
+    """Special iteration indexes namespace."""
+    COLD = -1
+    WARMUP = -2
+
+
+class _OntologyResults:
+    """Results of all the iterations on an ontology."""
+
+    def __init__(self, onto_name: str, ontologies: Dict[str, OWLOntology], total_fields: int):
+        """
+        :param total_fields : Number of leading result fields whose values add up to the total of a run.
+        """
+        self.onto_name = onto_name
+        self.ontologies = ontologies
+        self.total_fields = total_fields
+        self.rows = []  # type: List[List]
+        self.samples = {}  # type: Dict[Tuple[str, str], List[List]]
+        self.timed_out = {}  # type: Dict[Tuple[str, str], int]
+        self.limits = {}  # type: Dict[Tuple[str, str], float]
+        self.provenance = []  # type: List[List]
+        self.interference = []  # type: List[List]
+        self.best_time = None  # type: Optional[float]
+
+    def totals(self, cell: Tuple[str, str]) -> List[float]:
+        return stats.totals(self.samples.get(cell, []), self.total_fields)
+
+    def add_interference(self, reasoner_name: str, syntax: str, iteration, strays: List[str]) -> None:
+        if strays:
+            self.interference.append([self.onto_name, reasoner_name, syntax, iteration, ' | '.join(strays)])
+
+
+def _run_reasoner_job(test: StandardPerformanceTest,
+                      reasoner: OWLReasoner,
+                      ontology: OWLOntology,
+                      iteration: int,
+                      timeout: float,
+                      logger: Optional[Logger] = None) -> Tuple[str, List, Logger, Optional[float], List[str]]:
+    """Runs a single reasoner job, returning its status, result values, logger, elapsed time
+    and the stray processes killed before the run.
+
+    If no logger is specified, messages are recorded so that they can be replayed by the parent process.
+    """
+    if logger is None:
+        logger = LogRecorder()
+
+    cache_key = None
+
+    if test.cache and not reasoner.is_mobile and iteration != _Iteration.WARMUP:
+        # Resource limits may change the outcome of a run.
+        extra = {'limits': [reasoner.cgroups.memory_max, reasoner.cgroups.cpu_max]} if reasoner.cgroups else {}
+        cache_key = test.cache.key(reasoner, ontology, test.task, test.mode, iteration,
+                                   fields=test.result_fields, daemon=reasoner.use_daemon, **extra)
+        entry = test.cache.get(cache_key)
+
+        if entry and (entry['status'] == _JobStatus.OK or
+                      entry['status'] == _JobStatus.TIMEOUT and entry.get('timeout', 0.0) >= timeout):
+            if entry['status'] == _JobStatus.OK:
+                logger.log('{}: cached'.format(ontology.syntax))
+            return entry['status'], entry['values'], logger, entry.get('elapsed'), []
+
+    # Processes left behind by previous runs would compete with the measured run for resources.
+    strays = []
+
+    if iteration != _Iteration.WARMUP:
+        strays = watchdog.reap_strays()
+
+        if strays:
+            logger.log('Killed stray processes: {}'.format(', '.join(strays)), color=echo.Color.RED)
+
+    # Jobs run by JVM daemons cannot be told apart from the daemon itself, so they are not sampled.
+    sampler = None
+
+    if test.sample_rate and not reasoner.is_mobile and not reasoner.use_daemon and iteration != _Iteration.WARMUP:
+        sampler = ResourceSampler(test.sample_rate)
+        sampler.start()
+
+    start = time.monotonic()
+
+    try:
+        status, values = _JobStatus.OK, test.run_reasoner(reasoner, ontology, logger, timeout)
+    except TimeoutExpired:
+        status, values = _JobStatus.TIMEOUT, []
+    except Exception as e:
+        if DEBUG:
+            raise e
+        status, values = _JobStatus.ERROR, []
+    finally:
+        if sampler:
+            sampler.stop()
+
+    elapsed = time.monotonic() - start
+
+    if sampler:
+        sampler.save(test.samples_path(reasoner, ontology, iteration))
+
+    # Errors may be caused by the environment, so they are never cached.
+    if cache_key and status != _JobStatus.ERROR:
+        test.cache.set(cache_key, status, values, timeout=timeout, elapsed=elapsed,
+                       reasoner=reasoner.name, ontology=ontology.name)
+
+    return status, values, logger, elapsed, strays
@@ -0,0 +1,40 @@
+from typing import List, Optional
+
+
+class TimeoutPolicy:
+    """Timeout policy for performance tests.
+
+    The first pass over a dataset uses the first (shortest) timeout. Each further pass
+    re-runs the jobs which timed out in the previous one, with the next timeout in the sequence.
+    Timeouts of later passes can be capped to a multiple of the time taken by the fastest job
+    on the same ontology, though they never fall below the first timeout.
+    """
+
+    @property
+    def passes(self) -> int:
+        """Number of passes."""
+        return len(self.steps)
+
+    def __init__(self, steps: List[float], relative_cap: Optional[float] = None):
+        """
+        :param steps : Timeouts for each pass, in seconds.
+        :param relative_cap : If specified, cap timeouts to this multiple of the fastest job time.
+        """
+        if not steps:
+            raise ValueError('At least one timeout must be specified.')
+
+        self.steps = sorted(steps)
+        self.relative_cap = relative_cap
+
+    def limit(self, pass_idx: int, best_time: Optional[float] = None) -> float:
+        """Returns the timeout for the specified pass.
+
+        :param pass_idx : Zero-based index of the pass.
+        :param best_time : Time taken by the fastest job on the ontology, in seconds.
+        """
+        limit = self.steps[pass_idx]
+
+        if self.relative_cap and best_time is not None:
+            limit = max(self.steps[0], min(limit, self.relative_cap * best_time))
+
+        return limit
@@ -0,0 +1,75 @@
+import gzip
+import os
+
+import pytest
+
+# The cache depends on the reasoners module, which needs the pyutils submodule.
+pytest.importorskip('src.pyutils')
+
+from src.cache import ConversionStore, ReferenceStore  # noqa: E402
+
+KEY = 'ab' + '0' * 62
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReferenceStore(str(tmp_path / 'store'))
+
+
+@pytest.fixture
+def output(tmp_path):
+    file_path = tmp_path / 'output.txt'
+    file_path.write_bytes(b'SubClassOf(<A> <B>)\n' * 10000)
+    return str(file_path)
+
+
+def test_round_trip(store, output, tmp_path):
+    store.store(KEY, output)
+    retrieved = str(tmp_path / 'retrieved.txt')
+
+    assert store.retrieve(KEY, retrieved)
+
+    with open(output, 'rb') as expected, open(retrieved, 'rb') as actual:
+        assert actual.read() == expected.read()
+
+    # Temporary files are replaced by the entry.
+    assert os.listdir(os.path.join(store.store_dir, KEY[:2])) == [KEY + '.txt.gz']
+
+
+def test_missing_entry(store, tmp_path):
+    retrieved = str(tmp_path / 'retrieved.txt')
+    assert not store.retrieve(KEY, retrieved)
+    assert not os.path.exists(retrieved)
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:len(data) // 2],
+    lambda data: data[:10] + bytes(b ^ 0xFF for b in data[10:]),
+    lambda data: b'not a gzip file'
+])
+def test_corrupt_entry(store, output, tmp_path, corrupt):
+    store.store(KEY, output)
+    entry_path = os.path.join(store.store_dir, KEY[:2], KEY + '.txt.gz')
+
+    with open(entry_path, 'rb') as in_file:
+        data = in_file.read()
+
+    with open(entry_path, 'wb') as out_file:
+        out_file.write(corrupt(data))
+
+    retrieved = str(tmp_path / 'retrieved.txt')
+    assert not store.retrieve(KEY, retrieved)
+    assert not os.path.exists(retrieved)
+
+    # Corrupt entries are overwritten when the output is stored again.
+    store.store(KEY, output)
+    assert store.retrieve(KEY, retrieved)
+
+
+def test_entries_are_gzipped(tmp_path, output):
+    store = ConversionStore(str(tmp_path / 'conversions'))
+    store.store(KEY, output)
+
+    with gzip.open(os.path.join(store.store_dir, KEY[:2], KEY + '.txt.gz'), 'rb') as in_file, \
+            open(output, 'rb') as expected:
+        assert in_file.read() == expected.read()
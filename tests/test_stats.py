@@ -0,0 +1,66 @@
+import pytest
+
+from src.tests import stats
+
+
+@pytest.mark.parametrize('n, low, high', [
+    (1, 0, 0),
+    (5, 0, 4),
+    (6, 0, 5),
+    (10, 1, 8),
+    (20, 5, 14),
+    (50, 17, 32)
+])
+def test_median_ci_indices(n, low, high):
+    # Values are their own indexes, so that the interval bounds are the order statistics used.
+    assert stats.median_ci(list(range(n))) == (low, high)
+
+
+def test_median_ci_sorts_values():
+    assert stats.median_ci([9.0, 1.0, 8.0, 2.0, 7.0, 3.0, 6.0, 4.0, 5.0, 0.0]) == (1.0, 8.0)
+
+
+def test_median_ci_confidence():
+    values = list(range(20))
+    assert stats.median_ci(values, confidence=0.99) == (3, 16)
+    assert stats.median_ci(values, confidence=0.5) == (7, 12)
+
+
+def test_median_and_mad():
+    assert stats.median([3.0, 1.0, 2.0]) == 2.0
+    assert stats.median([4.0, 1.0, 3.0, 2.0]) == 2.5
+    assert stats.mad([1.0, 2.0, 3.0, 4.0, 100.0]) == 1.0
+
+
+def test_summarize_excludes_outliers():
+    summary = stats.summarize([10.0, 11.0, 10.5, 10.2, 10.8, 100.0])
+    assert summary.runs == 6
+    assert summary.outliers == 1
+    assert summary.median == 10.5
+    assert (summary.ci_low, summary.ci_high) == (10.0, 11.0)
+
+
+def test_summarize_constant_values():
+    summary = stats.summarize([5.0] * 4)
+    assert summary.outliers == 0
+    assert summary.relative_ci == 0.0
+
+
+def test_iteration_policy_fixed():
+    policy = stats.IterationPolicy(min_iterations=3)
+    assert not policy.is_adaptive
+    assert policy.needs_more([1.0, 1.0])
+    assert not policy.needs_more([1.0, 1.0, 1.0])
+
+
+def test_iteration_policy_adaptive():
+    policy = stats.IterationPolicy(min_iterations=3, max_iterations=6, target_ci=0.05)
+    assert policy.needs_more([1.0, 2.0, 3.0])
+    assert not policy.needs_more([1.0, 1.0, 1.0])
+    assert not policy.needs_more([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+
+def test_totals():
+    assert stats.total_fields(['parsing', 'classification', 'memory', 'wall time'], ['wall time']) == 2
+    assert stats.total_fields(['memory', 'wall time'], ['wall time']) == 1
+    assert stats.totals([[1.0, 2.0, 'timeout'], [3, 4.0, 5.0]], 2) == [3.0, 7.0]
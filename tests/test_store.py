@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+# The store depends on the reasoners module, which needs the pyutils submodule.
+pytest.importorskip('src.pyutils')
+
+from src.store import ResultStore, Status, parse_cell, parse_header, parse_run_dir, row_measurements  # noqa: E402
+
+HEADER = ['Ontology', 'HermiT functional parsing', 'HermiT functional cold parsing', 'Konclude rdfxml wall time']
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(str(tmp_path / 'results.db')) as result_store:
+        yield result_store
+
+
+def test_parse_header():
+    assert parse_header(HEADER) == [('HermiT', 'functional', 'parsing', False),
+                                    ('HermiT', 'functional', 'parsing', True),
+                                    ('Konclude', 'rdfxml', 'wall time', False)]
+
+    with pytest.raises(ValueError):
+        parse_header(['Ontology', 'HermiT parsing'])
+
+
+def test_parse_cell():
+    assert parse_cell('') is None
+    assert parse_cell('1.5') == (1.5, Status.OK)
+    assert parse_cell(Status.TIMEOUT) == (None, Status.TIMEOUT)
+    assert parse_cell('garbage') == (None, Status.ERROR)
+
+
+def test_parse_run_dir():
+    assert parse_run_dir('/results/classification_time_20240102_030405_abc/') == (
+        'classification_time_20240102_030405_abc', 'classification time', '2024-01-02 03:04:05')
+
+    with pytest.raises(ValueError):
+        parse_run_dir('/results/something_else')
+
+
+def test_row_measurements():
+    rows = [['o.owl', '1', '5', ''], ['o.owl', '2', '6', 'timeout'], []]
+    measurements = list(row_measurements(parse_header(HEADER), rows, 'run', 'classification', 'time',
+                                         {'HermiT': 'h'}, 'd'))
+
+    assert measurements == [
+        ('run', 'HermiT', 'h', 'd', 'o.owl', 'functional', 'classification', 'time', 0, 'parsing', 1.0, Status.OK),
+        ('run', 'HermiT', 'h', 'd', 'o.owl', 'functional', 'classification', 'time', ResultStore.COLD_ITERATION,
+         'parsing', 5.0, Status.OK),
+        ('run', 'HermiT', 'h', 'd', 'o.owl', 'functional', 'classification', 'time', 1, 'parsing', 2.0, Status.OK),
+        ('run', 'Konclude', '', 'd', 'o.owl', 'rdfxml', 'classification', 'time', 1, 'wall time', None,
+         Status.TIMEOUT)
+    ]
+
+
+def test_datasets_do_not_overwrite(store):
+    store.add_run('run', 'classification time')
+
+    for dataset, value in [('a', '1'), ('b', '2')]:
+        store.insert(row_measurements(parse_header(HEADER[:2]), [['o.owl', value]], 'run', 'classification', 'time',
+                                      dataset=dataset))
+
+    assert sorted((m[3], m[10]) for m in store.query(ontology='o.owl')) == [('a', 1.0), ('b', 2.0)]
+    assert len(store.query(dataset=['a'])) == 1
+
+
+def test_add_run_replaces_measurements(store):
+    store.add_run('run', 'classification time')
+    store.insert(row_measurements(parse_header(HEADER[:2]), [['o.owl', '1']], 'run', 'classification', 'time'))
+    store.add_run('run', 'classification time', '2024-01-01 00:00:00')
+
+    assert store.query() == []
+    assert store.runs() == [('run', 'classification time', '2024-01-01 00:00:00')]
+
+
+def test_query_unknown_column(store):
+    with pytest.raises(ValueError):
+        store.query(foo='bar')
+
+
+def test_migration(tmp_path):
+    db_path = str(tmp_path / 'results.db')
+    connection = sqlite3.connect(db_path)
+    connection.executescript("""
+        CREATE TABLE measurements (
+            run TEXT NOT NULL, reasoner TEXT NOT NULL, build TEXT NOT NULL, ontology TEXT NOT NULL,
+            syntax TEXT NOT NULL, task TEXT NOT NULL, mode TEXT NOT NULL, iteration INTEGER NOT NULL,
+            field TEXT NOT NULL, value REAL, status TEXT NOT NULL,
+            PRIMARY KEY (reasoner, build, ontology, syntax, task, mode, iteration, run, field)
+        ) WITHOUT ROWID;
+        CREATE INDEX measurements_run ON measurements (run);
+        INSERT INTO measurements VALUES ('run', 'HermiT', '', 'o.owl', 'functional', 'classification', 'time',
+                                         0, 'parsing', 1.0, 'ok');
+    """)
+    connection.close()
+
+    with ResultStore(db_path) as store:
+        assert store.query() == [('run', 'HermiT', '', '', 'o.owl', 'functional', 'classification', 'time',
+                                  0, 'parsing', 1.0, 'ok')]
+
+    with ResultStore(db_path) as store:
+        assert len(store.query(dataset='')) == 1
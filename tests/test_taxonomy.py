@@ -0,0 +1,72 @@
+import pytest
+
+from src.reasoners.taxonomy import TaxonomyComparator
+
+
+REFERENCE = """
+SubClassOf(<A> <B>)
+SubClassOf(<B> <C>)
+EquivalentClasses(<C> <D> <E>)
+SubClassOf(<F> ObjectSomeValuesFrom(<r> <G>))
+Declaration(Class(<H>))
+"""
+
+# Missing B <= C and E <= C, with a duplicate and an extra subsumption.
+TAXONOMY = """
+Declaration(Class(<H>))
+SubClassOf(<A> <B>)
+SubClassOf(<A> <B>)
+EquivalentClasses(<C> <D>)
+SubClassOf(<D> <E>)
+SubClassOf(<E> <D>)
+SubClassOf(<C> <E>)
+SubClassOf(<F> ObjectSomeValuesFrom(<r> <G>))
+SubClassOf(<H> <A>)
+"""
+
+
+@pytest.fixture
+def taxonomies(tmp_path):
+    paths = []
+
+    for name, contents in [('taxonomy.txt', TAXONOMY), ('reference.txt', REFERENCE)]:
+        file_path = tmp_path / name
+        file_path.write_text(contents)
+        paths.append(str(file_path))
+
+    return paths
+
+
+def test_compare(taxonomies):
+    diff = TaxonomyComparator().compare(*taxonomies)
+    assert not diff.same
+    assert diff.missing == 2
+    assert diff.extra == 1
+    assert sorted(diff.missing_samples) == ['<B> SubClassOf <C>', '<E> SubClassOf <C>']
+    assert diff.extra_samples == ['<H> SubClassOf <A>']
+
+
+def test_compare_same(taxonomies):
+    diff = TaxonomyComparator().compare(taxonomies[1], taxonomies[1])
+    assert diff.same
+    assert diff.missing_samples == diff.extra_samples == []
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3])
+def test_external_sort_matches_in_memory(taxonomies, tmp_path, chunk_size):
+    temp_dir = tmp_path / 'chunks'
+    temp_dir.mkdir()
+
+    expected = TaxonomyComparator().compare(*taxonomies)
+    diff = TaxonomyComparator(chunk_size=chunk_size, temp_dir=str(temp_dir)).compare(*taxonomies)
+
+    assert (diff.missing, diff.extra) == (expected.missing, expected.extra)
+    assert sorted(diff.missing_samples) == sorted(expected.missing_samples)
+    assert sorted(diff.extra_samples) == sorted(expected.extra_samples)
+    assert list(temp_dir.iterdir()) == []
+
+
+def test_max_samples(taxonomies):
+    diff = TaxonomyComparator(max_samples=1).compare(*taxonomies)
+    assert diff.missing == 2
+    assert len(diff.missing_samples) == 1
@@ -0,0 +1,22 @@
+import pytest
+
+from src.tests.timeouts import TimeoutPolicy
+
+
+def test_steps_are_sorted():
+    policy = TimeoutPolicy([1200.0, 60.0, 300.0])
+    assert policy.passes == 3
+    assert [policy.limit(i) for i in range(policy.passes)] == [60.0, 300.0, 1200.0]
+
+
+def test_relative_cap():
+    policy = TimeoutPolicy([60.0, 300.0, 1200.0], relative_cap=10.0)
+    assert policy.limit(2, best_time=20.0) == 200.0
+    assert policy.limit(2, best_time=1.0) == 60.0
+    assert policy.limit(1, best_time=100.0) == 300.0
+    assert policy.limit(2) == 1200.0
+
+
+def test_no_steps():
+    with pytest.raises(ValueError):
+        TimeoutPolicy([])